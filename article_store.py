@@ -0,0 +1,199 @@
+import json
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+from link_store import canonical_url
+from stories import tokens
+
+# الحقول المفهرسة للبحث النصي بترتيب أعمدة articles_fts
+SEARCH_FIELDS = ('title', 'summary', 'content_preview')
+
+
+def search_text(text):
+    """النص كما يُفهرس ويُبحث: موحّد، بلا أدوات ربط ولا أداة تعريف"""
+    return ' '.join(tokens(text or ''))
+
+
+def match_query(query):
+    """تحويل نص البحث إلى استعلام FTS5 آمن: كل كلمة بادئة، والكلمات كلها مطلوبة"""
+    words = tokens(query or '')
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+class ArticleStore:
+    """أرشيف الأخبار في SQLite مع فهرس بحث نصي FTS5
+
+    يُكتب دفعة واحدة في نهاية كل دورة جلب، ويُقرأ بترقيم keyset على
+    (first_seen, id) فلا يتباطأ التصفح مع كبر الأرشيف كما يحدث مع OFFSET.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS articles ('
+            'id INTEGER PRIMARY KEY, url TEXT NOT NULL UNIQUE, link TEXT NOT NULL, '
+            'title TEXT NOT NULL, source TEXT NOT NULL, summary TEXT, content_preview TEXT, '
+            'published TEXT, related TEXT, first_seen REAL NOT NULL, updated_at REAL NOT NULL)'
+        )
+        self.conn.execute(
+            'CREATE INDEX IF NOT EXISTS idx_articles_first_seen ON articles (first_seen, id)'
+        )
+        self.conn.execute(
+            'CREATE INDEX IF NOT EXISTS idx_articles_source ON articles (source, first_seen, id)'
+        )
+        # نسخة موحّدة من النص للبحث، rowid فيها هو id في articles
+        self.conn.execute(
+            'CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5('
+            f'{", ".join(SEARCH_FIELDS)}, tokenize="unicode61")'
+        )
+        # آخر دورة كاملة كما عُرضت، تقرأها عمليات الخادم الأخرى بدل أن تجلب بنفسها
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS cycles (id INTEGER PRIMARY KEY CHECK (id = 1), '
+            'updated_at REAL NOT NULL, news TEXT NOT NULL)'
+        )
+        self.conn.commit()
+
+    def add_news(self, news, updated_at=None):
+        """حفظ أخبار دورة كاملة في معاملة واحدة: news اسم المصدر -> العناصر
+
+        الخبر الموجود يُحدّث (الموجز والمصادر الأخرى قد تتغير) ويبقى وقت ظهوره الأول،
+        ولا يُعاد فهرسته إلا إن تغير فعلاً.
+        """
+        now = updated_at.timestamp() if updated_at else time.time()
+        rows = [
+            (
+                canonical_url(item['link']), item['link'], item['title'], item.get('source') or source,
+                item.get('summary'), item.get('content_preview'), item.get('published'),
+                json.dumps(item.get('related') or [], ensure_ascii=False), now, now
+            )
+            for source, items in news.items() for item in items
+        ]
+        changed = 0
+        with self.lock:
+            try:
+                self.conn.execute(
+                    'INSERT INTO cycles (id, updated_at, news) VALUES (1, ?, ?) '
+                    'ON CONFLICT (id) DO UPDATE SET updated_at = excluded.updated_at, news = excluded.news',
+                    (now, json.dumps(news, ensure_ascii=False))
+                )
+                for row in rows:
+                    updated = self.conn.execute(
+                        'INSERT INTO articles (url, link, title, source, summary, content_preview, '
+                        'published, related, first_seen, updated_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?) '
+                        'ON CONFLICT (url) DO UPDATE SET title = excluded.title, summary = excluded.summary, '
+                        'content_preview = excluded.content_preview, related = excluded.related, '
+                        'updated_at = excluded.updated_at '
+                        'WHERE (title, summary, content_preview, related) IS NOT '
+                        '(excluded.title, excluded.summary, excluded.content_preview, excluded.related) '
+                        'RETURNING id', row
+                    ).fetchone()
+                    if updated is None:
+                        continue
+                    article_id = updated[0]
+                    self.conn.execute('DELETE FROM articles_fts WHERE rowid = ?', (article_id,))
+                    self.conn.execute(
+                        'INSERT INTO articles_fts (rowid, title, summary, content_preview) VALUES (?, ?, ?, ?)',
+                        (article_id, search_text(row[2]), search_text(row[4]), search_text(row[5]))
+                    )
+                    changed += 1
+                self.conn.commit()
+            except Exception:
+                self.conn.rollback()
+                raise
+        return changed
+
+    def search(self, query=None, source=None, before=None, limit=20):
+        """أحدث الأخبار المطابقة أولاً
+
+        before: مؤشر (first_seen, id) من الصفحة السابقة، فتُرجع الأخبار الأقدم منه فقط.
+        يُرجع (الأخبار، مؤشر الصفحة التالية أو None).
+        """
+        conditions = []
+        params = []
+        if query:
+            match = match_query(query)
+            if not match:
+                return [], None
+            conditions.append('a.id IN (SELECT rowid FROM articles_fts WHERE articles_fts MATCH ?)')
+            params.append(match)
+        if source:
+            conditions.append('a.source = ?')
+            params.append(source)
+        if before:
+            conditions.append('(a.first_seen, a.id) < (?, ?)')
+            params.extend(before)
+        where = f'WHERE {" AND ".join(conditions)}' if conditions else ''
+        with self.lock:
+            rows = self.conn.execute(
+                f'SELECT a.* FROM articles a {where} ORDER BY a.first_seen DESC, a.id DESC LIMIT ?',
+                params + [limit + 1]
+            ).fetchall()
+        cursor = (rows[limit - 1]['first_seen'], rows[limit - 1]['id']) if len(rows) > limit else None
+        return [self.to_item(row) for row in rows[:limit]], cursor
+
+    def latest(self, per_source=5):
+        """آخر الأخبار المحفوظة لكل مصدر، لعرضها بعد إعادة التشغيل قبل أول دورة"""
+        with self.lock:
+            sources = [row[0] for row in self.conn.execute('SELECT DISTINCT source FROM articles')]
+            news = {}
+            for source in sources:
+                rows = self.conn.execute(
+                    'SELECT * FROM articles WHERE source = ? ORDER BY first_seen DESC, id DESC LIMIT ?',
+                    (source, per_source)
+                ).fetchall()
+                news[source] = [self.to_item(row) for row in rows]
+        return news
+
+    def cycle_time(self):
+        """وقت آخر دورة محفوظة، استعلام خفيف يُفحص دورياً"""
+        with self.lock:
+            row = self.conn.execute('SELECT updated_at FROM cycles WHERE id = 1').fetchone()
+        return datetime.fromtimestamp(row[0]) if row else None
+
+    def latest_cycle(self):
+        """آخر دورة محفوظة: (الأخبار، وقتها، رابط -> وقت ظهوره الأول) أو None"""
+        with self.lock:
+            row = self.conn.execute('SELECT updated_at, news FROM cycles WHERE id = 1').fetchone()
+            if row is None:
+                return None
+            news = json.loads(row['news'])
+            first_seen = {}
+            for items in news.values():
+                for item in items:
+                    seen = self.conn.execute(
+                        'SELECT first_seen FROM articles WHERE url = ?', (canonical_url(item['link']),)
+                    ).fetchone()
+                    if seen:
+                        first_seen[item['link']] = datetime.fromtimestamp(seen[0])
+        return news, datetime.fromtimestamp(row['updated_at']), first_seen
+
+    def to_item(self, row):
+        """الصف بنفس شكل عنصر الخبر في الواجهة"""
+        return {
+            'title': row['title'],
+            'link': row['link'],
+            'source': row['source'],
+            'summary': row['summary'],
+            'content_preview': row['content_preview'] or "",
+            'published': row['published'],
+            'related': json.loads(row['related'] or '[]'),
+            'first_seen': datetime.fromtimestamp(row['first_seen']).isoformat()
+        }
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_article_store(path):
+    """الحصول على أرشيف مشترك لكل ملف قاعدة بيانات داخل العملية"""
+    with _stores_lock:
+        if path not in _stores:
+            _stores[path] = ArticleStore(path)
+        return _stores[path]
@@ -0,0 +1,69 @@
+"""قياس سرعة مطابقة الكلمات المفتاحية: التنفيذ القديم مقابل المطابق المُجمّع
+
+التشغيل: python benchmarks/bench_keywords.py
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from keywords import SYRIA_KEYWORDS, syria_matcher
+
+TITLES = [
+    'الرئيس الفرنسي يلتقي المستشار الألماني لبحث أزمة الطاقة في أوروبا',
+    'ارتفاع أسعار النفط مع تزايد المخاوف من تباطؤ الاقتصاد العالمي',
+    'منتخب المغرب يتأهل إلى الدور نصف النهائي بعد فوز مثير',
+    'قصف جديد على ريف إدلب الجنوبي يوقع قتلى بين المدنيين',
+    'وفد من المعارضة السورية يصل إلى جنيف لجولة مفاوضات جديدة',
+    'الأمم المتحدة تحذر من أزمة غذاء في اليمن والسودان',
+    'زلزال بقوة 5 درجات يضرب جنوب تركيا دون أنباء عن ضحايا',
+    'انتخابات برلمانية في العراق وسط إقبال ضعيف',
+    'عودة مئات اللاجئين السوريين من لبنان عبر معبر جديدة يابوس',
+    'البنك المركزي الأوروبي يرفع أسعار الفائدة للمرة الرابعة',
+    # صيغ إملائية يفوتها التنفيذ القديم
+    'اشتباكات في ادلب وريف حماه الشمالي',
+    'الحكومة السوريـــة تعلن إجراءات اقتصادية جديدة',
+]
+
+
+def legacy_is_syria_related(title):
+    """التنفيذ السابق: بناء القائمة وفحص كل كلمة في كل استدعاء"""
+    syria_keywords = list(SYRIA_KEYWORDS)
+    title_lower = title.lower()
+    return any(keyword in title_lower for keyword in syria_keywords)
+
+
+def measure(func, titles, repeat=5):
+    """إرجاع أفضل معدل (عنوان في الثانية) من عدة تكرارات"""
+    best = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for title in titles:
+            func(title)
+        elapsed = time.perf_counter() - start
+        best = max(best, len(titles) / elapsed)
+    return best
+
+
+def main():
+    random.seed(0)
+    titles = [random.choice(TITLES) for _ in range(50000)]
+
+    legacy = measure(legacy_is_syria_related, titles)
+    compiled = measure(syria_matcher.search, titles)
+    matched = measure(syria_matcher.match, titles)
+
+    legacy_hits = sum(legacy_is_syria_related(title) for title in TITLES)
+    compiled_hits = sum(syria_matcher.search(title) for title in TITLES)
+
+    print(f"العناوين: {len(titles)}")
+    print(f"العناوين المطابقة من العينة: القديم {legacy_hits}، المُجمّع {compiled_hits} من {len(TITLES)}")
+    print(f"التنفيذ القديم:        {legacy:12,.0f} عنوان/ثانية")
+    print(f"المطابق المُجمّع:       {compiled:12,.0f} عنوان/ثانية ({compiled / legacy:.2f}x)")
+    print(f"مع إرجاع الكلمات:      {matched:12,.0f} عنوان/ثانية ({matched / legacy:.2f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+"""مقارنة معدل تحليل الصفحات الرئيسية (صفحة/ثانية) داخل العملية ومع عمليات التحليل
+
+تُحلل الصفحات المسجلة في benchmarks/fixtures (<مصدر>_home.html) مكررة حتى --pages صفحة،
+مرة بخيوط داخل العملية كما يفعل fetch_news دون عمليات تحليل، ومرة عبر ParsePool
+بنفس عدد العمليات، لكل قيمة من --workers. يُتحقق أيضاً من تطابق العناوين في الطريقتين.
+زمن بدء العمليات لا يُحسب في المعدل ويُعرض وحده.
+
+التشغيل: python benchmarks/bench_parse_pool.py [--pages 120] [--workers 1 2 4]
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES = os.path.join(ROOT, 'benchmarks', 'fixtures')
+sys.path.insert(0, ROOT)
+
+from config import CONFIG, get_source_registry
+from parse_pool import ParsePool, page_entries
+
+
+def load_pages(count):
+    """(الإعدادات، البايتات) لكل صفحة مسجلة، مكررة حتى count صفحة"""
+    pages = []
+    for source_key, config in CONFIG['sources'].items():
+        path = os.path.join(FIXTURES, f'{source_key}_home.html')
+        if config.get('selectors') and os.path.exists(path):
+            with open(path, 'rb') as f:
+                pages.append((config, f.read()))
+    return [pages[i % len(pages)] for i in range(count)] if pages else []
+
+
+def job_args(config, data):
+    return (data, 'utf-8', config.get('parser') or CONFIG['parser'], config['selectors'],
+            config['url'], config.get('keywords'))
+
+
+def run(pages, workers, parse):
+    """تحليل كل الصفحات بـ workers خيطاً؛ يُرجع (صفحة/ثانية، النتائج)"""
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as threads:
+        results = list(threads.map(lambda page: parse(*job_args(*page)), pages))
+    return len(pages) / (time.perf_counter() - started), results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pages', type=int, default=120)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4])
+    args = parser.parse_args()
+
+    get_source_registry()
+    pages = load_pages(args.pages)
+    if not pages:
+        print("لا توجد صفحات رئيسية مسجلة، شغّل benchmarks/record_fixtures.py أولاً")
+        return 1
+
+    print(f"الصفحات: {len(pages)}، أنوية المعالج: {os.cpu_count()}")
+    print(f"{'العمليات':>8} {'داخل العملية':>14} {'عمليات التحليل':>15} {'التسريع':>8} {'بدء العمليات':>13}  النتيجة")
+    failures = 0
+    for workers in args.workers:
+        baseline, expected = run(pages, workers, page_entries)
+
+        pool = ParsePool(workers)
+        started = time.perf_counter()
+        # بدء كل العمليات قبل القياس
+        run(pages[:workers], workers, pool.page_entries)
+        warmup = time.perf_counter() - started
+        pooled, results = run(pages, workers, pool.page_entries)
+        pool.shutdown()
+
+        same = [rows for _, rows, _ in results] == [rows for _, rows, _ in expected]
+        failures += not same
+        print(f"{workers:>8} {baseline:>10.1f} ص/ث {pooled:>11.1f} ص/ث {pooled / baseline:>7.2f}x "
+              f"{warmup * 1000:>10.0f}ms  {'متطابقة' if same else 'مختلفة'}")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,99 @@
+"""التحقق من محرك التحليل البديل ومقارنة زمن المعالج لكل صفحة
+
+التشغيل: python benchmarks/bench_parsers.py [ملفات أو مجلدات HTML ...]
+
+الملفات المسماة <مفتاح المصدر>_home*.html (مثل aljazeera_home.html) تُعامل
+كصفحات رئيسية لذلك المصدر، وغيرها تُعامل كصفحات مقالات.
+"""
+import glob
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bs4 import BeautifulSoup
+
+from config import CONFIG, get_source_registry
+from parsers import CONTENT_SELECTORS, article_text, make_soup, strainer_for
+
+DEFAULT_FIXTURES = os.path.join(ROOT, 'benchmarks', 'fixtures')
+
+
+def collect_pages(paths):
+    pages = []
+    for path in paths or [DEFAULT_FIXTURES]:
+        if os.path.isdir(path):
+            pages.extend(sorted(glob.glob(os.path.join(path, '**', '*.html'), recursive=True)))
+        else:
+            pages.append(path)
+    return pages
+
+
+def source_for(path):
+    name = os.path.basename(path)
+    for key in CONFIG['sources']:
+        if name.startswith(f'{key}_home'):
+            return key
+    return None
+
+
+def headlines(soup, selectors):
+    """(العنوان، الرابط) لكل عنصر كما يقرؤها fetch_news"""
+    items = []
+    for article in soup.select(selectors['container'])[:100]:
+        title_element = article.select_one(selectors['title'])
+        link_element = article.select_one(selectors['link']) or article
+        if title_element:
+            items.append((title_element.get_text(strip=True), link_element.get('href')))
+    return items
+
+
+def cpu_time(func, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.process_time()
+        result = func()
+        elapsed = time.process_time() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+
+def main():
+    get_source_registry()
+    pages = collect_pages(sys.argv[1:])
+    if not pages:
+        print("لا توجد صفحات محفوظة للمقارنة")
+        return 1
+
+    failures = 0
+    print(f"{'الصفحة':40} {'html.parser':>12} {'lxml':>10} {'التسريع':>8}  النتيجة")
+    for path in pages:
+        with open(path, 'rb') as f:
+            data = f.read()
+
+        source_key = source_for(path)
+        if source_key:
+            selectors = CONFIG['sources'][source_key]['selectors']
+            strainer = strainer_for([selectors['container']])
+            extract = lambda soup: headlines(soup, selectors)
+        else:
+            strainer = strainer_for(CONTENT_SELECTORS)
+            extract = article_text
+
+        baseline, baseline_time = cpu_time(
+            lambda: extract(BeautifulSoup(data.decode('utf-8', 'replace'), 'html.parser')), 5)
+        fast, fast_time = cpu_time(
+            lambda: extract(make_soup(data, 'lxml', strainer)), 5)
+
+        same = baseline == fast
+        failures += not same
+        print(f"{os.path.basename(path):40} {baseline_time * 1000:10.1f}ms {fast_time * 1000:8.1f}ms "
+              f"{baseline_time / max(fast_time, 1e-9):7.1f}x  {'مطابق' if same else 'مختلف'}")
+
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,221 @@
+"""قياس أداء خط الجلب دون اتصال بالإنترنت
+
+يشغّل خادماً محلياً يقدم الصفحات والخلاصات المسجلة في benchmarks/fixtures لكل مصدر،
+ويقيس لكل مصدر: زمن تحليل الصفحة، زمن المطابقة، زمن تحليل الخلاصة، زمن fetch_news، وذروة الذاكرة،
+ثم زمن get_all_news كاملاً. تُحفظ النتائج بصيغة JSON للمقارنة بين الإصدارات.
+
+التشغيل: python benchmarks/bench_pipeline.py [--repeat 5] [--output results.json]
+"""
+import argparse
+import http.server
+import json
+import os
+import socketserver
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES = os.path.join(ROOT, 'benchmarks', 'fixtures')
+RESULTS = os.path.join(ROOT, 'benchmarks', 'results')
+sys.path.insert(0, ROOT)
+
+# بيئة معزولة: لا تيليجرام ولا Hugging Face، وملفات البيانات في مجلد مؤقت
+for variable in ('TELEGRAM_TOKEN', 'CHAT_ID', 'HUGGING_FACE_TOKEN'):
+    os.environ.pop(variable, None)
+CALLER_CWD = os.getcwd()
+WORKDIR = tempfile.mkdtemp(prefix='news-bench-')
+os.chdir(WORKDIR)
+
+from feeds import iter_feed
+from fingerprints import get_fingerprint_store
+from config import get_source_registry
+from main import CONFIG, NewsBot
+
+
+class FixtureHandler(http.server.BaseHTTPRequestHandler):
+    """/<مفتاح المصدر>/ تعيد الصفحة الرئيسية، و /<مفتاح المصدر>/feed الخلاصة، وأي مسار آخر صفحة المقال"""
+
+    def do_GET(self):
+        parts = self.path.strip('/').split('/', 1)
+        source_key = parts[0]
+        if len(parts) == 1:
+            path = os.path.join(FIXTURES, f'{source_key}_home.html')
+        elif parts[1] == 'feed':
+            path = os.path.join(FIXTURES, f'{source_key}_feed.xml')
+        else:
+            path = os.path.join(FIXTURES, f'{source_key}_article.html')
+        if not os.path.exists(path):
+            self.send_error(404)
+            return
+        with open(path, 'rb') as f:
+            body = f.read()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/rss+xml; charset=utf-8' if path.endswith('.xml') else 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class FixtureServer(socketserver.ThreadingMixIn, http.server.HTTPServer):
+    daemon_threads = True
+
+
+def start_server():
+    server = FixtureServer(('127.0.0.1', 0), FixtureHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f'http://127.0.0.1:{server.server_address[1]}'
+
+
+def reset_state(bot=None):
+    """إلغاء ما يجعل الدورة التالية أسرع من الأولى: العناوين المخزنة والبصمات والروابط المحجوزة والأخبار المجمعة"""
+    with NewsBot.headline_cache_lock:
+        NewsBot.headline_cache.clear()
+    get_fingerprint_store(CONFIG['fingerprints_db']).clear()
+    if bot is not None:
+        bot.release_claims()
+
+
+def timed(func, repeat):
+    samples = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        samples.append(time.perf_counter() - start)
+    return result, samples
+
+
+def describe(samples):
+    return {
+        'median_ms': round(statistics.median(samples) * 1000, 3),
+        'min_ms': round(min(samples) * 1000, 3),
+        'max_ms': round(max(samples) * 1000, 3)
+    }
+
+
+def bench_source(bot, source_key, repeat):
+    config = CONFIG['sources'][source_key]
+    with open(os.path.join(FIXTURES, f'{source_key}_home.html'), 'rb') as f:
+        data = f.read()
+    response = type('FixtureResponse', (), {
+        'content': data,
+        'text': data.decode('utf-8'),
+        'encoding': 'utf-8',
+        'headers': {'Content-Type': 'text/html; charset=utf-8'}
+    })()
+    container = config['selectors']['container']
+
+    parse = lambda: bot.parse_page(response, config.get('parser'), [container]).select(container)
+    containers, parse_samples = timed(parse, repeat)
+    headlines, match_samples = timed(lambda: bot.extract_headlines(containers, config), repeat)
+
+    tracemalloc.start()
+    bot.extract_headlines(parse(), config)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    feed = None
+    feed_path = os.path.join(FIXTURES, f'{source_key}_feed.xml')
+    if os.path.exists(feed_path):
+        with open(feed_path, 'rb') as f:
+            feed_data = f.read()
+        chunks = lambda: (feed_data[i:i + 16 * 1024] for i in range(0, len(feed_data), 16 * 1024))
+        entries, feed_samples = timed(lambda: list(iter_feed(chunks(), config['feed_url'])), repeat)
+        feed = {'bytes': len(feed_data), 'entries': len(entries), 'parse': describe(feed_samples)}
+
+    def fetch():
+        reset_state(bot)
+        return bot.fetch_news(source_key)
+
+    items, fetch_samples = timed(fetch, repeat)
+
+    return {
+        'engine': config.get('parser') or CONFIG['parser'],
+        'page_bytes': len(data),
+        'containers': len(containers),
+        'matched_headlines': len(headlines),
+        'items': len(items or []),
+        'parse': describe(parse_samples),
+        'match': describe(match_samples),
+        'fetch_news': describe(fetch_samples),
+        'peak_memory_kb': round(peak / 1024, 1),
+        'feed': feed
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except Exception:
+        return None
+
+
+def main_bench():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--output', help='ملف JSON للنتائج (الافتراضي benchmarks/results/<revision>.json)')
+    args = parser.parse_args()
+
+    server, base_url = start_server()
+    get_source_registry()
+    CONFIG['fetch']['jitter'] = [0, 0]
+    for source_key, config in CONFIG['sources'].items():
+        config['url'] = f'{base_url}/{source_key}'
+        if os.path.exists(os.path.join(FIXTURES, f'{source_key}_feed.xml')):
+            config['feed_url'] = f'{base_url}/{source_key}/feed'
+        else:
+            config['type'] = 'html'
+
+    bot = NewsBot()
+    results = {
+        'revision': git_revision(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': sys.version.split()[0],
+        'repeat': args.repeat,
+        'sources': {}
+    }
+
+    print(f"{'المصدر':14} {'تحليل':>9} {'مطابقة':>9} {'خلاصة':>9} {'fetch_news':>11} {'ذاكرة':>10}")
+    for source_key, config in CONFIG['sources'].items():
+        if not os.path.exists(os.path.join(FIXTURES, f'{source_key}_home.html')):
+            print(f"{source_key:14} لا توجد صفحة مسجلة")
+            continue
+        stats = bench_source(bot, source_key, args.repeat)
+        results['sources'][source_key] = stats
+        feed_ms = f"{stats['feed']['parse']['median_ms']:7.1f}ms" if stats['feed'] else f"{'-':>9}"
+        print(f"{source_key:14} {stats['parse']['median_ms']:7.1f}ms {stats['match']['median_ms']:7.1f}ms "
+              f"{feed_ms} {stats['fetch_news']['median_ms']:9.1f}ms {stats['peak_memory_kb']:8.0f}KB")
+
+    def cycle():
+        reset_state()
+        return NewsBot().get_all_news()
+
+    news, cycle_samples = timed(cycle, args.repeat)
+    results['get_all_news'] = describe(cycle_samples)
+    results['get_all_news']['items'] = sum(len(items) for items in news.values())
+    print(f"get_all_news: {results['get_all_news']['median_ms']:.1f}ms "
+          f"({results['get_all_news']['items']} خبر)")
+
+    if args.output:
+        output = os.path.join(CALLER_CWD, args.output)
+    else:
+        output = os.path.join(RESULTS, f"{results['revision'] or 'latest'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f"تم حفظ النتائج في {output}")
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main_bench()
@@ -0,0 +1,86 @@
+"""قياس زمن بدء واجهة الويب والتحقق من أن استيرادها بلا آثار جانبية
+
+كل تكرار عملية Python جديدة في مجلد مؤقت فارغ تستورد web_app وتبني التطبيق
+ثم تطلب /api/status، ويُتحقق من أن الاستيراد لم يبدأ خيوطاً ولم ينشئ مجلد data
+ولم يحمّل main أو تيليجرام أو BeautifulSoup. يفشل (رمز الخروج 1) إن تجاوز الوسيط
+STARTUP_BUDGET_MS أو ظهر أي أثر جانبي.
+
+التشغيل: python benchmarks/bench_startup.py [--repeat 5]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# الوحدات الثقيلة التي يجب ألا يحمّلها الاستيراد ولا /api/status
+HEAVY_MODULES = ('main', 'ingest', 'telegram', 'telegram_scheduler', 'bs4', 'requests')
+
+PROBE = f"""
+import json, os, sys, threading, time
+sys.path.insert(0, {ROOT!r})
+started = time.perf_counter()
+import web_app
+app = web_app.create_app(start_workers=False)
+ready_ms = (time.perf_counter() - started) * 1000
+threads = threading.active_count()
+data_dir = os.path.exists('data')
+started = time.perf_counter()
+response = app.test_client().get('/api/status')
+status_ms = (time.perf_counter() - started) * 1000
+print(json.dumps({{
+    'ready_ms': ready_ms,
+    'status_ms': status_ms,
+    'status_code': response.status_code,
+    'threads': threads,
+    'data_dir': data_dir,
+    'heavy': [name for name in {HEAVY_MODULES!r} if name in sys.modules],
+    'budget_ms': web_app.STARTUP_BUDGET_MS
+}}))
+"""
+
+
+def probe():
+    with tempfile.TemporaryDirectory(prefix='news-startup-') as workdir:
+        output = subprocess.run(
+            [sys.executable, '-c', PROBE], cwd=workdir, capture_output=True, text=True, check=True
+        ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    runs = [probe() for _ in range(args.repeat)]
+    ready = statistics.median(run['ready_ms'] for run in runs)
+    status = statistics.median(run['status_ms'] for run in runs)
+    budget = runs[0]['budget_ms']
+
+    problems = []
+    if ready > budget:
+        problems.append(f"زمن البدء {ready:.1f}ms أكثر من الحد {budget}ms")
+    for run in runs:
+        if run['threads'] != 1:
+            problems.append(f"الاستيراد بدأ {run['threads'] - 1} خيطاً")
+        if run['data_dir']:
+            problems.append("الاستيراد أنشأ مجلد data")
+        if run['heavy']:
+            problems.append(f"وحدات ثقيلة محمّلة: {', '.join(run['heavy'])}")
+        if run['status_code'] != 200:
+            problems.append(f"/api/status أعاد {run['status_code']}")
+
+    print(f"الاستيراد وبناء التطبيق: {ready:7.1f}ms (الحد {budget}ms)")
+    print(f"أول طلب /api/status:     {status:7.1f}ms")
+    for problem in dict.fromkeys(problems):
+        print(f"فشل: {problem}")
+    return 1 if problems else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,59 @@
+"""تسجيل الصفحات الرئيسية وصفحة مقال لكل مصدر في benchmarks/fixtures
+
+التشغيل (يتطلب اتصالاً بالإنترنت): python benchmarks/record_fixtures.py [مفتاح المصدر ...]
+
+تُحفظ الصفحات كما وصلت (بايتات) باسم <المصدر>_home.html و <المصدر>_article.html،
+والخلاصة باسم <المصدر>_feed.xml إن كان للمصدر feed_url،
+وتُختار صفحة المقال من أول خبر يمر بفلتر الأخبار السورية أو أول خبر عموماً.
+"""
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FIXTURES = os.path.join(ROOT, 'benchmarks', 'fixtures')
+sys.path.insert(0, ROOT)
+
+from main import CONFIG, NewsBot
+
+
+def record(bot, source_key):
+    config = CONFIG['sources'][source_key]
+    headers = bot.get_random_headers()
+    response = bot.http.get(config['url'], headers=headers, timeout=15)
+    response.raise_for_status()
+    with open(os.path.join(FIXTURES, f'{source_key}_home.html'), 'wb') as f:
+        f.write(response.content)
+
+    if config.get('feed_url'):
+        feed = bot.http.get(config['feed_url'], headers=headers, timeout=15)
+        feed.raise_for_status()
+        with open(os.path.join(FIXTURES, f'{source_key}_feed.xml'), 'wb') as f:
+            f.write(feed.content)
+
+    soup = bot.parse_page(response, config.get('parser'), [config['selectors']['container']])
+    containers = soup.select(config['selectors']['container'])
+    headlines = bot.extract_headlines(containers, config)
+    if not headlines:
+        print(f"{source_key}: لم يُعثر على خبر سوري، لن تُسجل صفحة مقال")
+        return
+
+    _, link = headlines[0]
+    article = bot.http.get(link, headers=headers, timeout=10)
+    article.raise_for_status()
+    with open(os.path.join(FIXTURES, f'{source_key}_article.html'), 'wb') as f:
+        f.write(article.content)
+    print(f"{source_key}: {len(response.content)} + {len(article.content)} بايت")
+
+
+def main():
+    os.makedirs(FIXTURES, exist_ok=True)
+    bot = NewsBot()
+    for source_key in sys.argv[1:] or list(CONFIG['sources']):
+        try:
+            record(bot, source_key)
+        except Exception as e:
+            print(f"{source_key}: فشل التسجيل: {e}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+import atexit
+import logging
+import os
+import queue
+import re
+import sys
+import threading
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# [2024-01-01 12:00:00] [INFO] [aljazeera] الرسالة — المستوى والمصدر اختياريان للسطور القديمة
+LINE_PATTERN = re.compile(
+    r'^\[(?P<timestamp>[\d\- :]{19})\](?: \[(?P<level>[A-Z]+)\])?(?: \[(?P<source>[\w\-]+)\])? '
+)
+
+
+class LineFormatter(logging.Formatter):
+    """تنسيق سطر السجل: [الوقت] [المستوى] [المصدر] الرسالة"""
+
+    def format(self, record):
+        timestamp = datetime.fromtimestamp(record.created).strftime(TIMESTAMP_FORMAT)
+        source = getattr(record, 'source', None)
+        source_tag = f" [{source}]" if source else ""
+        return f"[{timestamp}] [{record.levelname}]{source_tag} {record.getMessage()}"
+
+
+_loggers = {}
+_loggers_lock = threading.Lock()
+
+
+def get_logger(path, max_bytes=5 * 1024 * 1024, backup_count=5):
+    """مسجل مشترك لكل ملف: الكتابة تتم في خيط خلفي مع تدوير الملف حسب الحجم"""
+    with _loggers_lock:
+        if path in _loggers:
+            return _loggers[path]
+
+        formatter = LineFormatter()
+        file_handler = RotatingFileHandler(
+            path, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8', delay=True
+        )
+        file_handler.setFormatter(formatter)
+        console_handler = logging.StreamHandler(sys.stdout)
+        console_handler.setFormatter(formatter)
+
+        records = queue.SimpleQueue()
+        listener = QueueListener(records, file_handler, console_handler)
+        listener.start()
+        atexit.register(listener.stop)  # كتابة ما تبقى في الطابور عند الخروج
+
+        logger = logging.getLogger(f'news_bot.{os.path.abspath(path)}')
+        logger.setLevel(logging.DEBUG)
+        logger.propagate = False
+        logger.addHandler(QueueHandler(records))
+        _loggers[path] = logger
+        return logger
+
+
+def parse_time(value):
+    """قراءة وقت من ISO أو من صيغة السجل"""
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        return value
+    try:
+        return datetime.fromisoformat(value).replace(tzinfo=None)
+    except ValueError:
+        return datetime.strptime(value, TIMESTAMP_FORMAT)
+
+
+def line_matches(line, level=None, source=None, since=None, until=None):
+    if not (level or source or since or until):
+        return True
+    match = LINE_PATTERN.match(line)
+    if not match:
+        return False
+    if level and (match.group('level') or 'INFO') != level.upper():
+        return False
+    if source and match.group('source') != source:
+        return False
+    if since or until:
+        timestamp = datetime.strptime(match.group('timestamp'), TIMESTAMP_FORMAT)
+        if since and timestamp < since:
+            return False
+        if until and timestamp > until:
+            return False
+    return True
+
+
+def tail_log(path, lines=100, level=None, source=None, since=None, until=None,
+             block_size=64 * 1024, max_scan_bytes=4 * 1024 * 1024):
+    """آخر السطور المطابقة بالقراءة من نهاية الملف، دون قراءة الملف كاملاً
+
+    يُحد البحث بـ max_scan_bytes حتى تبقى الفلاتر النادرة رخيصة في الملفات الكبيرة.
+    """
+    since = parse_time(since)
+    until = parse_time(until)
+    found = []
+    with open(path, 'rb') as f:
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        scanned = 0
+        remainder = b''
+        while position > 0 and len(found) < lines and scanned < max_scan_bytes:
+            size = min(block_size, position)
+            position -= size
+            scanned += size
+            f.seek(position)
+            chunk = f.read(size) + remainder
+            parts = chunk.split(b'\n')
+            # أول جزء قد يكون سطراً مقطوعاً يكتمل مع الكتلة السابقة
+            remainder = parts.pop(0) if position > 0 else b''
+            for raw in reversed(parts):
+                if not raw:
+                    continue
+                line = raw.decode('utf-8', 'replace')
+                if line_matches(line, level, source, since, until):
+                    found.append(line + '\n')
+                    if len(found) >= lines:
+                        break
+    found.reverse()
+    return found
@@ -0,0 +1,185 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitOpenError(Exception):
+    """الاعتمادية معطلة مؤقتاً، فلا يُرسل الطلب أصلاً"""
+
+    def __init__(self, name, retry_in):
+        super().__init__(f"{name} معطل مؤقتاً، إعادة المحاولة بعد {round(retry_in)} ثانية")
+        self.name = name
+        self.retry_in = retry_in
+
+
+class CircuitBreaker:
+    """قاطع دائرة لاعتمادية واحدة (مصدر، مضيف مقالات، واجهة التلخيص)
+
+    closed: الطلبات تمر، ويُفتح القاطع إن تجاوزت نسبة الفشل الحد في آخر window محاولة.
+    open: الطلبات تُرفض فوراً حتى تنتهي المدة، ثم half_open: محاولة اختبار واحدة،
+    نجاحها يغلق القاطع وفشلها يعيد فتحه بمدة مضاعفة حتى max_open_seconds.
+    """
+
+    def __init__(self, name, config):
+        self.name = name
+        self.config = config
+        self.lock = threading.Lock()
+        self.state = CLOSED
+        self.calls = deque(maxlen=config['window'])  # (نجح؟، الزمن بالثواني)
+        self.open_seconds = config['open_seconds']
+        self.open_until = 0.0  # monotonic
+        self.probing = False
+        self.last_error = None
+        self.last_error_at = None
+        self.opened_count = 0
+
+    def retry_in(self):
+        return max(0.0, self.open_until - time.monotonic())
+
+    def is_open(self):
+        """هل يُرفض الطلب الآن؟ لا يحجز محاولة الاختبار"""
+        with self.lock:
+            if self.state == OPEN:
+                return time.monotonic() < self.open_until
+            return self.state == HALF_OPEN and self.probing
+
+    def allow(self):
+        """هل يُسمح بطلب الآن؟ في half_open يُحجز طلب الاختبار الوحيد"""
+        with self.lock:
+            if self.state == OPEN and time.monotonic() >= self.open_until:
+                self.state = HALF_OPEN
+                self.probing = False
+            if self.state == CLOSED:
+                return True
+            if self.state == HALF_OPEN and not self.probing:
+                self.probing = True
+                return True
+            return False
+
+    def record_success(self, seconds):
+        with self.lock:
+            if self.state == HALF_OPEN:
+                # الإخفاقات السابقة لا تُحسب على الاعتمادية بعد تعافيها
+                self.state = CLOSED
+                self.probing = False
+                self.open_seconds = self.config['open_seconds']
+                self.calls.clear()
+            self.calls.append((True, seconds))
+
+    def record_failure(self, seconds, error):
+        with self.lock:
+            self.calls.append((False, seconds))
+            self.last_error = str(error)[:300]
+            self.last_error_at = time.time()
+            if self.state == HALF_OPEN:
+                self.open_seconds = min(self.open_seconds * 2, self.config['max_open_seconds'])
+                self.trip()
+            elif self.state == CLOSED and len(self.calls) >= self.config['min_calls']:
+                failures = sum(1 for ok, _ in self.calls if not ok)
+                if failures / len(self.calls) >= self.config['failure_rate']:
+                    self.trip()
+
+    def trip(self):
+        self.state = OPEN
+        self.probing = False
+        self.open_until = time.monotonic() + self.open_seconds
+        self.opened_count += 1
+
+    def release(self):
+        """طلب سُمح به ولم يُرسل أصلاً: لا نجاح ولا فشل، ومحاولة الاختبار تبقى متاحة"""
+        with self.lock:
+            if self.state == HALF_OPEN:
+                self.probing = False
+
+    @contextmanager
+    def call(self, failures=(Exception,), ignore=()):
+        """تنفيذ كتلة عبر القاطع؛ ترفع CircuitOpenError دون تنفيذها إن كان مفتوحاً
+
+        الاستثناءات من failures فقط تُحسب فشلاً للاعتمادية، وغيرها (مثل خطأ تحليل
+        رد سليم) يُحسب نجاحاً للطلب ثم يُرفع كما هو. استثناءات ignore (طلب لم يُرسل)
+        لا تُحسب أبداً.
+        """
+        if not self.allow():
+            raise CircuitOpenError(self.name, self.retry_in())
+        start = time.perf_counter()
+        try:
+            yield
+        except ignore:
+            self.release()
+            raise
+        except failures as e:
+            self.record_failure(time.perf_counter() - start, e)
+            raise
+        except BaseException:
+            self.record_success(time.perf_counter() - start)
+            raise
+        self.record_success(time.perf_counter() - start)
+
+    def health(self):
+        """إحصائيات آخر window محاولة للعرض"""
+        with self.lock:
+            calls = list(self.calls)
+            state = self.state
+            if state == OPEN and time.monotonic() >= self.open_until:
+                state = HALF_OPEN
+            latencies = sorted(seconds for _, seconds in calls)
+            return {
+                'state': state,
+                'calls': len(calls),
+                'success_rate': round(sum(ok for ok, _ in calls) / len(calls), 3) if calls else None,
+                'p50_ms': _percentile_ms(latencies, 0.5),
+                'p95_ms': _percentile_ms(latencies, 0.95),
+                'last_error': self.last_error,
+                'last_error_at': datetime.fromtimestamp(self.last_error_at).isoformat() if self.last_error_at else None,
+                'retry_in': round(self.retry_in()) if state == OPEN else 0,
+                'opened_count': self.opened_count
+            }
+
+
+def _percentile_ms(values, q):
+    if not values:
+        return None
+    return round(values[min(len(values) - 1, int(q * len(values)))] * 1000, 1)
+
+
+class BreakerRegistry:
+    """قاطع لكل اعتمادية بالاسم، يُنشأ عند أول استخدام"""
+
+    def __init__(self, config):
+        self.config = config
+        self.lock = threading.Lock()
+        self.breakers = {}
+
+    def get(self, name):
+        with self.lock:
+            if name not in self.breakers:
+                self.breakers[name] = CircuitBreaker(name, self.config)
+            return self.breakers[name]
+
+    def health(self, name=None):
+        """صحة اعتمادية واحدة (None إن لم تُستخدم بعد) أو كل الاعتماديات"""
+        with self.lock:
+            breakers = dict(self.breakers)
+        if name is not None:
+            breaker = breakers.get(name)
+            return breaker.health() if breaker else None
+        return {key: breaker.health() for key, breaker in sorted(breakers.items())}
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_breakers(config):
+    """سجل القواطع المشترك على مستوى العملية"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = BreakerRegistry(config)
+        return _registry
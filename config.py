@@ -0,0 +1,117 @@
+import os
+import threading
+
+CONFIG = {
+    'sent_links_file': 'data/sent_links.json',  # الملف القديم، يُستورد مرة واحدة
+    'sent_links_db': 'data/sent_links.db',
+    'sent_links_ttl_days': 30,  # مدة تذكر الرابط المرسل
+    'fingerprints_db': 'data/fingerprints.db',  # عناصر الصفحات من الدورات السابقة
+    'fingerprints_ttl_days': 7,
+    'articles_db': 'data/articles.db',  # أرشيف كل الأخبار المجلوبة مع فهرس البحث
+    'log_file': 'data/bot_log.txt',
+    'log_max_bytes': 5 * 1024 * 1024,  # تدوير ملف السجل عند هذا الحجم
+    'log_backup_count': 5,
+    'fetch': {
+        'concurrent': True,  # جلب المصادر بالتوازي بدلاً من التتابع
+        'max_workers': 5,
+        'source_deadline': 45,  # أقصى زمن بالثواني لكل مصدر
+        'cycle_deadline': 60,  # أقصى زمن بالثواني للدورة كاملة
+        'enrich_workers': 8,  # خيوط جلب محتوى المقالات والموجزات
+        'per_host_limit': 2,  # أقصى عدد طلبات متزامنة لكل مضيف
+        'jitter': [0.5, 2.0],  # تأخير عشوائي بالثواني قبل طلب الصفحة الرئيسية
+        'feed_min_description': 120,  # وصف الخلاصة بهذا الطول أو أكثر يغني عن جلب المقال
+        'parse_workers': 0  # عمليات تحليل الصفحات الرئيسية على أنوية المعالج؛ 0: التحليل داخل العملية
+    },
+    'http': {
+        'pool_connections': 10,  # عدد المضيفين المحتفظ باتصالاتهم
+        'pool_maxsize': 4,  # الاتصالات المفتوحة لكل مضيف
+        'hosts': {
+            'api-inference.huggingface.co': 8
+        },
+        'retries': 2,
+        'backoff_factor': 0.5
+    },
+    'parser': 'lxml',  # محرك التحليل الافتراضي، يمكن تغييره لكل مصدر بالمفتاح parser
+    'summary': {
+        'backend': 'remote',  # remote: Hugging Face API، local: نموذج محلي على المعالج
+        'remote_model': 'csebuetnlp/mT5_multilingual_XLSum',
+        'local_model': 'csebuetnlp/mT5_multilingual_XLSum',
+        'max_length': 100,
+        'min_length': 30,
+        'cache_file': 'data/summary_cache.db',
+        'cache_size': 5000  # عدد الموجزات المحفوظة قبل حذف الأقدم استخداماً
+    },
+    'telegram': {
+        'queue_file': 'data/telegram_queue.db',  # الرسائل المعلقة تبقى بعد إعادة التشغيل
+        'queue_lock_file': 'data/telegram_queue.lock',  # عامل إرسال واحد فقط لكل نشر
+        'global_rate': 30,  # رسالة في الثانية لكل البوت
+        'chat_rate': 1,  # رسالة في الثانية للمحادثات الخاصة
+        'group_rate_per_minute': 20,  # للمجموعات والقنوات
+        'chat_burst': 3,
+        'max_attempts': 5,
+        'backoff_base': 2,  # ثوانٍ، تتضاعف مع كل محاولة
+        # digest: أخبار الدورة في أقل عدد من الرسائل، items: رسالة لكل خبر
+        'mode': 'digest',
+        'chat_modes': {}  # معرّف المحادثة -> الطريقة، لمن يخالف الطريقة العامة
+    },
+    'breakers': {
+        'window': 20,  # آخر N محاولة لكل اعتمادية تُحسب منها نسبة الفشل
+        'min_calls': 3,  # لا يُفتح القاطع قبل هذا العدد من المحاولات
+        'failure_rate': 0.5,
+        'open_seconds': 60,  # مدة رفض الطلبات قبل محاولة الاختبار، تتضاعف مع كل فشل للاختبار
+        'max_open_seconds': 900
+    },
+    'scheduler': {
+        'coalesce_window': 300,  # ثوانٍ: المواعيد المتقاربة تُدمج في دورة واحدة
+        'max_sleep': 3600,  # أقصى مدة نوم قبل إعادة فحص المواعيد
+        'lock_file': 'data/scheduler.lock'  # مجدول واحد فقط لكل نشر مهما كان عدد العمليات
+    },
+    'polling': {
+        'adaptive': True,  # فترة جلب متكيفة لكل مصدر، وإلا يُجلب كل مصدر في كل دورة
+        'initial_interval': 600,  # ثوانٍ
+        'min_interval': 300,
+        'max_interval': 3600,
+        'speedup': 0.5,  # عند ظهور أكثر من خبر جديد
+        'slowdown': 1.5,  # عند عدم ظهور أي خبر جديد
+        'error_backoff': 60,  # يتضاعف مع كل خطأ متتالٍ
+        'max_backoff': 3600,
+        'jitter': 0.2  # إزاحة عشوائية ±20% لكل موعد
+    },
+    'ingest': {
+        'reuse_age': 120,  # ثوانٍ: نتيجة دورة أحدث من ذلك تُستخدم بدل جلب جديد
+        'lock_file': 'data/ingest.lock',  # عملية الخادم الحاملة له وحدها تجلب المصادر
+        'requests_dir': 'data',  # طلبات بقية العمليات إلى الجالبة: <الاسم>.request
+        'state_file': 'data/ingest_state.json',  # حالة الجلب والقياسات تنشرها العملية الجالبة لبقية العمليات
+        'follow_interval': 5  # ثوانٍ بين فحوص بقية العمليات للأرشيف بحثاً عن دورة جديدة
+    },
+    'dedup': {
+        'enabled': True,  # تجميع الخبر نفسه من عدة مصادر قبل جلب محتواه وتلخيصه
+        'threshold': 0.6,  # أدنى تشابه Jaccard تقديري بين عنوانين (أو نصين) للخبر نفسه
+        'window_hours': 12,  # الأخبار الأقدم لا تُقارن بها الأخبار الجديدة
+        'num_perm': 64,  # طول توقيع MinHash
+        'bands': 32  # نطاقات LSH؛ أكثر يعني مقارنة أزواج أقل تشابهاً
+    },
+    # المصادر في ملف sources.json، تُحمّل عند أول استخدام عبر get_source_registry ويُعاد تحميلها عند تغيره
+    'sources_file': os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sources.json'),
+    'sources': {}
+}
+
+
+def ensure_data_dir():
+    """مجلد ملفات البيانات يُنشأ عند أول استخدام فعلي لا عند الاستيراد"""
+    os.makedirs('data', exist_ok=True)
+
+
+_registry = None
+_registry_lock = threading.Lock()
+
+
+def get_source_registry():
+    """سجل المصادر المشترك؛ يُقرأ ملف المصادر عند أول استدعاء فقط ويملأ CONFIG['sources']"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            # التحقق من المحددات يحمّل soupsieve و bs4، فلا يُستورد إلا هنا
+            from source_registry import SourceRegistry
+            _registry = SourceRegistry(CONFIG['sources_file'], on_change=lambda sources: CONFIG.update(sources=sources))
+        return _registry
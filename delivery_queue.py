@@ -0,0 +1,251 @@
+import json
+import sqlite3
+import threading
+import time
+
+from locks import ProcessLock
+from metrics import METRICS
+from telegram.error import BadRequest, ChatMigrated, NetworkError, RetryAfter, Unauthorized
+
+IDLE_POLL = 5  # ثوانٍ بين فحوص الطابور الفارغ، فتُرسل بسرعة رسائل أضافتها عمليات أخرى
+
+
+class TokenBucket:
+    """دلو رموز لتحديد معدل الإرسال"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self):
+        """الزمن اللازم حتى يتوفر رمز واحد"""
+        self.refill()
+        if self.tokens >= 1:
+            return 0
+        return (1 - self.tokens) / self.rate
+
+    def consume(self):
+        self.refill()
+        self.tokens -= 1
+
+
+class DeliveryQueue:
+    """طابور إرسال دائم لرسائل تيليجرام يحترم حدود المعدل و RetryAfter
+
+    أي عملية تستطيع الإضافة إلى الطابور، لكن عامل الإرسال يعمل في عملية واحدة فقط
+    في النشر (حاملة queue_lock_file)، فلا تُقرأ الرسالة نفسها وتُرسل من عاملين.
+    """
+
+    def __init__(self, path, bot, config, log=print):
+        self.bot = bot
+        self.config = config
+        self.log = log
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.stopped = False
+        self.thread = None
+        self.worker_lock = ProcessLock(config['queue_lock_file'])
+
+        self.global_bucket = TokenBucket(config['global_rate'], config['global_rate'])
+        self.chat_buckets = {}
+        self.migrated = {}  # معرّف المحادثة القديم -> الجديد بعد ترقية المجموعة
+
+        self.conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS messages ('
+            'id INTEGER PRIMARY KEY AUTOINCREMENT, chat_id TEXT NOT NULL, '
+            'text TEXT NOT NULL, options TEXT NOT NULL, attempts INTEGER NOT NULL DEFAULT 0, '
+            'next_attempt_at REAL NOT NULL, created_at REAL NOT NULL)'
+        )
+        self.conn.execute('CREATE INDEX IF NOT EXISTS idx_messages_chat ON messages (chat_id, id)')
+        self.conn.commit()
+
+    def chat_bucket(self, chat_id):
+        """حد المعدل لكل محادثة: المجموعات والقنوات أبطأ من المحادثات الخاصة"""
+        if chat_id not in self.chat_buckets:
+            chat_id_text = str(chat_id)
+            if chat_id_text.startswith('-') or chat_id_text.startswith('@'):
+                rate = self.config['group_rate_per_minute'] / 60
+            else:
+                rate = self.config['chat_rate']
+            self.chat_buckets[chat_id] = TokenBucket(rate, self.config['chat_burst'])
+        return self.chat_buckets[chat_id]
+
+    def enqueue_many(self, chat_id, messages):
+        """إضافة رسائل (نص، خيارات) إلى الطابور دفعة واحدة والعودة فوراً"""
+        self.enqueue_chats([(chat_id, messages)])
+
+    def enqueue_chats(self, batches):
+        """إضافة رسائل عدة محادثات [(المحادثة، الرسائل)] في معاملة واحدة: تُضاف كلها أو لا شيء"""
+        now = time.time()
+        rows = [
+            (self.migrated.get(str(chat_id), str(chat_id)), text, json.dumps(options or {}), now, now)
+            for chat_id, messages in batches for text, options in messages
+        ]
+        with self.lock:
+            try:
+                self.conn.executemany(
+                    'INSERT INTO messages (chat_id, text, options, next_attempt_at, created_at) '
+                    'VALUES (?, ?, ?, ?, ?)', rows
+                )
+                self.conn.commit()
+            except Exception:
+                self.conn.rollback()
+                raise
+        self.start()
+        self.wakeup.set()
+
+    def enqueue(self, chat_id, text, **options):
+        self.enqueue_many(chat_id, [(text, options)])
+
+    def pending_count(self):
+        with self.lock:
+            return self.conn.execute('SELECT COUNT(*) FROM messages').fetchone()[0]
+
+    def next_message(self):
+        """أقدم رسالة مستحقة، مع الحفاظ على الترتيب داخل كل محادثة
+
+        يُرجع (الرسالة أو None، أقرب موعد استحقاق لاحق)
+        """
+        with self.lock:
+            heads = self.conn.execute(
+                'SELECT m.id, m.chat_id, m.text, m.options, m.attempts, m.next_attempt_at '
+                'FROM messages m JOIN (SELECT MIN(id) AS id FROM messages GROUP BY chat_id) h '
+                'ON m.id = h.id ORDER BY m.id'
+            ).fetchall()
+        now = time.time()
+        for head in heads:
+            if head[5] <= now:
+                return head, None
+        if heads:
+            return None, min(head[5] for head in heads) - now
+        return None, None
+
+    def reschedule(self, message_id, delay, count_attempt=True):
+        with self.lock:
+            self.conn.execute(
+                'UPDATE messages SET next_attempt_at = ?, attempts = attempts + ? WHERE id = ?',
+                (time.time() + delay, 1 if count_attempt else 0, message_id)
+            )
+            self.conn.commit()
+
+    def retarget(self, chat_id, new_chat_id):
+        """نقل كل رسائل المحادثة المعلقة إلى معرّفها الجديد بعد ترقية المجموعة، بنفس ترتيبها"""
+        self.migrated[str(chat_id)] = str(new_chat_id)
+        with self.lock:
+            self.conn.execute(
+                'UPDATE messages SET chat_id = ?, next_attempt_at = ? WHERE chat_id = ?',
+                (str(new_chat_id), time.time(), str(chat_id))
+            )
+            self.conn.commit()
+
+    def remove(self, message_id):
+        with self.lock:
+            self.conn.execute('DELETE FROM messages WHERE id = ?', (message_id,))
+            self.conn.commit()
+
+    def deliver(self, message):
+        """محاولة إرسال رسالة واحدة ومعالجة أخطاء تيليجرام"""
+        message_id, chat_id, text, options, attempts, _ = message
+        try:
+            with METRICS.timer('telegram_send'):
+                self.bot.send_message(chat_id=chat_id, text=text, **json.loads(options))
+            self.remove(message_id)
+        except RetryAfter as e:
+            # تيليجرام يحدد مدة الانتظار، ولا تُحسب كمحاولة فاشلة
+            self.log(f"تيليجرام طلب الانتظار {e.retry_after} ثانية")
+            self.reschedule(message_id, e.retry_after, count_attempt=False)
+        except ChatMigrated as e:
+            # المجموعة صارت مجموعة خارقة بمعرّف جديد: الرسالة نفسها تُرسل إليه
+            self.log(f"انتقلت المحادثة {chat_id} إلى {e.new_chat_id}، يجب تحديث CHAT_ID")
+            self.retarget(chat_id, e.new_chat_id)
+        except (BadRequest, Unauthorized) as e:
+            self.log(f"تم إسقاط رسالة لا يمكن إرسالها: {str(e)}")
+            self.remove(message_id)
+        except Exception as e:
+            # أخطاء الشبكة والمهلة مؤقتة: إعادة المحاولة مع تراجع أسي
+            attempts += 1
+            if attempts >= self.config['max_attempts']:
+                self.log(f"تم إسقاط رسالة بعد {attempts} محاولات: {str(e)}")
+                self.remove(message_id)
+            else:
+                delay = self.config['backoff_base'] ** attempts
+                label = "خطأ في الشبكة" if isinstance(e, NetworkError) else "خطأ في الإرسال"
+                self.log(f"{label}، إعادة المحاولة بعد {delay} ثانية: {str(e)}")
+                self.reschedule(message_id, delay)
+
+    def run(self):
+        """حلقة العامل: إرسال الرسائل حسب الدور وحدود المعدل"""
+        while not self.stopped:
+            try:
+                message, wait_for = self.next_message()
+            except Exception as e:
+                self.log(f"خطأ في قراءة طابور الإرسال: {str(e)}")
+                message, wait_for = None, 5
+
+            if message is None:
+                self.wakeup.wait(timeout=min(wait_for, IDLE_POLL) if wait_for is not None else IDLE_POLL)
+                self.wakeup.clear()
+                continue
+
+            chat_bucket = self.chat_bucket(message[1])
+            delay = max(self.global_bucket.wait_time(), chat_bucket.wait_time())
+            if delay > 0:
+                time.sleep(delay)
+                continue
+
+            self.global_bucket.consume()
+            chat_bucket.consume()
+            self.deliver(message)
+        self.worker_lock.release()
+
+    def start(self):
+        """تشغيل عامل الإرسال مرة واحدة في النشر؛ False إن كان يعمل في عملية أخرى"""
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                if not self.worker_lock.acquire():
+                    return False
+                self.stopped = False
+                self.thread = threading.Thread(target=self.run, name='telegram-delivery', daemon=True)
+                self.thread.start()
+            return True
+
+    def stop(self):
+        self.stopped = True
+        self.wakeup.set()
+
+    def join(self, timeout=None):
+        """انتظار إفراغ الطابور (للتشغيل من سطر الأوامر قبل الخروج)
+
+        إن كان العامل في عملية أخرى (الخادم مثلاً) فهي التي تفرغ الطابور.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while self.pending_count():
+            self.start()
+            if deadline is not None and time.monotonic() > deadline:
+                return False
+            time.sleep(0.5)
+        return True
+
+
+_queues = {}
+_queues_lock = threading.Lock()
+
+
+def get_delivery_queue(path, bot, config, log=print):
+    """طابور واحد لكل ملف داخل العملية، يبدأ بإرسال ما تبقى من تشغيل سابق"""
+    with _queues_lock:
+        if path not in _queues:
+            queue = DeliveryQueue(path, bot, config, log)
+            if queue.pending_count():
+                queue.start()
+            _queues[path] = queue
+        return _queues[path]
@@ -0,0 +1,113 @@
+import html
+import re
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+from urllib.parse import urljoin
+from xml.etree.ElementTree import XMLPullParser
+
+_TAGS = re.compile(r'<[^>]+>')
+_SPACES = re.compile(r'\s+')
+
+# ترتيب تفضيل الحقول في RSS و Atom (أسماء محلية بدون نطاقات الأسماء)
+_DATE_FIELDS = ('pubdate', 'published', 'updated', 'date')
+_DESCRIPTION_FIELDS = ('description', 'summary', 'encoded', 'content')
+
+
+def local_name(tag):
+    """اسم الوسم بدون نطاق الأسماء: {http://www.w3.org/2005/Atom}entry -> entry"""
+    return tag.rsplit('}', 1)[-1].lower()
+
+
+def clean_text(value):
+    """نص عادي من حقل قد يحتوي HTML مُرمّزاً"""
+    if not value:
+        return ''
+    if '<' in value or '&' in value:
+        value = html.unescape(_TAGS.sub(' ', html.unescape(value)))
+    return _SPACES.sub(' ', value).strip()
+
+
+def parse_date(value):
+    """تاريخ RFC 822 (RSS) أو ISO 8601 (Atom) بصيغة ISO، أو None"""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return parsedate_to_datetime(value).isoformat()
+    except (TypeError, ValueError, IndexError):
+        pass
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00')).isoformat()
+    except ValueError:
+        return None
+
+
+def _element_text(element):
+    return ''.join(element.itertext())
+
+
+def _entry(element, base_url):
+    """تحويل عنصر item أو entry إلى قاموس، أو None إن نقص العنوان أو الرابط"""
+    fields = {}
+    link = None
+    for child in element:
+        name = local_name(child.tag)
+        if name == 'link':
+            href = child.get('href')
+            if href is None:
+                link = link or (child.text or '').strip()
+            elif child.get('rel', 'alternate') == 'alternate':
+                link = link or href.strip()
+        elif name == 'guid' and child.get('isPermaLink', 'true') == 'true':
+            fields.setdefault('guid', (child.text or '').strip())
+        else:
+            fields.setdefault(name, _element_text(child))
+
+    title = clean_text(fields.get('title'))
+    link = link or fields.get('guid')
+    if not title or not link:
+        return None
+
+    published = next((parse_date(fields[name]) for name in _DATE_FIELDS if fields.get(name)), None)
+    description = next(
+        (clean_text(fields[name]) for name in _DESCRIPTION_FIELDS if clean_text(fields.get(name))), ''
+    )
+    return {
+        'title': title,
+        'link': urljoin(base_url, link),
+        'published': published,
+        'description': description
+    }
+
+
+def iter_feed(chunks, base_url='', limit=100):
+    """قراءة عناصر RSS أو Atom أثناء التنزيل، وإرجاع كل عنصر فور اكتمال وسمه
+
+    chunks أي مُكرِّر لكتل bytes (مثل response.iter_content)، ويتوقف التنزيل
+    بمجرد الوصول إلى limit عنصر. ترفع xml.etree.ElementTree.ParseError للرد غير الصالح.
+    """
+    parser = XMLPullParser(events=('end',))
+    count = 0
+
+    def ready():
+        nonlocal count
+        for _, element in parser.read_events():
+            if local_name(element.tag) not in ('item', 'entry'):
+                continue
+            entry = _entry(element, base_url)
+            element.clear()  # لا تتراكم العناصر المقروءة في الذاكرة
+            if entry:
+                count += 1
+                yield entry
+
+    for chunk in chunks:
+        parser.feed(chunk)
+        for entry in ready():
+            yield entry
+            if count >= limit:
+                return
+    parser.close()
+    for entry in ready():
+        yield entry
+        if count >= limit:
+            return
@@ -0,0 +1,129 @@
+import hashlib
+import sqlite3
+import threading
+import time
+
+
+def item_key(title, link, salt=''):
+    """بصمة عنصر واحد من الصفحة الرئيسية: العنوان والرابط"""
+    digest = hashlib.sha1()
+    for part in (salt, title, link):
+        digest.update(part.encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()[:20]
+
+
+def list_digest(keys):
+    """بصمة قائمة العناصر كاملة بترتيبها"""
+    return hashlib.sha1('\n'.join(keys).encode('utf-8')).hexdigest()
+
+
+class FingerprintStore:
+    """بصمات عناصر كل مصدر من الدورة السابقة، محفوظة في SQLite
+
+    لكل عنصر: هل طابق الكلمات المفتاحية، ومحتوى المقال إن جُلب، حتى لا
+    تُعاد المطابقة ولا الجلب إلا للعناصر الجديدة.
+    """
+
+    def __init__(self, path, ttl_days=7):
+        self.ttl = ttl_days * 24 * 3600
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS items ('
+            'source TEXT NOT NULL, key TEXT NOT NULL, title TEXT NOT NULL, link TEXT NOT NULL, '
+            'matched INTEGER NOT NULL, content TEXT, seen_at REAL NOT NULL, '
+            'PRIMARY KEY (source, key))'
+        )
+        self.conn.execute(
+            'CREATE INDEX IF NOT EXISTS idx_items_seen_at ON items (seen_at)'
+        )
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS sources ('
+            'source TEXT PRIMARY KEY, digest TEXT NOT NULL, updated_at REAL NOT NULL)'
+        )
+        self.conn.commit()
+
+    def digest(self, source):
+        """بصمة قائمة العناصر في الدورة السابقة"""
+        with self.lock:
+            row = self.conn.execute(
+                'SELECT digest FROM sources WHERE source = ?', (source,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def known(self, source, keys):
+        """نتائج المطابقة المخزنة للعناصر المعروفة: المفتاح -> True/False"""
+        if not keys:
+            return {}
+        placeholders = ','.join('?' * len(keys))
+        with self.lock:
+            rows = self.conn.execute(
+                f'SELECT key, matched FROM items WHERE source = ? AND key IN ({placeholders})',
+                [source] + list(keys)
+            ).fetchall()
+        return {key: bool(matched) for key, matched in rows}
+
+    def update(self, source, digest, entries):
+        """حفظ قائمة الدورة الحالية: entries قائمة (مفتاح، عنوان، رابط، مطابق)"""
+        now = time.time()
+        with self.lock:
+            self.conn.executemany(
+                'INSERT INTO items (source, key, title, link, matched, seen_at) VALUES (?, ?, ?, ?, ?, ?) '
+                'ON CONFLICT (source, key) DO UPDATE SET seen_at = excluded.seen_at',
+                [(source, key, title, link, int(matched), now) for key, title, link, matched in entries]
+            )
+            self.conn.execute(
+                'INSERT OR REPLACE INTO sources (source, digest, updated_at) VALUES (?, ?, ?)',
+                (source, digest, now)
+            )
+            self.conn.execute('DELETE FROM items WHERE seen_at < ?', (now - self.ttl,))
+            self.conn.commit()
+
+    def contents(self, source, keys):
+        """محتوى المقالات المجلوب سابقاً: المفتاح -> النص"""
+        if not keys:
+            return {}
+        placeholders = ','.join('?' * len(keys))
+        with self.lock:
+            rows = self.conn.execute(
+                f'SELECT key, content FROM items WHERE source = ? AND content IS NOT NULL '
+                f'AND key IN ({placeholders})',
+                [source] + list(keys)
+            ).fetchall()
+        return dict(rows)
+
+    def save_contents(self, source, contents):
+        """حفظ محتوى المقالات المجلوبة: المفتاح -> النص"""
+        if not contents:
+            return
+        with self.lock:
+            self.conn.executemany(
+                'UPDATE items SET content = ? WHERE source = ? AND key = ?',
+                [(content, source, key) for key, content in contents.items()]
+            )
+            self.conn.commit()
+
+    def clear(self, source=None):
+        """نسيان البصمات، لمصدر واحد أو للجميع"""
+        with self.lock:
+            if source is None:
+                self.conn.execute('DELETE FROM items')
+                self.conn.execute('DELETE FROM sources')
+            else:
+                self.conn.execute('DELETE FROM items WHERE source = ?', (source,))
+                self.conn.execute('DELETE FROM sources WHERE source = ?', (source,))
+            self.conn.commit()
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_fingerprint_store(path, ttl_days=7):
+    """الحصول على مخزن بصمات مشترك لكل ملف داخل العملية"""
+    with _stores_lock:
+        if path not in _stores:
+            _stores[path] = FingerprintStore(path, ttl_days)
+        return _stores[path]
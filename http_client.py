@@ -0,0 +1,136 @@
+import threading
+import time
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+class DeadlineExceeded(Exception):
+    """انتهى الموعد قبل إرسال الطلب؛ ليس خطأ من المضيف فلا يُحسب على قاطعه"""
+
+
+class HttpClient:
+    """عميل HTTP مشترك يعيد استخدام الاتصالات ويدعم الطلبات الشرطية"""
+
+    def __init__(self, pool_connections=10, pool_maxsize=4, hosts=None,
+                 retries=2, backoff_factor=0.5):
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.session = requests.Session()
+        self.session.mount('http://', self.make_adapter(pool_maxsize))
+        self.session.mount('https://', self.make_adapter(pool_maxsize))
+        for host, size in (hosts or {}).items():
+            self.mount_host(host, size)
+
+        # قيم ETag و Last-Modified لكل رابط
+        self.validators = {}
+        self.lock = threading.Lock()
+
+    def make_adapter(self, pool_maxsize):
+        """إنشاء محول اتصالات مع إعادة المحاولة والتراجع التدريجي
+
+        429 و 503 لا يُعاد طلبهما ولا يُنتظر Retry-After هنا: الرد يصل للمستدعي فوراً
+        ليؤجل المصدر (SourcePoller) ويحسبه القاطع، بدل أن يحجز الطلب خيطاً حتى ساعات.
+        """
+        retry = Retry(
+            total=self.retries,
+            connect=self.retries,
+            read=self.retries,
+            backoff_factor=self.backoff_factor,
+            status_forcelist=[500, 502, 504],
+            respect_retry_after_header=False,
+            raise_on_status=False
+        )
+        return HTTPAdapter(
+            pool_connections=self.pool_connections,
+            pool_maxsize=pool_maxsize,
+            max_retries=retry
+        )
+
+    def mount_host(self, host, pool_maxsize):
+        """تخصيص حجم مجمع اتصالات لمضيف معين"""
+        if '://' in host:
+            host = urlparse(host).netloc
+        adapter = self.make_adapter(pool_maxsize)
+        self.session.mount(f'https://{host}', adapter)
+        self.session.mount(f'http://{host}', adapter)
+
+    def backoff_total(self):
+        """مجموع فترات التراجع بين المحاولات كما يحسبها urllib3 (الأولى بلا انتظار)"""
+        return sum(min(self.backoff_factor * 2 ** (attempt - 1), Retry.DEFAULT_BACKOFF_MAX)
+                   for attempt in range(2, self.retries + 1))
+
+    def attempt_timeout(self, timeout, deadline):
+        """مهلة كل محاولة بحيث لا تتجاوز كل المحاولات وفترات التراجع بينها الموعد deadline
+
+        ترفع DeadlineExceeded إن لم يبق وقت يكفي، فيُستدعى قبل القاطع حيث أمكن.
+        """
+        remaining = deadline - time.monotonic() - self.backoff_total()
+        if remaining <= 0:
+            raise DeadlineExceeded("انتهت المهلة قبل إرسال الطلب")
+        budget = remaining / (self.retries + 1)
+        return budget if timeout is None else min(timeout, budget)
+
+    def get(self, url, conditional=False, key=None, headers=None, deadline=None, **kwargs):
+        """طلب GET، مع إرسال If-None-Match و If-Modified-Since عند الطلب
+
+        key يفصل قيم التحقق لمستهلكين مختلفين لنفس الرابط (الافتراضي هو الرابط نفسه)
+        deadline: موعد (monotonic) ينتهي قبله الطلب بكل إعادات محاولته
+        """
+        if deadline is not None:
+            kwargs['timeout'] = self.attempt_timeout(kwargs.get('timeout'), deadline)
+        key = key or url
+        headers = dict(headers or {})
+        if conditional:
+            with self.lock:
+                validator = self.validators.get(key)
+            if validator:
+                if validator.get('etag'):
+                    headers['If-None-Match'] = validator['etag']
+                if validator.get('last_modified'):
+                    headers['If-Modified-Since'] = validator['last_modified']
+
+        response = self.session.get(url, headers=headers, **kwargs)
+
+        if response.status_code == 200:
+            etag = response.headers.get('ETag')
+            last_modified = response.headers.get('Last-Modified')
+            with self.lock:
+                if etag or last_modified:
+                    self.validators[key] = {'etag': etag, 'last_modified': last_modified}
+                else:
+                    self.validators.pop(key, None)
+
+        return response
+
+    def post(self, url, **kwargs):
+        """طلب POST عبر نفس مجمع الاتصالات"""
+        return self.session.post(url, **kwargs)
+
+    def forget(self, key):
+        """حذف قيم التحقق المخزنة لرابط معين"""
+        with self.lock:
+            self.validators.pop(key, None)
+
+
+_shared_client = None
+_shared_lock = threading.Lock()
+
+
+def get_http_client(config):
+    """الحصول على العميل المشترك على مستوى العملية"""
+    global _shared_client
+    with _shared_lock:
+        if _shared_client is None:
+            _shared_client = HttpClient(
+                pool_connections=config['pool_connections'],
+                pool_maxsize=config['pool_maxsize'],
+                hosts=config.get('hosts'),
+                retries=config['retries'],
+                backoff_factor=config['backoff_factor']
+            )
+        return _shared_client
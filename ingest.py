@@ -0,0 +1,110 @@
+import threading
+import time
+from datetime import datetime
+
+from article_store import get_article_store
+from main import CONFIG, NewsBot
+
+
+class IngestPipeline:
+    """خط جلب واحد لكل عملية: دورة واحدة تُوزَّع نتيجتها على كل المشتركين
+
+    واجهة الويب والمجدول والإرسال اليدوي يشتركون في نفس NewsBot ونفس الدورة،
+    فلا تُجلب المصادر مرتين ولا تتضارب حالة الروابط المرسلة.
+    """
+
+    def __init__(self, bot=None):
+        self.bot = bot or NewsBot()
+        self.subscribers = {}  # الاسم -> دالة (news, updated_at)
+        self.lock = threading.Lock()
+        self.cycle = None  # حدث الدورة الجارية، ينتظره كل من يطلب دورة أثناءها
+        self.news = {}
+        self.updated_at = None
+        self.finished_at = None  # monotonic
+        # كل دورة تُحفظ في الأرشيف دفعة واحدة كأي مشترك آخر
+        self.subscribe('article_store', get_article_store(CONFIG['articles_db']).add_news)
+
+    def subscribe(self, name, callback):
+        with self.lock:
+            self.subscribers[name] = callback
+
+    def unsubscribe(self, name):
+        with self.lock:
+            self.subscribers.pop(name, None)
+
+    def refresh(self, reason="تحديث", force=False):
+        """تشغيل دورة جلب واحدة؛ الطلبات المتزامنة تنتظر نفس الدورة وتأخذ نتيجتها
+
+        تُجلب المصادر المستحقة فقط (أو كلها مع force)، وتبقى نتائج البقية من دوراتها السابقة.
+        """
+        with self.lock:
+            cycle = self.cycle
+            owner = cycle is None
+            if owner:
+                self.cycle = cycle = threading.Event()
+        if not owner:
+            cycle.wait()
+            return self.news
+
+        try:
+            # الروابط المحجوزة في دورة سابقة ولم تُرسل تعود متاحة
+            self.bot.release_claims()
+            fresh = self.bot.get_all_news(force)
+            # أخبار الدورات السابقة قد تكون ظهرت الآن في مصادر أخرى، فتُحدّث مصادرها أيضاً
+            news = self.bot.attach_related({
+                name: items for name, items in self.news.items() if name not in self.bot.polled_sources
+            })
+            news.update(fresh)
+            self.news, self.updated_at = news, datetime.now()
+            self.finished_at = time.monotonic()
+            self.bot.log(f"اكتملت دورة الجلب ({reason})")
+            self.publish(news, self.updated_at)
+        except Exception as e:
+            self.bot.log(f"خطأ في دورة الجلب: {str(e)}", 'ERROR')
+        finally:
+            with self.lock:
+                self.cycle = None
+            cycle.set()
+        return self.news
+
+    def latest(self, max_age=None, reason="تحديث"):
+        """نتيجة آخر دورة إن كانت أحدث من max_age ثانية، وإلا دورة جديدة"""
+        if max_age is None:
+            max_age = CONFIG['ingest']['reuse_age']
+        if self.finished_at is not None and time.monotonic() - self.finished_at <= max_age:
+            return self.news
+        return self.refresh(reason)
+
+    def is_running(self):
+        return self.cycle is not None
+
+    def seconds_until_due(self):
+        """الثواني حتى أقرب مصدر مستحق، أو None إن لم يكن هناك مصدر مفعّل
+
+        يعيد فحص ملف المصادر أولاً، فتظهر المصادر المضافة أو المصلحة حتى دون دورات.
+        """
+        self.bot.reload_sources()
+        sources = [key for key, config in CONFIG['sources'].items() if config['enabled']]
+        return self.bot.poller.seconds_until_due(sources)
+
+    def publish(self, news, updated_at):
+        with self.lock:
+            subscribers = list(self.subscribers.items())
+        for name, callback in subscribers:
+            try:
+                callback(news, updated_at)
+            except Exception as e:
+                self.bot.log(f"خطأ في المشترك {name}: {str(e)}", 'ERROR')
+
+
+_pipeline = None
+_pipeline_lock = threading.Lock()
+
+
+def get_pipeline():
+    """خط الجلب المشترك داخل العملية"""
+    global _pipeline
+    with _pipeline_lock:
+        if _pipeline is None:
+            _pipeline = IngestPipeline()
+        return _pipeline
@@ -0,0 +1,119 @@
+import hashlib
+import re
+
+SYRIA_KEYWORDS = [
+    'سوريا', 'سورية', 'دمشق', 'حلب', 'حمص', 'حماة', 'اللاذقية', 'طرطوس',
+    'درعا', 'السويداء', 'القامشلي', 'الحسكة', 'إدلب', 'الرقة', 'دير الزور',
+    'بشار الأسد', 'الأسد', 'نظام دمشق', 'المعارضة السورية', 'الثورة السورية',
+    'اللاجئين السوريين', 'النازحين السوريين', 'هيئة تحرير الشام', 'الجيش الحر',
+    'قوات سوريا الديمقراطية', 'كردستان سوريا', 'شمال شرق سوريا'
+]
+
+# التشكيل وحرف التطويل
+_DIACRITICS = re.compile('[\u0610-\u061a\u064b-\u065f\u0670\u06d6-\u06ed\u0640]')
+# str.replace أسرع بكثير من str.translate مع النصوص غير اللاتينية
+_LETTERS = [
+    ('أ', 'ا'), ('إ', 'ا'), ('آ', 'ا'), ('ٱ', 'ا'),
+    ('ة', 'ه'),
+    ('ى', 'ي')
+]
+# الحرف الموحد -> كل صيغه، ليطابق التعبير المُجمّع النص كما هو دون توحيده أولاً
+_VARIANTS = {}
+for _source, _target in _LETTERS:
+    _VARIANTS[_target] = _VARIANTS.get(_target, _target) + _source
+
+
+def normalize_arabic(text):
+    """توحيد الكتابة العربية: حذف التشكيل والتطويل وتوحيد الهمزات والتاء المربوطة"""
+    text = _DIACRITICS.sub('', text)
+    for source, target in _LETTERS:
+        text = text.replace(source, target)
+    return text.lower()
+
+
+def strip_diacritics(text):
+    """حذف التشكيل والتطويل إن وُجدا فقط؛ أغلب العناوين بلا تشكيل فتُرجع كما هي"""
+    return _DIACRITICS.sub('', text) if _DIACRITICS.search(text) else text
+
+
+def _char_pattern(char):
+    variants = _VARIANTS.get(char)
+    return f'[{variants}]' if variants else re.escape(char)
+
+
+def _trie_pattern(words):
+    """بناء تعبير منتظم على شكل شجرة بادئات حتى لا يُعاد فحص البادئات المشتركة"""
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = True
+
+    def build(node, root=False):
+        branches = []
+        for char, child in sorted(node.items()):
+            if not char:
+                continue
+            if root:
+                # الحرف الأول حرفياً لكل صيغة: فرع من حروف حرفية يتيح لـ re تخطي المواضع
+                # التي لا يبدأ منها أي فرع، وفئة حروف في أوله تبطل ذلك
+                branches.extend(re.escape(variant) + build(child) for variant in _VARIANTS.get(char, char))
+            else:
+                branches.append(_char_pattern(char) + build(child))
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        # نهاية كلمة في منتصف الشجرة: المتابعة اختيارية والأطول يُفضّل
+        return f'(?:{body})?' if '' in node else body
+
+    return build(trie, root=True)
+
+
+class KeywordMatcher:
+    """مطابقة عدة كلمات مفتاحية دفعة واحدة بتعبير منتظم مُجمّع
+
+    صيغ الهمزات والتاء المربوطة والياء جزء من التعبير نفسه، فالعنوان لا يُوحّد قبل
+    البحث، ولا يُنسخ لحذف التشكيل إلا إن كان فيه تشكيل.
+    """
+
+    def __init__(self, keywords):
+        self.keywords = {}
+        for keyword in keywords:
+            self.keywords.setdefault(normalize_arabic(keyword), keyword)
+        # IGNORECASE أبطأ، فلا يُستخدم إلا إن كانت بين الكلمات كلمات لاتينية
+        cased = any(char.lower() != char.upper() for keyword in self.keywords for char in keyword)
+        self.pattern = re.compile(_trie_pattern(self.keywords), re.IGNORECASE if cased else 0)
+        self.surfaces = {}  # صيغة الكلمة كما وردت في النص -> الكلمة المفتاحية
+        # تتغير بتغير الكلمات، فتُبطل نتائج المطابقة المخزنة
+        self.signature = hashlib.sha1(self.pattern.pattern.encode('utf-8')).hexdigest()[:12]
+
+    def search(self, text):
+        """هل يحتوي النص على أي كلمة مفتاحية؟"""
+        return self.pattern.search(strip_diacritics(text)) is not None
+
+    def match(self, text):
+        """إرجاع الكلمات المفتاحية الموجودة في النص بدون تكرار"""
+        found = []
+        for surface in self.pattern.findall(strip_diacritics(text)):
+            keyword = self.surfaces.get(surface)
+            if keyword is None:
+                keyword = self.surfaces[surface] = self.keywords[normalize_arabic(surface)]
+            if keyword not in found:
+                found.append(keyword)
+        return found
+
+
+syria_matcher = KeywordMatcher(SYRIA_KEYWORDS)
+
+_matchers = {}
+
+
+def keyword_matcher(keywords=None):
+    """مطابق لقائمة كلمات خاصة بمصدر، يُبنى مرة واحدة لكل قائمة؛ بدونها المطابق السوري العام"""
+    if not keywords:
+        return syria_matcher
+    key = tuple(keywords)
+    if key not in _matchers:
+        _matchers[key] = KeywordMatcher(keywords)
+    return _matchers[key]
@@ -0,0 +1,162 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+# معاملات التتبع التي لا تغير هوية المقال
+TRACKING_PARAMS = {
+    'fbclid', 'gclid', 'dclid', 'msclkid', 'igshid', 'ocid', 'xtor',
+    'ref', 'ref_src', 'cmpid', 'mc_cid', 'mc_eid', 'at_medium',
+    'at_campaign', 'at_custom1', 'at_custom2', 'at_custom3', 'at_custom4'
+}
+
+
+def canonical_url(url):
+    """توحيد الرابط: حذف معاملات التتبع والمعرّف والشرطة الأخيرة"""
+    try:
+        parts = urlsplit(url.strip())
+    except ValueError:
+        return url
+    query = [
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith('utm_') and key.lower() not in TRACKING_PARAMS
+    ]
+    path = parts.path.rstrip('/')
+    return urlunsplit((
+        parts.scheme.lower(),
+        parts.netloc.lower(),
+        path,
+        urlencode(sorted(query)),
+        ''
+    ))
+
+
+class LinkStore:
+    """مخزن الروابط المرسلة مع فهرس في الذاكرة وحفظ في SQLite"""
+
+    def __init__(self, path, ttl_days=30):
+        self.path = path
+        self.ttl = ttl_days * 24 * 3600
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS sent_links ('
+            'seq INTEGER PRIMARY KEY AUTOINCREMENT, url TEXT NOT NULL UNIQUE, sent_at REAL NOT NULL)'
+        )
+        self.conn.commit()
+        self.migrate()
+        self.conn.execute(
+            'CREATE INDEX IF NOT EXISTS idx_sent_links_sent_at ON sent_links (sent_at)'
+        )
+        self.conn.commit()
+        self.links = {}
+        self.synced_seq = 0  # آخر صف قُرئ من القاعدة، لدمج ما تضيفه العمليات الأخرى
+        self.purge_expired()
+        self.refresh()
+
+    def migrate(self):
+        """نقل جدول ما قبل seq (مفتاحه الرابط) إلى جدول بتسلسل لا يُعاد استخدامه
+
+        في الجدول القديم يعيد SQLite استخدام rowid بعد حذف الصفوف الأخيرة، فلا تراها
+        العمليات التي قرأت ما بعده. الترحيل يتم مرة واحدة ولو بدأت عدة عمليات معاً.
+        """
+        def migrated():
+            return any(row[1] == 'seq' for row in self.conn.execute('PRAGMA table_info(sent_links)'))
+        if migrated():
+            return
+        self.conn.execute('BEGIN IMMEDIATE')
+        try:
+            if not migrated():
+                self.conn.execute(
+                    'CREATE TABLE sent_links_seq ('
+                    'seq INTEGER PRIMARY KEY AUTOINCREMENT, url TEXT NOT NULL UNIQUE, sent_at REAL NOT NULL)'
+                )
+                self.conn.execute(
+                    'INSERT INTO sent_links_seq (url, sent_at) SELECT url, sent_at FROM sent_links ORDER BY rowid'
+                )
+                self.conn.execute('DROP TABLE sent_links')
+                self.conn.execute('ALTER TABLE sent_links_seq RENAME TO sent_links')
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+
+    def __len__(self):
+        return len(self.links)
+
+    def __contains__(self, link):
+        return self.contains(link)
+
+    def contains(self, link):
+        """هل أُرسل الرابط خلال مدة الصلاحية؟ من الذاكرة فقط، وما تضيفه العمليات الأخرى يُدمج بـ refresh"""
+        sent_at = self.links.get(canonical_url(link))
+        return sent_at is not None and sent_at >= time.time() - self.ttl
+
+    def refresh(self):
+        """دمج الروابط التي أضيفت إلى القاعدة منذ آخر قراءة (من هذه العملية أو غيرها)
+
+        INSERT OR REPLACE يعطي الصف seq جديداً، و AUTOINCREMENT لا يعيد استخدام قيمة
+        حذفها purge_expired، فيكفي قراءة ما بعد آخر seq.
+        """
+        with self.lock:
+            rows = self.conn.execute(
+                'SELECT seq, url, sent_at FROM sent_links WHERE seq > ? ORDER BY seq',
+                (self.synced_seq,)
+            ).fetchall()
+            for seq, url, sent_at in rows:
+                if sent_at > self.links.get(url, 0):
+                    self.links[url] = sent_at
+            if rows:
+                self.synced_seq = rows[-1][0]
+        return len(rows)
+
+    def add_many(self, links):
+        """تسجيل مجموعة روابط كمرسلة"""
+        now = time.time()
+        rows = [(canonical_url(link), now) for link in links]
+        if not rows:
+            return
+        with self.lock:
+            self.conn.executemany(
+                'INSERT OR REPLACE INTO sent_links (url, sent_at) VALUES (?, ?)', rows
+            )
+            self.conn.commit()
+            self.links.update(rows)
+
+    def add(self, link):
+        """تسجيل رابط واحد كمرسل"""
+        self.add_many([link])
+
+    def purge_expired(self):
+        """حذف الروابط التي تجاوزت مدة الصلاحية"""
+        cutoff = time.time() - self.ttl
+        with self.lock:
+            self.conn.execute('DELETE FROM sent_links WHERE sent_at < ?', (cutoff,))
+            self.conn.commit()
+            self.links = {url: sent_at for url, sent_at in self.links.items() if sent_at >= cutoff}
+
+    def import_json(self, json_path):
+        """استيراد ملف الروابط القديم (قائمة JSON) مرة واحدة"""
+        try:
+            with open(json_path, 'r', encoding='utf-8') as f:
+                links = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return 0
+        self.add_many(links)
+        os.replace(json_path, json_path + '.migrated')
+        return len(links)
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_link_store(path, ttl_days=30):
+    """الحصول على مخزن مشترك لكل ملف قاعدة بيانات داخل العملية"""
+    with _stores_lock:
+        if path not in _stores:
+            _stores[path] = LinkStore(path, ttl_days)
+        return _stores[path]
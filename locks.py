@@ -0,0 +1,62 @@
+import os
+import threading
+
+try:
+    import fcntl
+except ImportError:  # ويندوز: لا أقفال ملفات بين العمليات
+    fcntl = None
+
+
+class ProcessLock:
+    """قفل على مستوى النشر: عملية واحدة فقط تحمله بين كل عمليات الخادم (عمّال gunicorn مثلاً)
+
+    يعتمد على flock، فيُحرر تلقائياً إن ماتت العملية الحاملة له وتستطيع عملية أخرى أخذه.
+    بدون fcntl يُعتبر كل طلب ناجحاً، أي يعود السلوك إلى عملية واحدة تعمل وحدها.
+    owner يحدد من يحمل القفل داخل العملية (مجدول بعينه مثلاً): لا يأخذه غيره ولا يحرره.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.handle = None
+        self.owner = None
+
+    def acquire(self, owner=None):
+        """محاولة أخذ القفل دون انتظار؛ True إن صار (أو كان) لهذه العملية ولنفس owner"""
+        with self.lock:
+            if self.handle is not None:
+                return self.owner is owner
+            if fcntl is None:
+                self.handle = True
+                self.owner = owner
+                return True
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            handle = open(self.path, 'a+')
+            try:
+                fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                handle.close()
+                return False
+            handle.seek(0)
+            handle.truncate()
+            handle.write(str(os.getpid()))
+            handle.flush()
+            self.handle = handle
+            self.owner = owner
+            return True
+
+    def held(self):
+        return self.handle is not None
+
+    def release(self, owner=None):
+        """تحرير القفل إن كان يحمله owner نفسه، وإلا لا شيء"""
+        with self.lock:
+            if self.handle is None or self.owner is not owner:
+                return
+            if fcntl is not None:
+                fcntl.flock(self.handle, fcntl.LOCK_UN)
+                self.handle.close()
+            self.handle = None
+            self.owner = None
@@ -1,107 +1,143 @@
 
 import os
+import html
 import requests
 from bs4 import BeautifulSoup
-from telegram import Bot, ParseMode
-import json
+import logging
 from datetime import datetime
 import time
 import random
-import re
-
-# تهيئة الملفات
-if not os.path.exists('data'):
-    os.makedirs('data')
-
-CONFIG = {
-    'sent_links_file': 'data/sent_links.json',
-    'log_file': 'data/bot_log.txt',
-    'sources': {
-        'aljazeera': {
-            'name': 'الجزيرة نت',
-            'url': 'https://www.aljazeera.net',
-            'selectors': {
-                'container': 'article, .featured-news-item, .news-card, .gc__content',
-                'title': 'h1, h2, h3, .title, .gc__title a',
-                'link': 'a'
-            },
-            'enabled': True
-        },
-        'bbc_arabic': {
-            'name': 'بي بي سي عربي',
-            'url': 'https://www.bbc.com/arabic',
-            'selectors': {
-                'container': 'article, .media-list__item, .block-link',
-                'title': 'h3, .media__title, .block-link__overlay-text',
-                'link': 'a'
-            },
-            'enabled': True
-        },
-        'rt_arabic': {
-            'name': 'روسيا اليوم',
-            'url': 'https://arabic.rt.com',
-            'selectors': {
-                'container': 'article, .card, .list-item',
-                'title': 'h2, h3, .card__heading, .list-item__title',
-                'link': 'a'
-            },
-            'enabled': True
-        }
-    }
-}
+import threading
+from urllib.parse import urlparse
+from concurrent.futures import ThreadPoolExecutor, wait
+from config import CONFIG, ensure_data_dir, get_source_registry
+from bot_log import get_logger
+from breakers import CircuitOpenError, get_breakers
+from http_client import DeadlineExceeded, get_http_client
+from link_store import get_link_store, canonical_url
+from fingerprints import get_fingerprint_store, item_key, list_digest
+from keywords import keyword_matcher, syria_matcher
+from polling import SourcePoller, retry_after_seconds
+from metrics import METRICS
+from parse_pool import get_parse_pool
+from feeds import iter_feed
+from parsers import (
+    CONTENT_SELECTORS, article_text, compile_selectors, extract_entries, make_soup,
+    resolve_engine, response_encoding, strainer_for
+)
+from stories import StoryIndex
+from telegram_html import pack_blocks
+from summarizer import Summarizer, RemoteSummarizer, get_local_summarizer, get_summary_cache
+
 
 class NewsBot:
+    # العناوين السورية المستخرجة من آخر نسخة لصفحة كل مصدر، تُستخدم عند رد 304
+    headline_cache = {}
+    headline_cache_lock = threading.Lock()
+
     def __init__(self):
+        ensure_data_dir()
+        get_source_registry()  # يملأ CONFIG['sources'] من ملف المصادر
         try:
+            # مكتبة تيليجرام تُحمّل مع البوت فقط، لا عند استيراد الوحدة
+            from telegram import Bot
             self.bot = Bot(token=os.getenv('TELEGRAM_TOKEN')) if os.getenv('TELEGRAM_TOKEN') else None
             self.chat_id = os.getenv('CHAT_ID')
+            # CHAT_ID قد يحتوي عدة محادثات مفصولة بفواصل
+            self.chat_ids = [chat.strip() for chat in (self.chat_id or '').split(',') if chat.strip()]
             self.hf_token = os.getenv('HUGGING_FACE_TOKEN')
         except:
             self.bot = None
             self.chat_id = None
+            self.chat_ids = []
             self.hf_token = None
+        self.logger = get_logger(CONFIG['log_file'], CONFIG['log_max_bytes'], CONFIG['log_backup_count'])
+        self.http = get_http_client(CONFIG['http'])
+        self.breakers = get_breakers(CONFIG['breakers'])
+        self.summarizer = self.make_summarizer()
+        self.fingerprints = get_fingerprint_store(CONFIG['fingerprints_db'], CONFIG['fingerprints_ttl_days'])
+        self.poller = SourcePoller(CONFIG['polling'], lambda: CONFIG['sources'])
+        self.polled_sources = []  # أسماء المصادر التي جُلبت بنجاح في آخر دورة
+        self.sources_error = None  # آخر خطأ في ملف المصادر، حتى لا يُسجل في كل فحص
+        self.stories = StoryIndex(CONFIG['dedup'])
+        self.links_lock = threading.Lock()
+        self.hosts_lock = threading.Lock()
+        self.host_semaphores = {}
+        self.strainers = {}
+        self.parse_pool = get_parse_pool(CONFIG['fetch']['parse_workers'])
+        self.enrich_executor = ThreadPoolExecutor(
+            max_workers=CONFIG['fetch']['enrich_workers'],
+            thread_name_prefix='enrich'
+        )
         self.load_sent_links()
 
-    def log(self, message):
-        """تسجيل الأحداث في ملف log"""
-        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        log_entry = f"[{timestamp}] {message}\n"
+    def log(self, message, level='INFO', source=None):
+        """تسجيل الأحداث في ملف log (الكتابة الفعلية في خيط خلفي)"""
         try:
-            with open(CONFIG['log_file'], 'a', encoding='utf-8') as f:
-                f.write(log_entry)
+            self.logger.log(logging.getLevelName(level), message, extra={'source': source})
         except:
-            pass
-        print(log_entry.strip())
+            print(message)
 
     def load_sent_links(self):
         """تحميل الروابط المرسلة مسبقاً"""
+        # الروابط المحجوزة في هذه الجلسة ولم تُحفظ بعد
+        self.claimed_links = set()
+        self.sent_links = get_link_store(CONFIG['sent_links_db'], CONFIG['sent_links_ttl_days'])
+        if os.path.exists(CONFIG['sent_links_file']):
+            count = self.sent_links.import_json(CONFIG['sent_links_file'])
+            self.log(f"تم استيراد {count} رابط من ملف الروابط القديم")
+
+    def save_links(self, links=None):
+        """حفظ الروابط المرسلة، أو كل الروابط المحجوزة إن لم تُحدد"""
+        with self.links_lock:
+            if links is None:
+                links = list(self.claimed_links)
+                self.claimed_links.clear()
+            else:
+                links = [canonical_url(link) for link in links]
+                self.claimed_links.difference_update(links)
         try:
-            with open(CONFIG['sent_links_file'], 'r', encoding='utf-8') as f:
-                self.sent_links = json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError):
-            self.sent_links = []
-            self.log("تم إنشاء ملف الروابط الجديد")
-
-    def save_links(self):
-        """حفظ الروابط المرسلة"""
+            self.sent_links.add_many(links)
+            self.sent_links.purge_expired()
+        except Exception as e:
+            self.log(f"خطأ في حفظ الروابط: {str(e)}", 'ERROR')
+
+    def release_claims(self):
+        """إتاحة الروابط المحجوزة التي لم تُرسل، قبل دورة جلب جديدة"""
+        with self.links_lock:
+            self.claimed_links.clear()
+        # الروابط التي أرسلتها عملية أخرى منذ الدورة السابقة
         try:
-            with open(CONFIG['sent_links_file'], 'w', encoding='utf-8') as f:
-                json.dump(self.sent_links[-1000:], f)  # الاحتفاظ بآخر 1000 رابط فقط
-        except:
-            pass
+            self.sent_links.refresh()
+        except Exception as e:
+            self.log(f"خطأ في تحديث الروابط المرسلة: {str(e)}", 'ERROR')
+        # والأخبار التي لم يكتمل جلب ممثلها يمكن أن يمثلها مصدر آخر
+        self.stories.drop_unbuilt()
+
+    def host_slot(self, url):
+        """الحصول على إشارة تحد من عدد الطلبات المتزامنة لنفس المضيف"""
+        host = urlparse(url).netloc
+        with self.hosts_lock:
+            if host not in self.host_semaphores:
+                self.host_semaphores[host] = threading.BoundedSemaphore(CONFIG['fetch']['per_host_limit'])
+            return self.host_semaphores[host]
+
+    def claim_link(self, link):
+        """حجز الرابط إن لم يكن مرسلاً مسبقاً (آمن بين الخيوط)"""
+        key = canonical_url(link)
+        with self.links_lock:
+            if key in self.claimed_links or key in self.sent_links:
+                return False
+            self.claimed_links.add(key)
+            return True
 
     def is_syria_related(self, title):
         """التحقق من ارتباط الخبر بسوريا"""
-        syria_keywords = [
-            'سوريا', 'سورية', 'دمشق', 'حلب', 'حمص', 'حماة', 'اللاذقية', 'طرطوس',
-            'درعا', 'السويداء', 'القامشلي', 'الحسكة', 'إدلب', 'الرقة', 'دير الزور',
-            'بشار الأسد', 'الأسد', 'نظام دمشق', 'المعارضة السورية', 'الثورة السورية',
-            'اللاجئين السوريين', 'النازحين السوريين', 'هيئة تحرير الشام', 'الجيش الحر',
-            'قوات سوريا الديمقراطية', 'كردستان سوريا', 'شمال شرق سوريا'
-        ]
-        
-        title_lower = title.lower()
-        return any(keyword in title_lower for keyword in syria_keywords)
+        return syria_matcher.search(title)
+
+    def match_syria_keywords(self, title):
+        """إرجاع الكلمات المفتاحية السورية الموجودة في العنوان"""
+        return syria_matcher.match(title)
 
     def get_random_headers(self):
         """الحصول على headers عشوائية لتجنب الحظر"""
@@ -126,239 +162,601 @@ class NewsBot:
             'Cache-Control': 'max-age=0'
         }
 
+    def make_summarizer(self):
+        """إنشاء واجهة التلخيص حسب الإعدادات (محلي أو عبر API)"""
+        summary_config = CONFIG['summary']
+        if summary_config['backend'] == 'local':
+            backend = get_local_summarizer(
+                summary_config['local_model'],
+                summary_config['max_length'],
+                summary_config['min_length']
+            )
+        else:
+            backend = RemoteSummarizer(
+                self.http, self.hf_token, summary_config['remote_model'],
+                summary_config['max_length'], summary_config['min_length']
+            )
+        cache = get_summary_cache(summary_config['cache_file'], summary_config['cache_size'])
+        return Summarizer(backend, cache, self.log, self.breakers.get('summarizer'))
+
     def generate_summary(self, title, content):
         """إنشاء موجز للخبر باستخدام Hugging Face"""
-        if not self.hf_token:
-            return "موجز غير متوفر - يتطلب توكن Hugging Face"
-        
-        try:
-            headers = {
-                "Authorization": f"Bearer {self.hf_token}",
-                "Content-Type": "application/json"
-            }
-            
-            # استخدام نموذج تلخيص عربي
-            api_url = "https://api-inference.huggingface.co/models/aubmindlab/bert-base-arabertv02"
-            
-            # تجهيز النص للتلخيص
-            text_to_summarize = f"{title}. {content[:500]}"  # أول 500 حرف من المحتوى
-            
-            payload = {
-                "inputs": text_to_summarize,
-                "parameters": {
-                    "max_length": 100,
-                    "min_length": 30,
-                    "do_sample": False
-                }
-            }
-            
-            response = requests.post(api_url, headers=headers, json=payload, timeout=10)
-            
-            if response.status_code == 200:
-                result = response.json()
-                if isinstance(result, list) and len(result) > 0:
-                    return result[0].get('summary_text', title[:100] + "...")
-                else:
-                    return title[:100] + "..."
-            else:
-                self.log(f"خطأ في Hugging Face API: {response.status_code}")
-                return title[:100] + "..."
-                
-        except Exception as e:
-            self.log(f"خطأ في إنشاء الموجز: {str(e)}")
-            return title[:100] + "..."
+        return self.summarizer.summarize_many([(title, content)])[0]
+
+    def summarize_pending(self, pending):
+        """تلخيص أخبار الدورة كلها دفعة واحدة"""
+        if not pending:
+            return
+        with METRICS.timer('summarize'):
+            summaries = self.summarizer.summarize_many([(title, content) for _, title, content in pending])
+        for (item, _, _), summary in zip(pending, summaries):
+            item['summary'] = summary
 
-    def get_article_content(self, url):
+    def parse_page(self, response, engine, selectors=None):
+        """تحليل الرد من البايتات مباشرة، وحصر التحليل في المحددات المطلوبة مع محرك lxml"""
+        engine = resolve_engine(engine or CONFIG['parser'])
+        only = None
+        if selectors and engine == 'lxml':
+            only = self.strainers.get(tuple(selectors))
+            if only is None:
+                only = strainer_for(selectors)
+                self.strainers[tuple(selectors)] = only
+        if engine == 'html.parser':
+            return BeautifulSoup(response.text, 'html.parser')
+        return make_soup(response.content, engine, only, response_encoding(response))
+
+    def get_article_content(self, url, engine=None, source_key=None, deadline=None):
         """جلب محتوى المقال لإنشاء الموجز"""
         try:
             headers = self.get_random_headers()
-            response = requests.get(url, headers=headers, timeout=10)
-            response.raise_for_status()
+            breaker = self.breakers.get(f'article:{urlparse(url).netloc}')
+            # المضيف المعطل لا يُنتظر دوره، والموعد يُفحص بعد انتظاره وقبل القاطع
+            if breaker.is_open():
+                raise CircuitOpenError(breaker.name, breaker.retry_in())
+            with self.host_slot(url):
+                timeout = 10 if deadline is None else self.http.attempt_timeout(10, deadline)
+                with breaker.call(requests.exceptions.RequestException), METRICS.timer('article_fetch', source_key):
+                    response = self.http.get(url, headers=headers, timeout=timeout)
+                    response.raise_for_status()
+            METRICS.downloaded(source_key, len(response.content))
             
-            soup = BeautifulSoup(response.text, 'html.parser')
+            with METRICS.timer('article_parse', source_key):
+                soup = self.parse_page(response, engine, CONTENT_SELECTORS)
+                
+                # البحث عن المحتوى في العناصر الشائعة
+                return article_text(soup)
             
-            # البحث عن المحتوى في العناصر الشائعة
-            content_selectors = [
-                'article p', '.article-content p', '.content p', 
-                '.story-body p', '.post-content p', 'main p'
+        except (CircuitOpenError, DeadlineExceeded) as e:
+            self.log(f"تم تخطي جلب المقال: {str(e)}", 'DEBUG', source_key)
+            return ""
+        except Exception as e:
+            self.log(f"خطأ في جلب محتوى المقال: {str(e)}", 'ERROR')
+            return ""
+
+    def extract_headlines(self, containers, config):
+        """استخراج العناوين والروابط المرتبطة بسوريا من عناصر الصفحة"""
+        matcher = keyword_matcher(config.get('keywords'))
+        return [
+            (title, link) for title, link in self.extract_entries(containers, config)
+            if matcher.search(title)
+        ]
+
+    def extract_entries(self, containers, config):
+        """استخراج كل العناوين والروابط الصالحة من عناصر الصفحة (أول 100 عنصر)، دون مطابقة"""
+        return extract_entries(containers, config['selectors'], config['url'])
+
+    def match_new_entries(self, source_key, entries, matches=None):
+        """مطابقة العناصر الجديدة فقط مقارنة بالدورات السابقة
+
+        matches: نتائج مطابقة محسوبة مسبقاً (من عمليات التحليل) بنفس ترتيب entries.
+        يُرجع (العناوين السورية بترتيب الصفحة، عدد العناصر الجديدة، عدد الجديد منها المطابق).
+        """
+        matcher = keyword_matcher(CONFIG['sources'][source_key].get('keywords'))
+        keyed = [(item_key(title, link, matcher.signature), title, link) for title, link in entries]
+        keys = [key for key, _, _ in keyed]
+        digest = list_digest(keys)
+        known = self.fingerprints.known(source_key, keys)
+
+        headlines = []
+        rows = []
+        new_count = 0
+        new_matched = 0
+        for index, (key, title, link) in enumerate(keyed):
+            matched = known.get(key)
+            if matched is None:
+                matched = matches[index] if matches is not None else matcher.search(title)
+                known[key] = matched
+                new_count += 1
+                new_matched += matched
+            rows.append((key, title, link, matched))
+            if matched:
+                headlines.append((title, link))
+
+        if digest == self.fingerprints.digest(source_key):
+            self.log("لا عناصر جديدة منذ الدورة السابقة", 'DEBUG', source_key)
+        self.fingerprints.update(source_key, digest, rows)
+        return headlines, new_count, new_matched
+
+    def claim_candidates(self, headlines, config, deadline=None, source_key=None, details=None):
+        """اختيار الأخبار غير المرسلة مسبقاً وغير المكررة من مصدر آخر من العناوين المستخرجة"""
+        candidates = []
+
+        for title, link in headlines:
+            # التوقف عند تجاوز المهلة المخصصة للمصدر
+            if deadline is not None and time.monotonic() > deadline:
+                self.log(f"انتهت المهلة المخصصة لـ {config['name']}", 'WARNING', source_key)
+                break
+
+            if self.claim_link(link) and self.duplicate_of(title, link, config, source_key, details) is None:
+                candidates.append((title, link))
+                self.log(f"تم العثور على خبر سوري: {title[:50]}...", source=source_key)
+                
+                if len(candidates) >= config.get('max_items', 5):  # الحد الأقصى للأخبار السورية
+                    break
+
+        return candidates
+
+    def duplicate_of(self, title, link, config, source_key=None, details=None):
+        """رابط الخبر الممثل إن كان المرشح مكرراً لخبر سبقه من أي مصدر، وإلا None
+
+        المرشح المكرر يُضاف إلى مصادر ذلك الخبر ولا يُجلب محتواه ولا يُلخص.
+        """
+        if not CONFIG['dedup']['enabled']:
+            return None
+        text = details[link]['description'] if details and link in details else None
+        representative = self.stories.assign(config['name'], link, title, text)
+        if representative is not None:
+            self.log(f"خبر مكرر من مصدر آخر: {title[:50]}... ({representative})", source=source_key)
+        return representative
+
+    def attach_related(self, all_news):
+        """نسخة من الأخبار مع المصادر الأخرى لكل خبر في related"""
+        links = [item['link'] for news in all_news.values() for item in news]
+        self.stories.mark_built(links)
+        return {
+            source: [
+                {**item, 'related': [
+                    {'source': name, 'link': link} for name, link in self.stories.related(item['link'])
+                ]}
+                for item in news
             ]
+            for source, news in all_news.items()
+        }
+
+    def build_item(self, title, link, config, summary, content, published=None):
+        """بناء عنصر الخبر بالشكل الذي تستهلكه الواجهة والتليجرام"""
+        return {
+            'title': title[:200],
+            'link': link,
+            'source': config['name'],
+            'summary': summary,
+            'content_preview': content[:200] if content else "",
+            'published': published,
+            'related': []  # المصادر الأخرى للخبر نفسه
+        }
+
+    def enrich_items(self, candidates, config, deadline=None, source_key=None, descriptions=None):
+        """جلب محتوى الأخبار المرشحة بالتوازي عبر مجمع خيوط محدود
+
+        descriptions: رابط -> نص جاهز (مثل وصف الخلاصة) يُستخدم بدل جلب المقال.
+        """
+        if not candidates:
+            return []
+
+        # المحتوى المجلوب في دورة سابقة لا يُجلب مرة أخرى
+        signature = keyword_matcher(config.get('keywords')).signature
+        keys = [item_key(title, link, signature) for title, link in candidates]
+        stored = self.fingerprints.contents(source_key, keys) if source_key else {}
+        for key, (_, link) in zip(keys, candidates):
+            if key not in stored and descriptions and link in descriptions:
+                stored[key] = descriptions[link]
+
+        futures = {
+            key: self.enrich_executor.submit(self.get_article_content, link, config.get('parser'), source_key, deadline)
+            for key, (_, link) in zip(keys, candidates) if key not in stored
+        }
+        timeout = None if deadline is None else max(0, deadline - time.monotonic())
+        done, _ = wait(futures.values(), timeout=timeout)
+
+        articles = []
+        fetched = {}
+        for key, (title, link) in zip(keys, candidates):
+            content = stored.get(key, "")
+            future = futures.get(key)
+            if future is None:
+                pass
+            elif future in done:
+                try:
+                    content = future.result()
+                    if content:
+                        fetched[key] = content
+                except Exception as e:
+                    self.log(f"خطأ في جلب محتوى المقال: {str(e)}", 'ERROR', source_key)
+            else:
+                future.cancel()
+                self.log(f"انتهت مهلة جلب محتوى الخبر: {title[:50]}...", 'WARNING', source_key)
+            articles.append((title, link, content))
+
+        METRICS.cache_result('article', True, len(keys) - len(futures))
+        METRICS.cache_result('article', False, len(futures))
+        if source_key:
+            self.fingerprints.save_contents(source_key, fetched)
+        return articles
+
+    def page_headlines(self, source_key, config, headers, timeout, deadline=None):
+        """العناوين السورية من الصفحة الرئيسية (HTML) مع طلب شرطي وتحليل العناصر الجديدة فقط
+
+        يُرجع (العناوين، عدد العناوين السورية الجديدة).
+        """
+        with NewsBot.headline_cache_lock:
+            cached = NewsBot.headline_cache.get(source_key)
+
+        with METRICS.timer('homepage_fetch', source_key):
+            response = self.http.get(
+                config['url'], conditional=cached is not None, key=source_key,
+                headers=headers, timeout=timeout, deadline=deadline, verify=True
+            )
+            if response.status_code != 304:
+                response.raise_for_status()
+        METRICS.downloaded(source_key, len(response.content))
+        METRICS.cache_result('homepage', response.status_code == 304)
+
+        if response.status_code == 304 and cached is not None:
+            # الصفحة لم تتغير: لا تنزيل ولا تحليل
+            self.log(f"لم تتغير الصفحة الرئيسية لـ {config['name']}", source=source_key)
+            return cached, 0
+
+        if self.parse_pool is not None:
+            # التحليل والاستخراج والمطابقة في إحدى عمليات التحليل، وتعود العناوين فقط
+            with METRICS.timer('parse_offload', source_key):
+                count, rows, timings = self.parse_pool.page_entries(
+                    response.content, response_encoding(response), config.get('parser') or CONFIG['parser'],
+                    config['selectors'], config['url'], config.get('keywords'), timeout
+                )
+            for stage, seconds in timings.items():
+                METRICS.observe(stage, source_key, seconds)
+            self.log(f"تم العثور على {count} عنصر من {config['name']}", source=source_key)
+            entries = [(title, link) for title, link, _ in rows]
+            headlines, new_count, new_matched = self.match_new_entries(
+                source_key, entries, [matched for _, _, matched in rows]
+            )
+        else:
+            with METRICS.timer('parse', source_key):
+                soup = self.parse_page(response, config.get('parser'), [config['selectors']['container']])
+                containers = compile_selectors(config['selectors']).container.select(soup)
             
-            content = ""
-            for selector in content_selectors:
-                paragraphs = soup.select(selector)
-                if paragraphs:
-                    content = " ".join([p.get_text(strip=True) for p in paragraphs[:3]])
-                    if len(content) > 100:
-                        break
-            
-            return content[:800] if content else ""
+            self.log(f"تم العثور على {len(containers)} عنصر من {config['name']}", source=source_key)
             
-        except Exception as e:
-            self.log(f"خطأ في جلب محتوى المقال: {str(e)}")
-            return ""
+            with METRICS.timer('extract', source_key):
+                entries = self.extract_entries(containers, config)
+            with METRICS.timer('keyword_match', source_key):
+                headlines, new_count, new_matched = self.match_new_entries(source_key, entries)
+        self.log(f"{new_count} عنصر جديد من {len(entries)} في {config['name']}", source=source_key)
+        with NewsBot.headline_cache_lock:
+            NewsBot.headline_cache[source_key] = headlines
+        return headlines, new_matched
+
+    def feed_headlines(self, source_key, config, headers, timeout, deadline=None):
+        """العناوين السورية من خلاصة RSS/Atom، تُحلل تدريجياً أثناء التنزيل
+
+        يُرجع (العناوين، تفاصيل كل رابط: التاريخ والوصف، عدد العناوين السورية الجديدة).
+        """
+        cache_key = f'{source_key}:feed'
+        with NewsBot.headline_cache_lock:
+            cached = NewsBot.headline_cache.get(cache_key)
+
+        headers = dict(headers)
+        headers['Accept'] = 'application/rss+xml, application/atom+xml, application/xml;q=0.9, */*;q=0.8'
+        with METRICS.timer('feed_fetch', source_key):
+            response = self.http.get(
+                config['feed_url'], conditional=cached is not None, key=cache_key,
+                headers=headers, timeout=timeout, deadline=deadline, stream=True
+            )
+            if response.status_code != 304:
+                response.raise_for_status()
+        METRICS.cache_result('feed', response.status_code == 304)
+
+        if response.status_code == 304 and cached is not None:
+            response.close()
+            self.log(f"لم تتغير خلاصة {config['name']}", source=source_key)
+            return cached + (0,)
+
+        received = 0
+        def chunks():
+            nonlocal received
+            for chunk in response.iter_content(16 * 1024):
+                received += len(chunk)
+                yield chunk
+
+        try:
+            with METRICS.timer('feed_parse', source_key):
+                entries = list(iter_feed(chunks(), config['feed_url'], limit=100))
+        finally:
+            response.close()  # قد يتوقف التحليل قبل نهاية الخلاصة
+            METRICS.downloaded(source_key, received)
+
+        if not entries:
+            raise ValueError("الخلاصة لا تحتوي على عناصر")
+
+        with METRICS.timer('keyword_match', source_key):
+            headlines, new_count, new_matched = self.match_new_entries(
+                source_key, [(entry['title'], entry['link']) for entry in entries]
+            )
+        self.log(f"{new_count} عنصر جديد من {len(entries)} في خلاصة {config['name']}", source=source_key)
+
+        result = (headlines, {entry['link']: entry for entry in entries})
+        with NewsBot.headline_cache_lock:
+            NewsBot.headline_cache[cache_key] = result
+        return result + (new_matched,)
+
+    def fetch_news(self, source_key, deadline=None, pending=None):
+        """استخراج الأخبار من مصدر معين مع التركيز على سوريا
 
-    def fetch_news(self, source_key):
-        """استخراج الأخبار من مصدر معين مع التركيز على سوريا"""
+        عند تمرير قائمة pending تُؤجل الموجزات إليها لتُلخص مع باقي المصادر دفعة واحدة.
+        يُرجع None إن لم يُجلب المصدر (خطأ أو قاطع مفتوح أو انتهاء الموعد)، فتبقى أخباره السابقة.
+        """
         if source_key not in CONFIG['sources'] or not CONFIG['sources'][source_key]['enabled']:
-            return []
+            return None
 
         config = CONFIG['sources'][source_key]
         headers = self.get_random_headers()
         headers['Referer'] = config['url']
 
+        # المصدر المعطل لا يُنتظر: يُؤجل موعده حتى يحين وقت محاولة الاختبار
+        breaker = self.breakers.get(f'source:{source_key}')
+        if breaker.is_open():
+            self.poller.defer(source_key, breaker.retry_in())
+            self.log(f"تم تخطي {config['name']}: المصدر معطل مؤقتاً", 'WARNING', source_key)
+            return None
+
         try:
-            time.sleep(random.uniform(0.5, 2.0))
+            self.poller.begin(source_key)
+            time.sleep(random.uniform(*CONFIG['fetch']['jitter']))
             
-            session = requests.Session()
-            response = session.get(config['url'], headers=headers, timeout=15, verify=True)
-            response.raise_for_status()
+            timeout = config.get('timeout', 15)
+            if deadline is not None:
+                timeout = max(1, min(timeout, deadline - time.monotonic()))
+
+            headlines, details = None, {}
+            with breaker.call(requests.exceptions.RequestException, ignore=(DeadlineExceeded,)):
+                if config.get('type') == 'feed' and config.get('feed_url'):
+                    try:
+                        headlines, details, new_matched = self.feed_headlines(source_key, config, headers, timeout, deadline)
+                    except Exception as e:
+                        if not config.get('selectors'):
+                            raise
+                        self.log(f"تعذرت قراءة خلاصة {config['name']}، سيتم استخدام الصفحة الرئيسية: {str(e)}", 'WARNING', source_key)
+                if headlines is None:
+                    headlines, new_matched = self.page_headlines(source_key, config, headers, timeout, deadline)
+            self.poller.success(source_key, new_matched)
             
-            soup = BeautifulSoup(response.text, 'html.parser')
+            # المرحلة الأولى: اختيار العناوين المرشحة فقط دون أي طلبات إضافية
+            candidates = self.claim_candidates(headlines, config, deadline, source_key, details)
+            # المرحلة الثانية: جلب محتوى المرشحين بالتوازي، ووصف الخلاصة يغني عن الجلب إن كان كافياً
+            descriptions = {
+                link: entry['description'] for link, entry in details.items()
+                if len(entry['description']) >= CONFIG['fetch']['feed_min_description']
+            }
+            articles = self.enrich_items(candidates, config, deadline, source_key, descriptions)
+
             news_items = []
-            containers = soup.select(config['selectors']['container'])
-            
-            self.log(f"تم العثور على {len(containers)} عنصر من {config['name']}")
-            
-            for article in containers[:100]:  # فحص المزيد من العناصر للعثور على أخبار سوريا
-                try:
-                    title_element = article.select_one(config['selectors']['title'])
-                    link_element = article.select_one(config['selectors']['link']) or article
-                    
-                    if not title_element:
-                        continue
-                        
-                    title = title_element.get_text(strip=True)
-                    link = link_element.get('href') if link_element else None
-                    
-                    if not title or not link or len(title) < 15:
-                        continue
-
-                    # تصحيح الروابط النسبية
-                    if link.startswith('/'):
-                        link = config['url'].rstrip('/') + link
-                    elif not link.startswith('http'):
-                        link = config['url'].rstrip('/') + '/' + link.lstrip('/')
-
-                    # تصفية الروابط غير المناسبة
-                    if any(exclude in link.lower() for exclude in ['javascript:', 'mailto:', '#']):
-                        continue
-
-                    # التحقق من ارتباط الخبر بسوريا
-                    if self.is_syria_related(title) and link not in self.sent_links:
-                        # جلب محتوى المقال لإنشاء الموجز
-                        content = self.get_article_content(link)
-                        summary = self.generate_summary(title, content)
-                        
-                        news_items.append({
-                            'title': title[:200],
-                            'link': link,
-                            'source': config['name'],
-                            'summary': summary,
-                            'content_preview': content[:200] if content else ""
-                        })
-                        
-                        self.sent_links.append(link)
-                        self.log(f"تم العثور على خبر سوري: {title[:50]}...")
-                        
-                        if len(news_items) >= 5:  # الحد الأقصى للأخبار السورية
-                            break
+            batch = []
+            for title, link, content in articles:
+                published = details[link]['published'] if link in details else None
+                item = self.build_item(title, link, config, None, content, published)
+                news_items.append(item)
+                batch.append((item, title, content))
 
-                except Exception as e:
-                    continue
+            # المرحلة الثالثة: التلخيص على دفعات
+            if pending is None:
+                self.summarize_pending(batch)
+            else:
+                pending.extend(batch)
 
-            self.log(f"تم جلب {len(news_items)} خبر سوري من {config['name']}")
+            self.log(f"تم جلب {len(news_items)} خبر سوري من {config['name']}", source=source_key)
             return news_items
 
+        except CircuitOpenError as e:
+            self.poller.defer(source_key, e.retry_in)
+            self.log(f"تم تخطي {config['name']}: {str(e)}", 'WARNING', source_key)
+            return None
+        except DeadlineExceeded as e:
+            # ليس خطأ من المصدر: يُجلب في الدورة التالية دون تراجع
+            self.poller.defer(source_key, 0)
+            self.log(f"تم تخطي {config['name']}: {str(e)}", 'WARNING', source_key)
+            return None
         except requests.exceptions.RequestException as e:
-            self.log(f"خطأ في الاتصال بـ {config['name']}: {str(e)}")
-            return []
+            self.poller.failure(source_key, retry_after_seconds(e.response))
+            self.log(f"خطأ في الاتصال بـ {config['name']}: {str(e)}", 'ERROR', source_key)
+            return None
         except Exception as e:
-            self.log(f"خطأ في جلب الأخبار من {config['name']}: {str(e)}")
-            return []
+            self.poller.failure(source_key)
+            self.log(f"خطأ في جلب الأخبار من {config['name']}: {str(e)}", 'ERROR', source_key)
+            return None
+
+    def reload_sources(self):
+        """إعادة تحميل ملف المصادر إن تغير؛ الملف غير الصالح يُعاد فحصه ويُسجل خطؤه مرة حتى يتغير"""
+        try:
+            if get_source_registry().reload_if_changed():
+                # العناوين المخزنة قد تكون مستخرجة بمحددات قديمة
+                with NewsBot.headline_cache_lock:
+                    NewsBot.headline_cache.clear()
+                self.sources_error = None
+                self.log("تم تحميل ملف المصادر بعد تعديله")
+        except Exception as e:
+            if str(e) != self.sources_error:
+                self.log(f"ملف المصادر غير صالح، تُستخدم المصادر الحالية: {str(e)}", 'ERROR')
+            self.sources_error = str(e)
+
+    def get_all_news(self, force=False):
+        """جلب الأخبار من المصادر المستحقة مع التركيز على سوريا
+
+        لا يُجلب إلا المصدر الذي حان موعده حسب self.poller؛ force يجلب كل مصدر
+        غير متراجع بسبب أخطاء سابقة.
+        """
+        self.reload_sources()
+        sources = [
+            (key, config) for key, config in CONFIG['sources'].items()
+            if config['enabled'] and self.poller.is_due(key, force)
+        ]
+        # المصادر التي جُلبت فعلاً فقط؛ أخبار المصادر الفاشلة أو المتخطاة تبقى من دوراتها السابقة
+        self.polled_sources = []
+        if CONFIG['fetch']['concurrent'] and len(sources) > 1:
+            return self.attach_related(self.get_all_news_concurrent(sources))
 
-    def get_all_news(self):
-        """جلب الأخبار من جميع المصادر مع التركيز على سوريا"""
         all_news = {}
+        pending = []
         
-        for source_key, source_config in CONFIG['sources'].items():
-            if source_config['enabled']:
-                news = self.fetch_news(source_key)
-                if news:
-                    all_news[source_config['name']] = news
-                
+        for source_key, source_config in sources:
+            news = self.fetch_news(source_key, pending=pending)
+            if news is not None:
+                self.polled_sources.append(source_config['name'])
+            if news:
+                all_news[source_config['name']] = news
+
+        self.summarize_pending(pending)
+        return self.attach_related(all_news)
+
+    def get_all_news_concurrent(self, sources):
+        """جلب المصادر بالتوازي مع مهلة لكل مصدر ومهلة للدورة كاملة"""
+        fetch_config = CONFIG['fetch']
+        deadline = time.monotonic() + fetch_config['source_deadline']
+        executor = ThreadPoolExecutor(
+            max_workers=max(1, min(fetch_config['max_workers'], len(sources))),
+            thread_name_prefix='fetch'
+        )
+        # قائمة موجزات مؤجلة لكل مصدر حتى لا نلخص نتائج المصادر المتأخرة
+        pending = {source_key: [] for source_key, _ in sources}
+        futures = {
+            source_key: executor.submit(self.fetch_news, source_key, deadline, pending[source_key])
+            for source_key, _ in sources
+        }
+        done, _ = wait(futures.values(), timeout=fetch_config['cycle_deadline'])
+        # لا ننتظر المصادر المتأخرة، نتائجها تُهمل في هذه الدورة
+        executor.shutdown(wait=False, cancel_futures=True)
+
+        all_news = {}
+        batch = []
+        for source_key, source_config in sources:
+            future = futures[source_key]
+            if future not in done:
+                self.log(f"تجاوز {source_config['name']} مهلة الدورة", 'WARNING', source_key)
+                continue
+            try:
+                news = future.result()
+            except Exception as e:
+                self.log(f"خطأ في جلب الأخبار من {source_config['name']}: {str(e)}", 'ERROR', source_key)
+                continue
+            if news is not None:
+                self.polled_sources.append(source_config['name'])
+            if news:
+                all_news[source_config['name']] = news
+                batch.extend(pending[source_key])
+
+        self.summarize_pending(batch)
         return all_news
 
-    def send_news_to_telegram(self):
-        """جمع الأخبار وإرسالها إلى تيليجرام"""
-        if not self.bot or not self.chat_id:
-            self.log("لم يتم تكوين بوت التليجرام بشكل صحيح")
+    @property
+    def delivery(self):
+        """طابور الإرسال المشترك على مستوى العملية"""
+        from delivery_queue import get_delivery_queue
+        return get_delivery_queue(CONFIG['telegram']['queue_file'], self.bot, CONFIG['telegram'], self.log)
+
+    def format_item(self, item, source, mode='items'):
+        """نص الخبر بصيغة HTML لتيليجرام؛ النصوص تُهرّب حتى لا تكسر الوسوم"""
+        title = html.escape(item['title'])
+        summary = html.escape(item['summary'] or '')
+        link = html.escape(item['link'], quote=True)
+        sources = [html.escape(source)] + [
+            f"<a href='{html.escape(r['link'], quote=True)}'>{html.escape(r['source'])}</a>"
+            for r in item.get('related', [])
+        ]
+        label = 'المصادر' if len(sources) > 1 else 'المصدر'
+        if mode == 'digest':
+            return (f"📰 <b><a href='{link}'>{title}</a></b>\n"
+                    f"📝 {summary}\n"
+                    f"📡 {'، '.join(sources)}")
+        message = f"📰 <b>{title}</b>\n\n"
+        message += f"📝 <b>الموجز:</b>\n{summary}\n\n"
+        message += f"🔗 <a href='{link}'>اقرأ المزيد</a>\n\n"
+        message += f"📡 {label}: {'، '.join(sources)}"
+        return message
+
+    def telegram_messages(self, entries, mode):
+        """رسائل الدورة (نص، خيارات) لمحادثة واحدة حسب طريقة الإرسال
+
+        entries قائمة (المصدر، الخبر). في digest تُجمع الأخبار في أقل عدد من الرسائل
+        ضمن حدود تيليجرام، وتُدمج الترويسة في أولها والخاتمة في آخرها.
+        """
+        header = "🇸🇾 <b>آخر الأخبار السورية</b>\n\n"
+        header += f"📅 {datetime.now().strftime('%Y-%m-%d %H:%M')}\n"
+        header += "━━━━━━━━━━━━━━━━━━━━━━━━━"
+        footer = f"✅ <b>تم إرسال {len(entries)} خبر سوري</b>\n\n"
+        footer += "📱 للمزيد من الأخبار، تابع القناة\n"
+        footer += f"🕐 التحديث التالي خلال ساعة"
+
+        if mode == 'digest':
+            blocks = [self.format_item(item, source, mode) for source, item in entries]
+            options = {'parse_mode': 'HTML', 'disable_web_page_preview': True}
+            return [(chunk, options) for chunk in pack_blocks(blocks, header, footer)]
+
+        messages = [(header, {'parse_mode': 'HTML'})]
+        for source, item in entries:
+            messages.append((self.format_item(item, source, mode), {
+                'parse_mode': 'HTML',
+                'disable_web_page_preview': False
+            }))
+        messages.append((footer, {'parse_mode': 'HTML'}))
+        return messages
+
+    def send_news_to_telegram(self, all_news=None):
+        """وضع الأخبار في طابور الإرسال إلى تيليجرام، من دورة جلب جاهزة أو جديدة"""
+        if not self.bot or not self.chat_ids:
+            self.log("لم يتم تكوين بوت التليجرام بشكل صحيح", 'WARNING')
             return False
 
-        all_news = self.get_all_news()
-        sent_count = 0
+        if all_news is None:
+            all_news = self.get_all_news()
+        entries = []
+        sent_links = []
 
-        # إرسال رسالة ترحيبية
-        welcome_message = "🇸🇾 <b>آخر الأخبار السورية</b>\n\n"
-        welcome_message += f"📅 {datetime.now().strftime('%Y-%m-%d %H:%M')}\n"
-        welcome_message += "━━━━━━━━━━━━━━━━━━━━━━━━━"
+        for source, news in all_news.items():
+            for item in news or []:
+                # نتيجة الدورة قد تُستخدم مرتين؛ لا يُرسل الرابط نفسه مرة أخرى
+                if canonical_url(item['link']) in self.sent_links:
+                    continue
+                entries.append((source, item))
+                sent_links.append(item['link'])
+                sent_links.extend(r['link'] for r in item.get('related', []))
 
+        if not entries:
+            self.log("لا أخبار جديدة للإرسال")
+            return False
+
+        # الإرسال الفعلي يتم في خيط الطابور مع احترام حدود تيليجرام. رسائل كل المحادثات
+        # تُضاف في معاملة واحدة، فإما أن تُحفظ الروابط كمرسلة للجميع أو تُعاد المحاولة للجميع
+        telegram_config = CONFIG['telegram']
         try:
-            self.bot.send_message(
-                chat_id=self.chat_id,
-                text=welcome_message,
-                parse_mode=ParseMode.HTML
-            )
-            time.sleep(2)
+            batches = []
+            for chat_id in self.chat_ids:
+                mode = telegram_config['chat_modes'].get(chat_id, telegram_config['mode'])
+                batches.append((chat_id, self.telegram_messages(entries, mode)))
+            self.delivery.enqueue_chats(batches)
         except Exception as e:
-            self.log(f"خطأ في إرسال الرسالة الترحيبية: {str(e)}")
-
-        for source, news in all_news.items():
-            if news:
-                for item in news:
-                    try:
-                        message = f"📰 <b>{item['title']}</b>\n\n"
-                        message += f"📝 <b>الموجز:</b>\n{item['summary']}\n\n"
-                        message += f"🔗 <a href='{item['link']}'>اقرأ المزيد</a>\n\n"
-                        message += f"📡 المصدر: {source}"
-
-                        self.bot.send_message(
-                            chat_id=self.chat_id,
-                            text=message,
-                            parse_mode=ParseMode.HTML,
-                            disable_web_page_preview=False
-                        )
-                        
-                        sent_count += 1
-                        self.log(f"تم إرسال خبر سوري من {source}")
-                        time.sleep(3)  # تأخير أطول بين الرسائل
-                        
-                    except Exception as e:
-                        self.log(f"خطأ في إرسال خبر من {source}: {str(e)}")
-                        continue
-
-        # إرسال رسالة ختامية
-        if sent_count > 0:
-            summary_message = f"✅ <b>تم إرسال {sent_count} خبر سوري</b>\n\n"
-            summary_message += "📱 للمزيد من الأخبار، تابع القناة\n"
-            summary_message += f"🕐 التحديث التالي خلال ساعة"
-            
-            try:
-                self.bot.send_message(
-                    chat_id=self.chat_id,
-                    text=summary_message,
-                    parse_mode=ParseMode.HTML
-                )
-            except Exception as e:
-                self.log(f"خطأ في إرسال الرسالة الختامية: {str(e)}")
+            self.log(f"خطأ في إضافة الأخبار إلى طابور الإرسال: {str(e)}", 'ERROR')
+            return False
+        for chat_id, messages in batches:
+            self.log(f"تمت إضافة {len(entries)} خبر سوري في {len(messages)} رسالة إلى طابور {chat_id}")
 
-        self.save_links()
-        return sent_count > 0
+        self.save_links(sent_links)
+        return True
 
 if __name__ == "__main__":
     bot = NewsBot()
     bot.log("بدء تشغيل بوت الأخبار السورية")
     result = bot.send_news_to_telegram()
     if result:
+        bot.delivery.join()  # انتظار إفراغ الطابور قبل الخروج
         bot.log("تم إرسال الأخبار بنجاح")
     else:
         bot.log("لم يتم العثور على أخبار جديدة أو حدث خطأ")
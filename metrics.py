@@ -0,0 +1,156 @@
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+# حدود المدرجات التكرارية بالثواني
+DEFAULT_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30]
+
+
+class Histogram:
+    """مدرج تكراري تراكمي بصيغة Prometheus"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value):
+        self.count += 1
+        self.total += value
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+                break
+
+    def quantile(self, q):
+        """تقدير تقريبي بالاستيفاء الخطي داخل الفئة، كما تفعل histogram_quantile"""
+        if not self.count:
+            return None
+        target = q * self.count
+        seen = 0
+        lower = 0.0
+        for bound, count in zip(self.buckets, self.counts):
+            if count and seen + count >= target:
+                return lower + (bound - lower) * (target - seen) / count
+            seen += count
+            lower = bound
+        return self.buckets[-1]
+
+
+class MetricsRegistry:
+    """قياسات زمن كل مرحلة وعدادات الأخطاء والبايتات والذاكرة المؤقتة"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms = {}  # (stage, source) -> Histogram
+        self.errors = {}  # (stage, source) -> عدد
+        self.bytes = {}  # source -> بايت
+        self.cache = {}  # (cache, result) -> عدد، result إما hit أو miss
+        self.started_at = time.time()
+
+    def observe(self, stage, source, seconds):
+        with self.lock:
+            key = (stage, source or 'all')
+            if key not in self.histograms:
+                self.histograms[key] = Histogram()
+            self.histograms[key].observe(seconds)
+
+    def error(self, stage, source=None):
+        with self.lock:
+            key = (stage, source or 'all')
+            self.errors[key] = self.errors.get(key, 0) + 1
+
+    def downloaded(self, source, size):
+        with self.lock:
+            key = source or 'all'
+            self.bytes[key] = self.bytes.get(key, 0) + size
+
+    def cache_result(self, cache, hit, count=1):
+        if not count:
+            return
+        with self.lock:
+            key = (cache, 'hit' if hit else 'miss')
+            self.cache[key] = self.cache.get(key, 0) + count
+
+    @contextmanager
+    def timer(self, stage, source=None):
+        """قياس زمن كتلة، وعدّ الخطأ إن رفعت استثناء"""
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.error(stage, source)
+            raise
+        finally:
+            self.observe(stage, source, time.perf_counter() - start)
+
+    def render_prometheus(self):
+        """تصدير القياسات بصيغة Prometheus النصية"""
+        lines = [
+            '# HELP news_stage_duration_seconds Duration of each pipeline stage',
+            '# TYPE news_stage_duration_seconds histogram'
+        ]
+        with self.lock:
+            for (stage, source), histogram in sorted(self.histograms.items()):
+                labels = f'stage="{stage}",source="{source}"'
+                cumulative = 0
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    cumulative += count
+                    lines.append(f'news_stage_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f'news_stage_duration_seconds_bucket{{{labels},le="+Inf"}} {histogram.count}')
+                lines.append(f'news_stage_duration_seconds_sum{{{labels}}} {histogram.total}')
+                lines.append(f'news_stage_duration_seconds_count{{{labels}}} {histogram.count}')
+
+            lines.append('# HELP news_stage_errors_total Errors per pipeline stage')
+            lines.append('# TYPE news_stage_errors_total counter')
+            for (stage, source), count in sorted(self.errors.items()):
+                lines.append(f'news_stage_errors_total{{stage="{stage}",source="{source}"}} {count}')
+
+            lines.append('# HELP news_downloaded_bytes_total Bytes downloaded per source')
+            lines.append('# TYPE news_downloaded_bytes_total counter')
+            for source, size in sorted(self.bytes.items()):
+                lines.append(f'news_downloaded_bytes_total{{source="{source}"}} {size}')
+
+            lines.append('# HELP news_cache_requests_total Cache lookups by result')
+            lines.append('# TYPE news_cache_requests_total counter')
+            for (cache, result), count in sorted(self.cache.items()):
+                lines.append(f'news_cache_requests_total{{cache="{cache}",result="{result}"}} {count}')
+
+        return '\n'.join(lines) + '\n'
+
+    def summary(self):
+        """ملخص مختصر للعرض في /api/status"""
+        with self.lock:
+            stages = {}
+            for (stage, source), histogram in sorted(self.histograms.items()):
+                stages.setdefault(stage, {})[source] = {
+                    'count': histogram.count,
+                    'avg_ms': round(histogram.total / histogram.count * 1000, 1) if histogram.count else None,
+                    'p50_ms': _ms(histogram.quantile(0.5)),
+                    'p95_ms': _ms(histogram.quantile(0.95)),
+                    'errors': self.errors.get((stage, source), 0)
+                }
+
+            caches = {}
+            for (cache, result), count in self.cache.items():
+                caches.setdefault(cache, {'hit': 0, 'miss': 0})[result] = count
+            for stats in caches.values():
+                total = stats['hit'] + stats['miss']
+                stats['hit_rate'] = round(stats['hit'] / total, 3) if total else None
+
+            return {
+                'since': datetime.fromtimestamp(self.started_at).isoformat(),
+                'stages': stages,
+                'bytes_downloaded': dict(self.bytes),
+                'caches': caches
+            }
+
+
+def _ms(seconds):
+    return None if seconds is None else round(seconds * 1000, 1)
+
+
+# سجل واحد على مستوى العملية
+METRICS = MetricsRegistry()
@@ -0,0 +1,108 @@
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from keywords import keyword_matcher
+from parsers import compile_selectors, extract_entries, make_soup, resolve_engine, strainer_for
+
+# مرشحات التحليل داخل كل عملية، حسب محدد العناصر
+_strainers = {}
+
+
+def page_entries(content, encoding, engine, selectors, base_url, keywords=None):
+    """تحليل صفحة رئيسية من بايتاتها: العناصر ثم العناوين والروابط ثم مطابقة الكلمات المفتاحية
+
+    دالة على مستوى الوحدة حتى تُرسل إلى عمليات التحليل؛ المدخلات والنتيجة بيانات
+    بسيطة فقط، فلا تعبر شجرة الصفحة بين العمليات.
+    يُرجع (عدد العناصر، [(العنوان، الرابط، مطابق؟)]، زمن كل مرحلة بالثواني).
+    """
+    started = time.perf_counter()
+    only = None
+    if resolve_engine(engine) == 'lxml':
+        container = selectors['container']
+        only = _strainers.get(container)
+        if only is None:
+            only = _strainers[container] = strainer_for([container])
+    soup = make_soup(content, engine, only, encoding)
+    containers = compile_selectors(selectors).container.select(soup)
+    parsed = time.perf_counter()
+
+    entries = extract_entries(containers, selectors, base_url)
+    extracted = time.perf_counter()
+
+    matcher = keyword_matcher(keywords)
+    rows = [(title, link, matcher.search(title)) for title, link in entries]
+    return len(containers), rows, {
+        'parse': parsed - started,
+        'extract': extracted - parsed,
+        'keyword_match': time.perf_counter() - extracted
+    }
+
+
+def _context():
+    """forkserver حيث يتوفر: العمليات لا ترث خيوط الخادم وأقفاله كما يحدث مع fork"""
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+    if context.get_start_method() == 'forkserver':
+        context.set_forkserver_preload(['parse_pool'])
+    return context
+
+
+class ParsePool:
+    """عمليات تحليل منفصلة لتحليل الصفحات الرئيسية خارج قفل GIL
+
+    خيوط الجلب تبقى للشبكة فقط، وترسل بايتات الصفحة إلى إحدى العمليات وتنتظر
+    العناوين. العملية التي تموت تُعاد العمليات كلها بعدها، والصفحة الحالية تُحلل
+    داخل العملية حتى لا تضيع الدورة.
+    """
+
+    def __init__(self, workers):
+        self.workers = workers
+        self.lock = threading.Lock()
+        self.executor = None
+
+    def get_executor(self):
+        with self.lock:
+            if self.executor is None:
+                self.executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=_context())
+            return self.executor
+
+    def reset(self, executor):
+        with self.lock:
+            if self.executor is executor:
+                self.executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def page_entries(self, content, encoding, engine, selectors, base_url, keywords=None, timeout=None):
+        """مثل page_entries لكن في إحدى عمليات التحليل؛ ترفع TimeoutError بعد timeout ثانية"""
+        executor = self.get_executor()
+        try:
+            future = executor.submit(page_entries, content, encoding, engine, dict(selectors), base_url,
+                                     list(keywords) if keywords else None)
+            return future.result(timeout)
+        except BrokenProcessPool:
+            self.reset(executor)
+            return page_entries(content, encoding, engine, selectors, base_url, keywords)
+
+    def shutdown(self):
+        with self.lock:
+            executor, self.executor = self.executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_parse_pool(workers):
+    """عمليات التحليل المشتركة داخل العملية، أو None إن كان التحليل داخل العملية (workers = 0)"""
+    global _pool
+    if not workers:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            _pool = ParsePool(workers)
+        return _pool
@@ -0,0 +1,175 @@
+import re
+from collections import namedtuple
+from functools import lru_cache
+
+import soupsieve
+from bs4 import BeautifulSoup, SoupStrainer
+
+try:
+    import lxml  # noqa: F401
+    HAS_LXML = True
+except ImportError:
+    HAS_LXML = False
+
+# محركات التحليل المدعومة؛ lxml يُستبدل بـ html.parser إن لم تكن مثبتة
+PARSER_ENGINES = ('lxml', 'html.parser')
+
+# عناصر المحتوى الشائعة في صفحات المقالات
+CONTENT_SELECTORS = [
+    'article p', '.article-content p', '.content p',
+    '.story-body p', '.post-content p', 'main p'
+]
+
+# محدد بسيط: اسم وسم و/أو أصناف فقط، مثل article أو .news-card أو div.card
+_SIMPLE_SELECTOR = re.compile(r'^([a-zA-Z][a-zA-Z0-9-]*)?((?:\.[\w-]+)*)$')
+
+
+def _parse_simple(selector):
+    """تحويل محدد بسيط إلى (اسم، أصناف) أو None إن كان مركباً"""
+    match = _SIMPLE_SELECTOR.match(selector.strip())
+    if not match or not (match.group(1) or match.group(2)):
+        return None
+    name = match.group(1).lower() if match.group(1) else None
+    classes = set(filter(None, match.group(2).split('.')))
+    return name, classes
+
+
+def strainer_for(selectors):
+    """بناء SoupStrainer يحتفظ فقط بالعناصر التي يطابقها أحد المحددات
+
+    كل محدد يُختصر إلى أول جزء منه (العنصر الأب)، فمحدد مثل 'article p'
+    يحتفظ بكامل عنصر article. يُرجع None إن تعذر التعبير عن أحد المحددات.
+    """
+    rules = []
+    for selector in selectors:
+        for part in selector.split(','):
+            part = part.strip()
+            if not part:
+                continue
+            rule = _parse_simple(part.split()[0])
+            if rule is None:
+                return None
+            rules.append(rule)
+    if not rules:
+        return None
+
+    return SelectorStrainer(rules)
+
+
+class SelectorStrainer(SoupStrainer):
+    """SoupStrainer يطابق اسم الوسم أو أصنافه حسب قواعد المحددات البسيطة"""
+
+    def __init__(self, rules):
+        self.rules = rules
+        # bs4 < 4.13 تستدعي دالة الاسم مع (الاسم، الخصائص) أثناء التحليل
+        super().__init__(name=self.matches)
+
+    def matches(self, name, attrs=None):
+        if not isinstance(name, str):
+            # bs4 >= 4.13 قد تمرر الوسم نفسه عند المطابقة بعد التحليل
+            name, attrs = name.name, name.attrs
+        classes = (attrs or {}).get('class') or []
+        if isinstance(classes, str):
+            classes = classes.split()
+        for rule_name, rule_classes in self.rules:
+            if rule_name and rule_name != name:
+                continue
+            if rule_classes.issubset(classes):
+                return True
+        return False
+
+    def allow_tag_creation(self, nsprefix, name, attrs):
+        # bs4 >= 4.13 تقرر إنشاء الوسم عبر هذه الدالة وتمرر الاسم فقط لقواعد الاسم
+        return self.matches(name, attrs)
+
+
+CompiledSelectors = namedtuple('CompiledSelectors', ['container', 'title', 'link'])
+
+
+@lru_cache(maxsize=256)
+def _compile(container, title, link):
+    return CompiledSelectors(soupsieve.compile(container), soupsieve.compile(title), soupsieve.compile(link))
+
+
+def compile_selectors(selectors):
+    """محددات المصدر مُجمّعة مرة واحدة بـ soupsieve، وتُعاد من الذاكرة لنفس النصوص"""
+    return _compile(selectors['container'], selectors['title'], selectors['link'])
+
+
+def extract_entries(containers, selectors, base_url, limit=100):
+    """كل العناوين والروابط الصالحة من عناصر الصفحة، دون مطابقة: قائمة (العنوان، الرابط)"""
+    entries = []
+    compiled = compile_selectors(selectors)
+
+    for article in containers[:limit]:
+        try:
+            title_element = compiled.title.select_one(article)
+            link_element = compiled.link.select_one(article) or article
+
+            if not title_element:
+                continue
+
+            title = title_element.get_text(strip=True)
+            link = link_element.get('href') if link_element else None
+
+            if not title or not link or len(title) < 15:
+                continue
+
+            # تصحيح الروابط النسبية
+            if link.startswith('/'):
+                link = base_url.rstrip('/') + link
+            elif not link.startswith('http'):
+                link = base_url.rstrip('/') + '/' + link.lstrip('/')
+
+            # تصفية الروابط غير المناسبة
+            if any(exclude in link.lower() for exclude in ['javascript:', 'mailto:', '#']):
+                continue
+
+            entries.append((title, link))
+
+        except Exception:
+            continue
+
+    return entries
+
+
+def resolve_engine(engine):
+    """اختيار محرك التحليل مع الرجوع إلى html.parser إن لم تكن lxml مثبتة"""
+    if engine == 'lxml' and not HAS_LXML:
+        return 'html.parser'
+    return engine or 'html.parser'
+
+
+def make_soup(markup, engine='html.parser', only=None, encoding=None):
+    """تحليل الصفحة بالمحرك المطلوب، مع حصر التحليل في عناصر محددة عند الطلب
+
+    markup يمكن أن يكون bytes مباشرة من response.content لتجنب فك الترميز مرتين.
+    """
+    engine = resolve_engine(engine)
+    kwargs = {}
+    if only is not None:
+        kwargs['parse_only'] = only
+    if encoding and isinstance(markup, bytes):
+        kwargs['from_encoding'] = encoding
+    return BeautifulSoup(markup, engine, **kwargs)
+
+
+def response_encoding(response):
+    """الترميز المعلن في ترويسة الرد فقط، وإلا يُترك الكشف لـ BeautifulSoup"""
+    content_type = response.headers.get('Content-Type', '')
+    if 'charset=' in content_type.lower():
+        return response.encoding
+    return None
+
+
+def article_text(soup):
+    """استخراج أول فقرات المقال من العناصر الشائعة"""
+    content = ""
+    for selector in CONTENT_SELECTORS:
+        paragraphs = soup.select(selector)
+        if paragraphs:
+            content = " ".join([p.get_text(strip=True) for p in paragraphs[:3]])
+            if len(content) > 100:
+                break
+
+    return content[:800] if content else ""
@@ -0,0 +1,137 @@
+import random
+import threading
+import time
+
+
+class SourceState:
+    """حالة جدولة مصدر واحد"""
+
+    def __init__(self, interval):
+        self.interval = interval  # الفترة الحالية بين جلبين ناجحين
+        self.next_due = 0.0  # monotonic؛ صفر يعني أنه مستحق فوراً
+        self.failures = 0
+        self.backoff_until = 0.0
+        self.running = False
+        self.last_polled = None
+        self.last_new = None
+
+
+class SourcePoller:
+    """فترات جلب متكيفة لكل مصدر
+
+    بعد كل جلب ناجح تقصر الفترة إن ظهر أكثر من خبر سوري جديد وتطول إن لم
+    يظهر شيء، ضمن الحدين الأدنى والأعلى. عند الخطأ أو رد 429/503 يتراجع
+    المصدر أسياً ويُتخطى حتى انتهاء مدة التراجع. كل موعد يُزاح عشوائياً
+    حتى لا تتزامن المصادر.
+    """
+
+    def __init__(self, config, sources):
+        self.config = config
+        self.sources = sources  # دالة تُرجع المصادر الحالية، فقد يُعاد تحميلها
+        self.lock = threading.Lock()
+        self.states = {}
+
+    def settings(self, source_key):
+        """إعدادات المصدر: القيم العامة مع ما يخصه في CONFIG['sources'][...]['polling']"""
+        overrides = self.sources().get(source_key, {}).get('polling', {})
+        return {**self.config, **overrides}
+
+    def state(self, source_key):
+        if source_key not in self.states:
+            self.states[source_key] = SourceState(self.settings(source_key)['initial_interval'])
+        return self.states[source_key]
+
+    def jittered(self, seconds, settings):
+        spread = settings['jitter']
+        return seconds * random.uniform(1 - spread, 1 + spread)
+
+    def is_due(self, source_key, force=False):
+        """هل حان موعد المصدر؟ force يتجاوز الفترة المتكيفة لكن لا يتجاوز التراجع بعد الأخطاء"""
+        now = time.monotonic()
+        with self.lock:
+            state = self.state(source_key)
+            if state.running or now < state.backoff_until:
+                return False
+            if not self.config['adaptive']:
+                return True
+            return force or now >= state.next_due
+
+    def begin(self, source_key):
+        """تسجيل بدء الجلب حتى لا يُعد المصدر مستحقاً أثناء تنفيذه"""
+        with self.lock:
+            self.state(source_key).running = True
+
+    def success(self, source_key, new_items):
+        """جلب ناجح: new_items عدد الأخبار السورية الجديدة منذ الجلب السابق"""
+        settings = self.settings(source_key)
+        now = time.monotonic()
+        with self.lock:
+            state = self.state(source_key)
+            if new_items > 1:
+                state.interval *= settings['speedup']
+            elif new_items == 0:
+                state.interval *= settings['slowdown']
+            state.interval = min(max(state.interval, settings['min_interval']), settings['max_interval'])
+            state.failures = 0
+            state.backoff_until = 0.0
+            state.next_due = now + self.jittered(state.interval, settings)
+            state.running = False
+            state.last_polled = now
+            state.last_new = new_items
+
+    def failure(self, source_key, retry_after=None):
+        """جلب فاشل: تراجع أسي، أو المدة التي طلبها الخادم في Retry-After إن كانت أطول"""
+        settings = self.settings(source_key)
+        now = time.monotonic()
+        with self.lock:
+            state = self.state(source_key)
+            state.failures += 1
+            delay = min(settings['error_backoff'] * 2 ** (state.failures - 1), settings['max_backoff'])
+            if retry_after:
+                delay = max(delay, min(retry_after, settings['max_backoff']))
+            state.backoff_until = now + self.jittered(delay, settings)
+            state.next_due = state.backoff_until
+            state.running = False
+            state.last_polled = now
+
+    def defer(self, source_key, seconds):
+        """تأجيل المصدر دون احتساب خطأ جديد، مثلاً حين يكون قاطعه مفتوحاً"""
+        with self.lock:
+            state = self.state(source_key)
+            state.next_due = max(state.next_due, time.monotonic() + seconds)
+            state.running = False
+
+    def seconds_until_due(self, source_keys):
+        """الثواني حتى أقرب موعد بين المصادر المحددة (صفر إن كان أحدها مستحقاً)"""
+        now = time.monotonic()
+        with self.lock:
+            waits = [
+                max(0.0, self.state(key).next_due - now)
+                for key in source_keys if not self.state(key).running
+            ]
+        return min(waits) if waits else None
+
+    def snapshot(self):
+        """حالة كل مصدر للعرض"""
+        now = time.monotonic()
+        with self.lock:
+            return {
+                source_key: {
+                    'interval': round(state.interval),
+                    'due_in': max(0, round(state.next_due - now)),
+                    'failures': state.failures,
+                    'backing_off': now < state.backoff_until,
+                    'last_new_items': state.last_new
+                }
+                for source_key, state in self.states.items()
+            }
+
+
+def retry_after_seconds(response):
+    """قيمة Retry-After بالثواني إن كانت رقماً"""
+    if response is None:
+        return None
+    try:
+        return float(response.headers.get('Retry-After'))
+    except (TypeError, ValueError):
+        return None
@@ -0,0 +1,212 @@
+import copy
+import json
+import os
+import threading
+import time
+from urllib.parse import urlparse
+
+from parsers import PARSER_ENGINES, compile_selectors
+
+# القيم الافتراضية لما لا يحدده المصدر في الملف
+SOURCE_DEFAULTS = {
+    'type': 'html',
+    'enabled': True,
+    'timeout': 15,  # مهلة طلب الصفحة الرئيسية أو الخلاصة بالثواني
+    'max_items': 5,  # أقصى عدد أخبار جديدة من المصدر في الدورة
+    'keywords': None,  # قائمة كلمات خاصة بالمصدر بدل الكلمات السورية العامة
+}
+
+# الحقول التي يمكن تعديلها عبر /api/sources والأنواع المقبولة لكل منها
+EDITABLE_FIELDS = {
+    'name': (str,),
+    'url': (str,),
+    'type': (str,),
+    'feed_url': (str, type(None)),
+    'selectors': (dict,),
+    'enabled': (bool,),
+    'parser': (str, type(None)),
+    'timeout': (int, float),
+    'max_items': (int,),
+    'keywords': (list, type(None)),
+    'polling': (dict,),
+}
+
+# مفاتيح polling التي يمكن تخصيصها لكل مصدر (انظر CONFIG['polling'])، وكلها أعداد موجبة (jitter قد يكون صفراً)
+POLLING_FIELDS = (
+    'initial_interval', 'min_interval', 'max_interval', 'speedup', 'slowdown',
+    'error_backoff', 'max_backoff', 'jitter'
+)
+
+
+class SourceConflict(Exception):
+    """تعديل لا يمكن حفظه الآن: المصدر موجود بالفعل، أو ملف المصادر على القرص غير صالح"""
+
+
+def is_http_url(value):
+    parts = urlparse(value)
+    return parts.scheme in ('http', 'https') and bool(parts.netloc)
+
+
+def validate_polling(source_key, polling):
+    for field, value in polling.items():
+        if field not in POLLING_FIELDS:
+            raise ValueError(f"مفتاح غير معروف في polling للمصدر {source_key}: {field}")
+        if not isinstance(value, (int, float)) or isinstance(value, bool) or value < 0 or (
+                value == 0 and field != 'jitter'):
+            raise ValueError(f"قيمة polling.{field} للمصدر {source_key} يجب أن تكون عدداً موجباً")
+    if polling.get('jitter', 0) >= 1:
+        raise ValueError(f"قيمة polling.jitter للمصدر {source_key} يجب أن تكون أقل من 1")
+    if polling.get('min_interval', 0) > polling.get('max_interval', float('inf')):
+        raise ValueError(f"polling.min_interval أكبر من max_interval في المصدر {source_key}")
+
+
+def validate_source(source_key, source):
+    """التحقق من إعدادات مصدر واحد وإكمالها بالقيم الافتراضية، وترفع ValueError عند الخطأ"""
+    if not source_key or not isinstance(source_key, str) or not source_key.replace('_', '').isalnum():
+        raise ValueError(f"مفتاح مصدر غير صالح: {source_key!r}")
+    if not isinstance(source, dict):
+        raise ValueError(f"إعدادات المصدر {source_key} يجب أن تكون كائناً")
+
+    for field, value in source.items():
+        allowed = EDITABLE_FIELDS.get(field)
+        # bool فرع من int، فلا يُقبل True كمهلة أو عدد
+        if allowed is None or not isinstance(value, allowed) or (
+                isinstance(value, bool) and bool not in allowed):
+            raise ValueError(f"قيمة غير صالحة للحقل {field} في المصدر {source_key}")
+
+    source = {**SOURCE_DEFAULTS, **source}
+    for field in ('name', 'url'):
+        if not source.get(field):
+            raise ValueError(f"الحقل {field} مطلوب في المصدر {source_key}")
+    for field in ('url', 'feed_url'):
+        if source.get(field) and not is_http_url(source[field]):
+            raise ValueError(f"الحقل {field} في المصدر {source_key} يجب أن يكون رابط http أو https")
+    if source.get('parser') is not None and source['parser'] not in PARSER_ENGINES:
+        raise ValueError(f"محرك تحليل غير معروف للمصدر {source_key}: {source['parser']}")
+    if 'polling' in source:
+        validate_polling(source_key, source['polling'])
+    if source['type'] not in ('html', 'feed'):
+        raise ValueError(f"نوع غير معروف للمصدر {source_key}: {source['type']}")
+    if source['type'] == 'feed' and not source.get('feed_url'):
+        raise ValueError(f"المصدر {source_key} من نوع feed يحتاج feed_url")
+    if source['timeout'] <= 0 or source['max_items'] <= 0:
+        raise ValueError(f"المهلة وعدد الأخبار يجب أن يكونا موجبين في المصدر {source_key}")
+    if source['keywords'] is not None and not all(isinstance(k, str) and k for k in source['keywords']):
+        raise ValueError(f"الكلمات المفتاحية للمصدر {source_key} يجب أن تكون نصوصاً")
+
+    selectors = source.get('selectors')
+    if selectors:
+        if not all(isinstance(selectors.get(part), str) for part in ('container', 'title', 'link')):
+            raise ValueError(f"المحددات container و title و link مطلوبة في المصدر {source_key}")
+        try:
+            compile_selectors(selectors)
+        except Exception as e:
+            raise ValueError(f"محدد غير صالح في المصدر {source_key}: {str(e)}")
+    elif source['type'] == 'html':
+        raise ValueError(f"المصدر {source_key} من نوع html يحتاج selectors")
+    return source
+
+
+class SourceRegistry:
+    """سجل المصادر من ملف JSON، يُعاد تحميله عند تغير الملف دون إعادة تشغيل
+
+    القاموس المعروض لا يُعدّل في مكانه أبداً: كل تحميل أو تعديل يبني قاموساً
+    جديداً ويستبدله، فمن يقرأ المصادر أثناء دورة جلب لا يرى حالة نصف محدّثة.
+    """
+
+    def __init__(self, path, on_change=None, check_interval=2):
+        self.path = path
+        self.on_change = on_change
+        self.check_interval = check_interval
+        self.lock = threading.Lock()
+        self.stamp = None
+        self.checked_at = 0.0
+        self.sources = {}
+        try:
+            self.load()
+        except (OSError, ValueError) as e:
+            # الملف غير الصالح عند البدء لا يوقف العملية: لا مصادر حتى يُصلح، و reload_if_changed
+            # يعيد قراءته في كل فحص لأن stamp يبقى None
+            print(f"ملف المصادر غير صالح، لا توجد مصادر حتى يُصلح: {str(e)}")
+            self.publish({})
+
+    def file_stamp(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def read(self):
+        with open(self.path, 'r', encoding='utf-8') as f:
+            raw = json.load(f)
+        if not isinstance(raw, dict):
+            raise ValueError("ملف المصادر يجب أن يكون كائناً: مفتاح المصدر -> إعداداته")
+        return {key: validate_source(key, source) for key, source in raw.items()}
+
+    def load(self):
+        """تحميل الملف وإبلاغ on_change بالمصادر الجديدة؛ بدون ملف لا توجد مصادر حتى يُنشأ"""
+        with self.lock:
+            stamp = self.file_stamp()
+            sources = self.read() if stamp is not None else {}
+            self.stamp = stamp
+            self.publish(sources)
+
+    def reload_if_changed(self):
+        """إعادة التحميل إن تغير الملف؛ الملف غير الصالح يرفع الخطأ وتبقى المصادر الحالية
+
+        يُرجع True إن تغيرت المصادر. فحص الملف نفسه لا يتكرر أكثر من مرة كل check_interval.
+        الملف غير الصالح يُعاد فحصه في كل مرة حتى يُصلح، فلا يُعتبر خطؤه "بلا تغيير".
+        """
+        now = time.monotonic()
+        if now - self.checked_at < self.check_interval:
+            return False
+        self.checked_at = now
+        with self.lock:
+            stamp = self.file_stamp()
+            if stamp is None or stamp == self.stamp:
+                return False
+            sources = self.read()
+            self.stamp = stamp
+            self.publish(sources)
+            return True
+
+    def update(self, source_key, changes, create=False):
+        """تعديل مصدر موجود أو إضافة مصدر جديد (create) ثم حفظ الملف
+
+        يُقرأ الملف أولاً إن تغير على القرص، فلا يُكتب فوق تعديل لم يُحمّل بعد.
+        ترفع ValueError للقيم غير الصالحة، و KeyError للمصدر غير الموجود، و SourceConflict
+        للمصدر الموجود عند الإضافة أو إن كان الملف على القرص غير صالح (يصلحه المشغّل أولاً).
+        """
+        with self.lock:
+            stamp = self.file_stamp()
+            if stamp is not None and stamp != self.stamp:
+                try:
+                    self.publish(self.read())
+                except (OSError, ValueError) as e:
+                    raise SourceConflict(f"ملف المصادر على القرص غير صالح، أصلحه قبل التعديل: {str(e)}")
+                self.stamp = stamp
+            if create and source_key in self.sources:
+                raise SourceConflict(f"المصدر {source_key} موجود بالفعل")
+            if not create and source_key not in self.sources:
+                raise KeyError(source_key)
+            sources = copy.deepcopy(self.sources)
+            current = sources.get(source_key, {})
+            sources[source_key] = validate_source(source_key, {**current, **changes})
+            self.write(sources)
+            self.publish(sources)
+            return sources[source_key]
+
+    def write(self, sources):
+        """كتابة الملف دفعة واحدة عبر ملف مؤقت حتى لا يُقرأ نصف مكتوب"""
+        temp_path = f'{self.path}.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(sources, f, ensure_ascii=False, indent=2)
+            f.write('\n')
+        os.replace(temp_path, self.path)
+        self.stamp = self.file_stamp()
+
+    def publish(self, sources):
+        self.sources = sources
+        if self.on_change:
+            self.on_change(sources)
@@ -0,0 +1,236 @@
+import hashlib
+import random
+import re
+import threading
+import time
+from collections import deque
+
+from keywords import normalize_arabic, syria_matcher
+
+_WORDS = re.compile(r'\w+')
+_PRIME = (1 << 61) - 1
+
+# أدوات الربط والحروف التي لا تميز خبراً عن آخر
+STOP_WORDS = {
+    'في', 'من', 'الي', 'علي', 'عن', 'مع', 'ان', 'او', 'ثم', 'قد', 'لا', 'ما', 'هذا', 'هذه',
+    'ذلك', 'التي', 'الذي', 'الذين', 'بعد', 'قبل', 'خلال', 'حول', 'بين', 'عند', 'منذ', 'كان',
+    'كانت', 'يكون', 'تكون', 'هو', 'هي', 'هم', 'كما', 'لم', 'لن', 'وفي', 'ومن', 'وعلي', 'وان'
+}
+# أسماء البلد نفسه لا تميز خبراً عن آخر، بخلاف المدن والجهات
+COUNTRY_KEYWORDS = {'سوريا', 'سورية'}
+# أدوات التعريف والعطف الملتصقة بأول الكلمة، الأطول أولاً
+_PREFIXES = ('وال', 'بال', 'كال', 'فال', 'لل', 'ال')
+
+
+def tokens(text):
+    """كلمات النص بعد التوحيد وحذف أدوات الربط وأداة التعريف"""
+    words = []
+    for word in _WORDS.findall(normalize_arabic(text)):
+        if word in STOP_WORDS or (len(word) < 2 and not word.isdigit()):
+            continue
+        for prefix in _PREFIXES:
+            if word.startswith(prefix) and len(word) - len(prefix) >= 3:
+                word = word[len(prefix):]
+                break
+        words.append(word)
+    return words
+
+
+def shingles(text, size=3):
+    """مقاطع من ثلاثة أحرف داخل كل كلمة، فتتقارب الصيغ المختلفة للكلمة نفسها"""
+    result = set()
+    for word in tokens(text):
+        word = f'#{word}#'
+        result.update(word[i:i + size] for i in range(max(1, len(word) - size + 1)))
+    return result
+
+
+class MinHasher:
+    """توقيع MinHash: احتمال تساوي خانة بين توقيعين يساوي تشابه Jaccard بين المجموعتين"""
+
+    def __init__(self, num_perm=64, seed=1):
+        rng = random.Random(seed)
+        self.params = [(rng.randrange(1, _PRIME), rng.randrange(0, _PRIME)) for _ in range(num_perm)]
+
+    def signature(self, items):
+        if not items:
+            return None
+        hashes = [
+            int.from_bytes(hashlib.blake2b(item.encode('utf-8'), digest_size=8).digest(), 'big')
+            for item in items
+        ]
+        return tuple(min((a * h + b) % _PRIME for h in hashes) for a, b in self.params)
+
+
+def places(title):
+    """المدن والجهات السورية المذكورة في العنوان"""
+    return frozenset(syria_matcher.match(title)) - COUNTRY_KEYWORDS
+
+
+def swapped_entity(first, second):
+    """هل يختلف العنوانان في كلمة أو كلمتين حلت فيهما كلمة مختلفة تماماً محل أخرى؟
+
+    عناوين القالب الواحد ("وزير الخارجية الإيراني/العراقي يصل...") متشابهة جداً في
+    MinHash وهي أخبار مختلفة، بينما اختلاف صيغة الكلمة نفسها (إيران/الإيراني) أو
+    زيادة كلمات في أحد العنوانين لا يغير الخبر، وكذلك أفعال المضارع التي تختلف بين
+    المصادر للحدث نفسه (يلتقي/يستقبل).
+    """
+    only_first, only_second = first - second, second - first
+    if not only_first or not only_second or len(only_first) > 2 or len(only_second) > 2:
+        return False
+    return any(
+        all(_jaccard(shingles(word), shingles(other)) < 0.5 and not (_verb(word) and _verb(other))
+            for other in only_second)
+        for word in only_first
+    )
+
+
+def _verb(word):
+    return word.startswith('ي') and len(word) > 3
+
+
+def _jaccard(first, second):
+    return len(first & second) / len(first | second) if first or second else 1.0
+
+
+def similarity(first, second):
+    """تقدير تشابه Jaccard من توقيعين"""
+    return sum(a == b for a, b in zip(first, second)) / len(first)
+
+
+class Story:
+    """خبر واحد ومصادره: الرابط الممثل يُجلب ويُلخص ويُرسل، والبقية تُذكر معه"""
+
+    def __init__(self, link, source, title, signatures, seen_at):
+        self.link = link
+        self.words = set(tokens(title))
+        self.places = places(title)
+        self.signatures = signatures  # النوع (title/text) -> توقيع
+        self.members = [(source, link)]
+        self.seen_at = seen_at
+        self.built = False  # صار للممثل عنصر خبر في دورة مكتملة
+        self.buckets = []
+
+
+class StoryIndex:
+    """تجميع الأخبار المتشابهة من كل المصادر قبل جلب محتواها
+
+    كل عنوان (ونص الخلاصة إن وُجد) يُحوّل إلى توقيع MinHash ويُقسم إلى نطاقات
+    (LSH)، فلا يُقارن إلا بالأخبار التي تشاركه نطاقاً واحداً على الأقل ثم يُتحقق
+    من التشابه التقديري. لا يُدمج خبران من المصدر نفسه، ولا خبران يذكران مدناً
+    مختلفة أو يختلفان في اسم حل محل آخر. الأخبار أقدم من النافذة الزمنية تُنسى.
+    """
+
+    def __init__(self, config):
+        self.threshold = config['threshold']
+        self.window = config['window_hours'] * 3600
+        self.bands = config['bands']
+        self.rows = config['num_perm'] // config['bands']
+        self.hasher = MinHasher(config['num_perm'])
+        self.lock = threading.Lock()
+        self.stories = deque()  # بترتيب الظهور، لحذف القديم من الأول
+        self.by_link = {}  # رابط كل عضو -> خبره
+        self.buckets = {}  # (النوع، رقم النطاق، قيم النطاق) -> الأخبار
+
+    def signatures(self, title, text=None):
+        signatures = {'title': self.hasher.signature(shingles(title))}
+        if text:
+            signatures['text'] = self.hasher.signature(shingles(text))
+        return {kind: signature for kind, signature in signatures.items() if signature}
+
+    def band_keys(self, signatures):
+        return [
+            (kind, band, signature[band * self.rows:(band + 1) * self.rows])
+            for kind, signature in signatures.items()
+            for band in range(self.bands)
+        ]
+
+    def forget(self, story):
+        for key in story.buckets:
+            bucket = self.buckets.get(key)
+            if bucket is not None:
+                bucket.discard(story)
+                if not bucket:
+                    del self.buckets[key]
+        for _, link in story.members:
+            if self.by_link.get(link) is story:
+                del self.by_link[link]
+
+    def purge(self, now):
+        while self.stories and now - self.stories[0].seen_at > self.window:
+            self.forget(self.stories.popleft())
+
+    def best_match(self, signatures, keys, source, title):
+        """أقرب خبر مسجل من مصدر آخر يتجاوز حد التشابه في العنوان أو في النص ويتفق معه في التفاصيل"""
+        best, best_score = None, self.threshold
+        candidates = set()
+        for key in keys:
+            candidates.update(self.buckets.get(key, ()))
+        words, mentioned = None, None
+        for story in candidates:
+            if any(member_source == source for member_source, _ in story.members):
+                continue
+            score = max(
+                (similarity(signature, story.signatures[kind])
+                 for kind, signature in signatures.items() if kind in story.signatures),
+                default=0
+            )
+            if score < best_score:
+                continue
+            if words is None:
+                words, mentioned = set(tokens(title)), places(title)
+            if story.places != mentioned or swapped_entity(words, story.words):
+                continue
+            best, best_score = story, score
+        return best
+
+    def assign(self, source, link, title, text=None):
+        """تسجيل خبر مرشح؛ يُرجع رابط الخبر الممثل إن كان مكرراً لخبر آخر، وإلا None"""
+        now = time.monotonic()
+        with self.lock:
+            self.purge(now)
+            story = self.by_link.get(link)
+            if story is None:
+                signatures = self.signatures(title, text)
+                keys = self.band_keys(signatures)
+                story = self.best_match(signatures, keys, source, title) if signatures else None
+                if story is None:
+                    story = Story(link, source, title, signatures, now)
+                    story.buckets = keys
+                    for key in keys:
+                        self.buckets.setdefault(key, set()).add(story)
+                    self.stories.append(story)
+                else:
+                    story.members.append((source, link))
+                self.by_link[link] = story
+            return None if story.link == link else story.link
+
+    def mark_built(self, links):
+        """الأخبار الممثلة التي صار لها عنصر في دورة مكتملة"""
+        with self.lock:
+            for link in links:
+                story = self.by_link.get(link)
+                if story is not None and story.link == link:
+                    story.built = True
+
+    def drop_unbuilt(self):
+        """نسيان الأخبار التي لم يكتمل جلب ممثلها (تجاوز المهلة أو خطأ)
+
+        تُستدعى قبل كل دورة، فيصبح أول مصدر يعيد الخبر ممثله الجديد بدل أن يبقى الخبر محجوباً.
+        """
+        with self.lock:
+            kept = deque()
+            for story in self.stories:
+                if story.built:
+                    kept.append(story)
+                else:
+                    self.forget(story)
+            self.stories = kept
+
+    def related(self, link):
+        """المصادر الأخرى للخبر الممثل: قائمة (اسم المصدر، الرابط)"""
+        with self.lock:
+            story = self.by_link.get(link)
+            if story is None or story.link != link:
+                return []
+            return [(source, member) for source, member in story.members if member != link]
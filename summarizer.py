@@ -0,0 +1,227 @@
+import hashlib
+import sqlite3
+import threading
+import time
+
+from breakers import CircuitOpenError
+from metrics import METRICS
+
+
+def summary_key(model, title, content):
+    """مفتاح التخزين المؤقت: بصمة النموذج والعنوان والمحتوى"""
+    digest = hashlib.sha256()
+    for part in (model, title, content or ''):
+        digest.update(part.encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+
+def summary_input(title, content):
+    """تجهيز النص للتلخيص"""
+    return f"{title}. {(content or '')[:500]}"  # أول 500 حرف من المحتوى
+
+
+class SummaryCache:
+    """ذاكرة مؤقتة على القرص للموجزات مع إزالة الأقدم استخداماً (LRU)"""
+
+    def __init__(self, path, max_entries=5000):
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS summaries ('
+            'key TEXT PRIMARY KEY, summary TEXT NOT NULL, used_at REAL NOT NULL)'
+        )
+        self.conn.execute(
+            'CREATE INDEX IF NOT EXISTS idx_summaries_used_at ON summaries (used_at)'
+        )
+        self.conn.commit()
+
+    def get_many(self, keys):
+        """جلب الموجزات المخزنة وتحديث وقت استخدامها"""
+        if not keys:
+            return {}
+        placeholders = ','.join('?' * len(keys))
+        with self.lock:
+            rows = self.conn.execute(
+                f'SELECT key, summary FROM summaries WHERE key IN ({placeholders})', list(keys)
+            ).fetchall()
+            if rows:
+                now = time.time()
+                self.conn.executemany(
+                    'UPDATE summaries SET used_at = ? WHERE key = ?',
+                    [(now, key) for key, _ in rows]
+                )
+                self.conn.commit()
+        return dict(rows)
+
+    def put_many(self, entries):
+        """تخزين موجزات جديدة ثم حذف الأقدم عند تجاوز الحد"""
+        if not entries:
+            return
+        now = time.time()
+        with self.lock:
+            self.conn.executemany(
+                'INSERT OR REPLACE INTO summaries (key, summary, used_at) VALUES (?, ?, ?)',
+                [(key, summary, now) for key, summary in entries.items()]
+            )
+            self.conn.execute(
+                'DELETE FROM summaries WHERE key IN ('
+                'SELECT key FROM summaries ORDER BY used_at DESC LIMIT -1 OFFSET ?)',
+                (self.max_entries,)
+            )
+            self.conn.commit()
+
+
+class RemoteSummarizer:
+    """التلخيص عبر Hugging Face Inference API بطلب واحد لعدة نصوص"""
+
+    def __init__(self, http, token, model, max_length=100, min_length=30, timeout=30):
+        self.http = http
+        self.token = token
+        self.model = model
+        self.max_length = max_length
+        self.min_length = min_length
+        self.timeout = timeout
+
+    @property
+    def available(self):
+        return bool(self.token)
+
+    def summarize_batch(self, texts):
+        headers = {
+            "Authorization": f"Bearer {self.token}",
+            "Content-Type": "application/json"
+        }
+        payload = {
+            "inputs": texts,
+            "parameters": {
+                "max_length": self.max_length,
+                "min_length": self.min_length,
+                "do_sample": False
+            },
+            "options": {"wait_for_model": True}
+        }
+        api_url = f"https://api-inference.huggingface.co/models/{self.model}"
+        response = self.http.post(api_url, headers=headers, json=payload, timeout=self.timeout)
+        if response.status_code != 200:
+            raise RuntimeError(f"خطأ في Hugging Face API: {response.status_code}")
+
+        result = response.json()
+        if not isinstance(result, list) or len(result) != len(texts):
+            raise RuntimeError("رد غير متوقع من Hugging Face API")
+        # قد يعيد الـ API قائمة داخل قائمة لكل مدخل
+        return [
+            (entry[0] if isinstance(entry, list) and entry else entry).get('summary_text')
+            for entry in result
+        ]
+
+
+class LocalSummarizer:
+    """التلخيص محلياً على المعالج بتمريرة واحدة لكل دفعة"""
+
+    def __init__(self, model, max_length=100, min_length=30):
+        self.model = model
+        self.max_length = max_length
+        self.min_length = min_length
+        self.pipeline = None
+        self.lock = threading.Lock()
+
+    @property
+    def available(self):
+        return True
+
+    def load(self):
+        """تحميل النموذج عند أول استخدام فقط"""
+        if self.pipeline is None:
+            from transformers import pipeline
+            self.pipeline = pipeline('summarization', model=self.model, device=-1)
+        return self.pipeline
+
+    def summarize_batch(self, texts):
+        with self.lock:
+            summarize = self.load()
+            result = summarize(
+                texts,
+                max_length=self.max_length,
+                min_length=self.min_length,
+                do_sample=False,
+                truncation=True,
+                batch_size=len(texts)
+            )
+        return [entry.get('summary_text') for entry in result]
+
+
+class Summarizer:
+    """واجهة موحدة للتلخيص: ذاكرة مؤقتة أولاً ثم الواجهة الخلفية للنصوص الجديدة"""
+
+    def __init__(self, backend, cache=None, log=print, breaker=None):
+        self.backend = backend
+        self.cache = cache
+        self.log = log
+        self.breaker = breaker  # عند تعطل الواجهة تُستخدم العناوين فوراً بدل انتظار المهلة
+
+    def summarize_many(self, articles):
+        """تلخيص قائمة (عنوان، محتوى) وإرجاع الموجزات بنفس الترتيب"""
+        if not articles:
+            return []
+        if not self.backend.available:
+            return ["موجز غير متوفر - يتطلب توكن Hugging Face"] * len(articles)
+
+        keys = [summary_key(self.backend.model, title, content) for title, content in articles]
+        cached = self.cache.get_many(set(keys)) if self.cache else {}
+
+        # مقال واحد قد يظهر أكثر من مرة في الدفعة
+        missing = {}
+        for key, (title, content) in zip(keys, articles):
+            if key not in cached and key not in missing:
+                missing[key] = summary_input(title, content)
+
+        METRICS.cache_result('summary', True, sum(key in cached for key in keys))
+        METRICS.cache_result('summary', False, len(missing))
+
+        fresh = {}
+        if missing:
+            try:
+                if self.breaker:
+                    with self.breaker.call():
+                        summaries = self.backend.summarize_batch(list(missing.values()))
+                else:
+                    summaries = self.backend.summarize_batch(list(missing.values()))
+                fresh = {key: summary for key, summary in zip(missing, summaries) if summary}
+                if self.cache:
+                    self.cache.put_many(fresh)
+            except CircuitOpenError as e:
+                self.log(f"تم تخطي التلخيص: {str(e)}")
+            except Exception as e:
+                METRICS.error('summarize')
+                self.log(f"خطأ في إنشاء الموجز: {str(e)}")
+
+        return [
+            cached.get(key) or fresh.get(key) or title[:100] + "..."
+            for key, (title, _) in zip(keys, articles)
+        ]
+
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+
+def get_summary_cache(path, max_entries=5000):
+    """الحصول على ذاكرة موجزات مشتركة لكل ملف داخل العملية"""
+    with _caches_lock:
+        if path not in _caches:
+            _caches[path] = SummaryCache(path, max_entries)
+        return _caches[path]
+
+
+_local_backends = {}
+
+
+def get_local_summarizer(model, max_length=100, min_length=30):
+    """نموذج محلي واحد لكل عملية حتى لا يُحمّل أكثر من مرة"""
+    with _caches_lock:
+        if model not in _local_backends:
+            _local_backends[model] = LocalSummarizer(model, max_length, min_length)
+        return _local_backends[model]
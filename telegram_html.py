@@ -0,0 +1,125 @@
+import html
+import re
+
+# حدود رسالة تيليجرام بعد تحليل HTML: الطول بوحدات UTF-16 وعدد التنسيقات
+MESSAGE_LIMIT = 4096
+ENTITY_LIMIT = 100
+
+_TAGS = re.compile(r'<[^>]*>')
+# وسم، أو رمز HTML مثل &amp;، أو مسافات، أو كلمة؛ لا يُقسم أي منها بين رسالتين
+_TOKENS = re.compile(r'<[^>]*>|&#?\w+;|\s+|[^<&\s]+|&')
+_TAG_NAME = re.compile(r'</?\s*([a-zA-Z0-9-]+)')
+
+
+def units(text):
+    """الطول كما يحسبه تيليجرام: وحدات UTF-16"""
+    return len(text.encode('utf-16-le')) // 2
+
+
+def visible_length(text):
+    """طول النص الظاهر بعد حذف الوسوم وفك الرموز"""
+    return units(html.unescape(_TAGS.sub('', text)))
+
+
+def entity_count(text):
+    """عدد التنسيقات (الوسوم المفتوحة) في الرسالة"""
+    return sum(1 for tag in _TAGS.findall(text) if not tag.startswith('</'))
+
+
+def fits(text, limit=MESSAGE_LIMIT, max_entities=ENTITY_LIMIT):
+    return visible_length(text) <= limit and entity_count(text) <= max_entities
+
+
+def split_html(text, limit=MESSAGE_LIMIT, max_entities=ENTITY_LIMIT):
+    """تقسيم HTML طويل إلى أجزاء صالحة دون كسر أي وسم
+
+    الوسوم المفتوحة عند نقطة القطع تُغلق في نهاية الجزء وتُفتح من جديد في بداية
+    الجزء التالي، ويُفضّل القطع عند المسافات. الكلمة الأطول من الحد تُقطع بالأحرف.
+    """
+    chunks = []
+    current = []
+    open_tags = []  # (الاسم، الوسم الافتتاحي كما هو)
+    length = 0
+    entities = 0
+
+    def flush():
+        nonlocal current, length, entities
+        closing = ''.join(f'</{name}>' for name, _ in reversed(open_tags))
+        chunk = (''.join(current) + closing).strip()
+        if _TAGS.sub('', chunk).strip():
+            chunks.append(chunk)
+        current = [tag for _, tag in open_tags]
+        length = 0
+        entities = len(open_tags)
+
+    for token in _TOKENS.findall(text):
+        if token.startswith('<'):
+            match = _TAG_NAME.match(token)
+            name = match.group(1).lower() if match else ''
+            if token.startswith('</'):
+                for index in range(len(open_tags) - 1, -1, -1):
+                    if open_tags[index][0] == name:
+                        del open_tags[index]
+                        break
+            else:
+                if entities + 1 > max_entities:
+                    flush()
+                open_tags.append((name, token))
+                entities += 1
+            current.append(token)
+            continue
+
+        size = visible_length(token)
+        if length + size > limit:
+            if token.isspace():
+                continue
+            if length:
+                flush()
+            # كلمة واحدة أطول من الحد نفسه
+            while units(token) > limit and not token.startswith('&'):
+                piece = token[:limit]
+                while units(piece) > limit:
+                    piece = piece[:-1]
+                current.append(piece)
+                token = token[len(piece):]
+                flush()
+            size = visible_length(token)
+        current.append(token)
+        length += size
+
+    flush()
+    return chunks
+
+
+def pack_blocks(blocks, header='', footer='', separator='\n\n',
+                limit=MESSAGE_LIMIT, max_entities=ENTITY_LIMIT):
+    """تجميع كتل HTML (خبر لكل كتلة) في أقل عدد من الرسائل
+
+    الترويسة تُدمج مع أول رسالة والخاتمة مع آخرها إن اتسعتا، والكتلة لا تُقسم
+    إلا إذا كانت وحدها أطول من رسالة كاملة.
+    """
+    chunks = []
+    current = header
+
+    def add(block):
+        nonlocal current
+        candidate = f'{current}{separator}{block}' if current else block
+        if fits(candidate, limit, max_entities):
+            current = candidate
+            return
+        if current:
+            chunks.append(current)
+        if fits(block, limit, max_entities):
+            current = block
+        else:
+            parts = split_html(block, limit, max_entities)
+            chunks.extend(parts[:-1])
+            current = parts[-1] if parts else ''
+
+    for block in blocks:
+        add(block)
+    if footer:
+        add(footer)
+    if current:
+        chunks.append(current)
+    return chunks
@@ -2,18 +2,42 @@
 import schedule
 import time
 import threading
-from main import NewsBot
+from config import CONFIG
+from ingest import get_pipeline
+from locks import ProcessLock
 import os
-from datetime import datetime
+
+# دورة جلب وإرسال واحدة فقط في العملية، مهما كان عدد المجدولات أو الطلبات اليدوية
+cycle_lock = threading.Lock()
+# ومجدول واحد فقط بين كل عمليات الخادم
+deployment_lock = ProcessLock(CONFIG['scheduler']['lock_file'])
 
 class TelegramScheduler:
     def __init__(self):
-        self.bot = NewsBot()
+        self.pipeline = get_pipeline()
+        self.bot = self.pipeline.bot
         self.is_running = False
+        self.scheduler = schedule.Scheduler()  # سجل مهام خاص بهذا المجدول
+        self.wakeup = threading.Event()
+        self.thread = None
+        self.thread_lock = threading.Lock()
+        self.last_run = None  # وقت بدء آخر دورة (monotonic)
+        self.coalesce_window = CONFIG['scheduler']['coalesce_window']
+        
+    def trigger(self, reason):
+        """موعد مستحق: يُدمج مع دورة جارية أو بدأت للتو بدل تشغيل دورة جديدة"""
+        if self.last_run is not None and time.monotonic() - self.last_run < self.coalesce_window:
+            self.bot.log(f"دمج موعد {reason} مع الدورة الأخيرة", 'DEBUG')
+            return
+        self.run_news_job()
         
     def run_news_job(self):
         """تشغيل مهمة جلب وإرسال الأخبار"""
+        if not cycle_lock.acquire(blocking=False):
+            self.bot.log("تخطي المهمة: دورة أخرى قيد التشغيل", 'DEBUG')
+            return
         try:
+            self.last_run = time.monotonic()
             self.bot.log("بدء مهمة جلب الأخبار السورية المجدولة")
             
             # التحقق من وجود التوكنات المطلوبة
@@ -25,8 +49,8 @@ class TelegramScheduler:
                 self.bot.log("خطأ: CHAT_ID غير موجود")
                 return
             
-            # تشغيل البوت
-            result = self.bot.send_news_to_telegram()
+            # دورة حديثة من واجهة الويب تكفي، وإلا تبدأ دورة يستفيد منها الجميع
+            result = self.bot.send_news_to_telegram(self.pipeline.latest(reason="المجدول"))
             
             if result:
                 self.bot.log("✅ تم إرسال الأخبار السورية بنجاح")
@@ -35,58 +59,75 @@ class TelegramScheduler:
                 
         except Exception as e:
             self.bot.log(f"❌ خطأ في المهمة المجدولة: {str(e)}")
+        finally:
+            cycle_lock.release()
     
     def start_scheduler(self):
-        """بدء المجدول"""
+        """بدء المجدول؛ لا يبدأ إن كان مجدول آخر يعمل في عملية أخرى"""
+        if not deployment_lock.acquire(self):
+            self.is_running = False
+            self.bot.log("⚠️ مجدول الأخبار يعمل بالفعل في عملية أخرى")
+            return False
         self.is_running = True
+        self.wakeup.clear()
         
         # جدولة المهام
-        schedule.every(30).minutes.do(self.run_news_job)  # كل 30 دقيقة
-        schedule.every().hour.at(":00").do(self.run_news_job)  # كل ساعة
-        schedule.every().day.at("08:00").do(self.run_news_job)  # الساعة 8 صباحاً
-        schedule.every().day.at("12:00").do(self.run_news_job)  # الساعة 12 ظهراً
-        schedule.every().day.at("18:00").do(self.run_news_job)  # الساعة 6 مساءً
+        self.scheduler.every(30).minutes.do(self.trigger, "كل 30 دقيقة")
+        self.scheduler.every().hour.at(":00").do(self.trigger, "كل ساعة")
+        self.scheduler.every().day.at("08:00").do(self.trigger, "8:00")  # الساعة 8 صباحاً
+        self.scheduler.every().day.at("12:00").do(self.trigger, "12:00")  # الساعة 12 ظهراً
+        self.scheduler.every().day.at("18:00").do(self.trigger, "18:00")  # الساعة 6 مساءً
         
         self.bot.log("🚀 تم بدء مجدول الأخبار السورية")
         self.bot.log("📅 المواعيد: كل 30 دقيقة + 8:00، 12:00، 18:00")
         
         # تشغيل مهمة فورية عند البدء
-        self.run_news_job()
+        self.trigger("البدء")
         
-        # حلقة التشغيل المستمر
+        # حلقة التشغيل المستمر: النوم حتى أقرب موعد بدل الفحص كل دقيقة
         while self.is_running:
-            schedule.run_pending()
-            time.sleep(60)  # فحص كل دقيقة
+            self.scheduler.run_pending()
+            idle = self.scheduler.idle_seconds
+            timeout = CONFIG['scheduler']['max_sleep'] if idle is None else min(max(idle, 0), CONFIG['scheduler']['max_sleep'])
+            self.wakeup.wait(timeout)  # الإيقاف يوقظ الحلقة فوراً
+        deployment_lock.release(self)  # لا يحرر قفلاً أخذه مجدول أحدث
+        return True
     
     def stop_scheduler(self):
         """إيقاف المجدول"""
         self.is_running = False
-        schedule.clear()
+        self.scheduler.clear()
+        self.wakeup.set()
         self.bot.log("⏹️ تم إيقاف مجدول الأخبار")
     
     def run_in_background(self):
-        """تشغيل المجدول في خيط منفصل"""
-        scheduler_thread = threading.Thread(target=self.start_scheduler, daemon=True)
-        scheduler_thread.start()
-        return scheduler_thread
+        """تشغيل المجدول في خيط منفصل، خيط واحد فقط لكل مجدول"""
+        with self.thread_lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self.start_scheduler, daemon=True)
+                self.thread.start()
+            return self.thread
 
 def manual_send():
     """إرسال يدوي للأخبار"""
-    bot = NewsBot()
+    pipeline = get_pipeline()
     print("🔄 بدء الإرسال اليدوي للأخبار السورية...")
-    result = bot.send_news_to_telegram()
+    with cycle_lock:  # انتظار الدورة المجدولة الجارية إن وجدت
+        result = pipeline.bot.send_news_to_telegram(pipeline.latest(reason="إرسال يدوي"))
     
     if result:
-        print("✅ تم إرسال الأخبار بنجاح!")
+        print("✅ تمت إضافة الأخبار إلى طابور الإرسال!")
     else:
         print("⚠️ لم يتم العثور على أخبار جديدة")
+    return result
 
 if __name__ == "__main__":
     import sys
     
     if len(sys.argv) > 1 and sys.argv[1] == "manual":
         # تشغيل يدوي
-        manual_send()
+        if manual_send():
+            get_pipeline().bot.delivery.join()  # انتظار إفراغ الطابور قبل الخروج
     else:
         # تشغيل المجدول
         scheduler = TelegramScheduler()
@@ -1,99 +1,530 @@
 
-from flask import Flask, render_template, jsonify, request
+import time
+
+_import_started = time.perf_counter()
+
+from flask import Blueprint, Flask, Response, render_template, jsonify, request
+import gzip
+import hashlib
 import json
 import os
 from datetime import datetime
-from main import NewsBot, CONFIG
-from telegram_scheduler import TelegramScheduler, manual_send
+from config import CONFIG, ensure_data_dir, get_source_registry
+from article_store import get_article_store
+from breakers import get_breakers
+from bot_log import tail_log
+from locks import ProcessLock
+from metrics import METRICS
 import threading
-import time
+from collections import namedtuple
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# الاستيراد لا يبدأ أي خيط ولا يلمس الملفات ولا يحمّل main أو تيليجرام أو BeautifulSoup:
+# NewsBot يُنشأ عند أول حاجة فعلية إليه، والعمّال يبدأون مع أول طلب (أو مع __main__).
+bp = Blueprint('news', __name__)
+
+MIN_POLL_SLEEP = 5  # حتى لا تدور الحلقة بلا توقف إن بقي مصدر مستحقاً
+NEWS_MAX_AGE = 900  # بعدها تُعتبر الأخبار قديمة ويبدأ تحديث في الخلفية
+MIN_MANUAL_REFRESH_INTERVAL = 60  # أقل فترة بين تحديثين يدويين
+REFRESH_WAIT_TIMEOUT = 90  # أقصى انتظار لطلب التحديث اليدوي
+STREAM_HEARTBEAT = 15  # تعليق دوري في بث الأحداث حتى لا تغلق الوسائط الاتصال الخامل
+STREAM_RETRY_MS = 10000  # مهلة إعادة اتصال المتصفح بالبث بعد انقطاعه
+STREAM_MAX_AGE = 300  # يُغلق البث بعدها ويعيد المتصفح الاتصال بـ Last-Event-ID، فلا يُحجز خيط إلى الأبد
+MIN_COMPRESS_SIZE = 1024  # الردود الأصغر لا تستحق الضغط
+SEARCH_PAGE_SIZE = 20
+MAX_SEARCH_PAGE_SIZE = 100
+STARTUP_BUDGET_MS = 300  # حد زمن الاستيراد وبناء التطبيق، يتحقق منه benchmarks/bench_startup.py
+
+# لقطة ثابتة من الأخبار: لا تُعدّل أبداً بل تُستبدل كاملة، فالقراءة لا تحتاج قفلاً.
+# first_seen: رابط -> وقت الدورة التي ظهر فيها الخبر أول مرة، ومنه تُبنى ردود since والبث.
+# bodies: أجسام /api/news الجاهزة (مضغوطة أو لا) تُملأ عند أول طلب لكل ترميز.
+NewsSnapshot = namedtuple('NewsSnapshot', ['news', 'updated_at', 'stats', 'first_seen', 'version', 'bodies'])
 
-app = Flask(__name__)
+def make_snapshot(news, updated_at=None, first_seen=None):
+    """بناء لقطة جديدة مع إحصائياتها ونسختها"""
+    encoded = json.dumps([updated_at.isoformat() if updated_at else None, news], sort_keys=True, ensure_ascii=False)
+    return NewsSnapshot(
+        news=news,
+        updated_at=updated_at,
+        stats={
+            'total_articles': sum(len(articles) for articles in news.values()),
+            'active_sources': len([s for s in news.keys() if news[s]]),
+            'total_sources': len(CONFIG['sources'])
+        },
+        first_seen=first_seen or {},
+        version=hashlib.sha1(encoded.encode('utf-8')).hexdigest()[:16],
+        bodies={}
+    )
+
+def archived_snapshot():
+    """آخر دورة من الأرشيف، بعد إعادة التشغيل أو في عملية لا تجلب بنفسها"""
+    store = get_article_store(CONFIG['articles_db'])
+    cycle = store.latest_cycle()
+    if cycle is not None:
+        news, updated_at, first_seen = cycle
+        return make_snapshot(news, updated_at, first_seen)
+    # أرشيف من قبل حفظ الدورات: آخر الأخبار لكل مصدر
+    news = store.latest()
+    first_seen = {
+        article['link']: datetime.fromisoformat(article.pop('first_seen'))
+        for articles in news.values() for article in articles
+    }
+    return make_snapshot(news, first_seen=first_seen)
 
 # متغيرات عامة لتخزين البيانات
-latest_news = {}
-last_update = None
-update_lock = threading.Lock()
+news_snapshot = make_snapshot({})  # تُملأ من الأرشيف عند بدء العمّال لا عند الاستيراد
+refresh_lock = threading.Lock()
+refresh_event = None  # حدث التحديث الجاري، يشترك فيه كل من يطلب التحديث أثناءه
+refresh_requested_at = None  # وقت طلب التحديث من العملية الجالبة (monotonic)، لغير الجالبة فقط
 telegram_scheduler = None
 scheduler_thread = None
+scheduler_lock = threading.Lock()  # يمنع بدء مجدولين من طلبين متزامنين
+news_changed = threading.Condition()  # يوقظ اتصالات البث عند كل لقطة جديدة
+ingest_pipeline = None  # خط الجلب، يُنشأ مع أول دورة أو مع المجدول
+workers_lock = threading.Lock()
+workers_started = False
+ingest_lock = ProcessLock(CONFIG['ingest']['lock_file'])  # حامله هو العملية الجالبة في النشر
+startup = {'import_ms': None, 'create_app_ms': None, 'budget_ms': STARTUP_BUDGET_MS}
+
+def set_snapshot(snapshot):
+    """استبدال اللقطة دفعة واحدة وإيقاظ البث وطلبات التحديث المنتظرة"""
+    global news_snapshot, refresh_event
+    with news_changed:
+        news_snapshot = snapshot
+        news_changed.notify_all()
+    if not ingest_lock.held():
+        with refresh_lock:
+            event, refresh_event = refresh_event, None
+        if event is not None:
+            event.set()
+
+def on_news(news, updated_at):
+    """مشترك في خط الجلب: كل دورة، أياً كان من طلبها، تستبدل اللقطة دفعة واحدة"""
+    previous = news_snapshot.first_seen
+    first_seen = {
+        article['link']: previous.get(article['link'], updated_at)
+        for articles in news.values() for article in articles
+    }
+    set_snapshot(make_snapshot(news, updated_at, first_seen))
+
+def news_since(snapshot, since):
+    """الأخبار التي ظهرت أول مرة بعد since فقط، مجمعة حسب المصدر"""
+    if since is None:
+        return snapshot.news
+    delta = {}
+    for source_name, articles in snapshot.news.items():
+        fresh = [a for a in articles if snapshot.first_seen.get(a['link'], snapshot.updated_at) > since]
+        if fresh:
+            delta[source_name] = fresh
+    return delta
+
+def parse_since(value):
+    """وقت since بصيغة ISO أو ثوانٍ منذ 1970، بالتوقيت المحلي كأوقات اللقطات؛ ترفع ValueError"""
+    if not value:
+        return None
+    try:
+        return datetime.fromtimestamp(float(value))
+    except (OverflowError, OSError):
+        raise ValueError(f"وقت غير صالح: {value}")
+    except ValueError:
+        pass
+    since = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if since.tzinfo is not None:
+        since = since.astimezone().replace(tzinfo=None)
+    return since
+
+def negotiate_encoding(accept_encoding):
+    """أفضل ترميز ضغط يقبله العميل: br إن كانت brotli مثبتة ثم gzip"""
+    accepted = set()
+    for part in (accept_encoding or '').split(','):
+        name, _, params = part.strip().partition(';')
+        if params.replace(' ', '') in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+            continue
+        accepted.add(name.strip().lower())
+    if brotli is not None and 'br' in accepted:
+        return 'br'
+    if 'gzip' in accepted or '*' in accepted:
+        return 'gzip'
+    return None
+
+def compress(body, encoding):
+    if encoding == 'br':
+        return brotli.compress(body, quality=5)
+    if encoding == 'gzip':
+        return gzip.compress(body, compresslevel=6)
+    return body
+
+def get_ingest(create=True):
+    """خط الجلب (ومعه NewsBot) يُنشأ عند أول حاجة فعلية إليه فقط؛ None إن لم يُنشأ و create=False"""
+    global ingest_pipeline
+    if ingest_pipeline is None and create:
+        from ingest import get_pipeline
+        pipeline = get_pipeline()
+        pipeline.subscribe('web_snapshot', on_news)
+        ingest_pipeline = pipeline
+    return ingest_pipeline
+
+def run_refresh(event, message, force=False):
+    """تنفيذ دورة جلب واحدة عبر خط الجلب المشترك"""
+    global refresh_event
+    try:
+        get_ingest().refresh(message, force)
+    except Exception as e:
+        print(f"خطأ في تحديث الأخبار: {e}")
+    finally:
+        with refresh_lock:
+            refresh_event = None
+        event.set()
+
+def start_refresh(message="تم تحديث الأخبار في الخلفية", force=False):
+    """بدء تحديث واحد فقط في نفس الوقت؛ الطلبات المتزامنة تنتظر نفس التحديث
+
+    في العمليات غير الجالبة يُرسل الطلب إلى العملية الجالبة، والحدث يكتمل حين
+    تظهر دورتها التالية في الأرشيف.
+    """
+    global refresh_event, refresh_requested_at
+    with refresh_lock:
+        if ingest_lock.held():
+            if refresh_event is not None:
+                return refresh_event
+            refresh_event = event = threading.Event()
+        else:
+            stale = refresh_requested_at is None or time.monotonic() - refresh_requested_at > REFRESH_WAIT_TIMEOUT
+            if refresh_event is not None and not stale:
+                return refresh_event
+            if refresh_event is None:
+                refresh_event = threading.Event()
+            refresh_requested_at = time.monotonic()
+            request_refresh(force)
+            return refresh_event
+    threading.Thread(target=run_refresh, args=(event, message, force), daemon=True).start()
+    return event
+
+def request_path(name):
+    return os.path.join(CONFIG['ingest']['requests_dir'], f'{name}.request')
+
+def post_request(name, payload=''):
+    """طلب من العملية الجالبة عبر ملف صغير تقرؤه في حلقتها؛ الطلب الأحدث بنفس الاسم يحل محل السابق"""
+    try:
+        with open(request_path(name), 'w') as f:
+            f.write(payload)
+    except OSError as e:
+        print(f"خطأ في إرسال الطلب {name} إلى العملية الجالبة: {e}")
+
+def take_request(name):
+    """محتوى الطلب المعلق بهذا الاسم من عملية أخرى أو None، ويُحذف عند أخذه"""
+    path = request_path(name)
+    taken = f'{path}.{os.getpid()}'
+    try:
+        os.replace(path, taken)  # طلب يصل أثناء القراءة يبقى للفحص التالي ولا يُحذف معه
+        with open(taken) as f:
+            payload = f.read().strip()
+        os.remove(taken)
+    except OSError:
+        return None
+    return payload
+
+def request_refresh(force=False):
+    """طلب دورة من العملية الجالبة؛ force يبقى إن طلبته أي عملية"""
+    if force or not os.path.exists(request_path('refresh')):
+        post_request('refresh', 'force' if force else '')
+
+def take_refresh_request():
+    """طلب تحديث معلق من عملية أخرى: None أو force (True/False)"""
+    payload = take_request('refresh')
+    return None if payload is None else payload == 'force'
+
+def serve_requests():
+    """تنفيذ طلبات الإرسال والمجدول التي أرسلتها بقية العمليات، ثم نشر حالة الجلب لها"""
+    if take_request('telegram_send') is not None:
+        threading.Thread(target=run_manual_send, daemon=True).start()
+    action = take_request('scheduler')
+    if action == 'start':
+        print(start_scheduler_here()[1])
+    elif action == 'stop':
+        print(stop_scheduler_here()[1])
+    publish_state()
+
+def local_state():
+    """حالة الجلب والمجدول والقياسات في هذه العملية"""
+    pipeline = get_ingest(create=False)
+    return {
+        'pid': os.getpid(),
+        'published_at': datetime.now().isoformat(),
+        'scheduler_running': bool(telegram_scheduler and telegram_scheduler.is_running),
+        'polling': pipeline.bot.poller.snapshot() if pipeline else {},
+        'dependencies': get_breakers(CONFIG['breakers']).health(),
+        'metrics': METRICS.summary(),
+        'prometheus': METRICS.render_prometheus()
+    }
+
+def publish_state():
+    """نشر حالة العملية الجالبة في ملف تقرؤه بقية العمليات، بالاستبدال دفعة واحدة"""
+    path = CONFIG['ingest']['state_file']
+    temp = f'{path}.{os.getpid()}'
+    try:
+        with open(temp, 'w', encoding='utf-8') as f:
+            json.dump(local_state(), f, ensure_ascii=False)
+        os.replace(temp, path)
+    except (OSError, TypeError, ValueError) as e:
+        print(f"خطأ في نشر حالة الجلب: {e}")
+
+def fetching_state():
+    """حالة العملية الجالبة: مباشرة إن كانت هذه العملية، وإلا آخر ما نشرته ({} إن لم تنشر بعد)"""
+    if ingest_lock.held():
+        return local_state()
+    try:
+        with open(CONFIG['ingest']['state_file'], encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def is_refreshing():
+    if refresh_event is not None:
+        return True
+    pipeline = get_ingest(create=False)
+    return pipeline is not None and pipeline.is_running()
+
+def snapshot_age(snapshot):
+    if snapshot.updated_at is None:
+        return None
+    return (datetime.now() - snapshot.updated_at).total_seconds()
 
 def update_news_background():
-    """تحديث الأخبار في الخلفية"""
-    global latest_news, last_update
-    
+    """تحديث الأخبار في الخلفية، في العملية الجالبة فقط"""
+    pipeline = get_ingest()
     while True:
+        serve_requests()
+        force = take_refresh_request()
+        if force is not None:
+            start_refresh("تم تحديث الأخبار بطلب من عملية أخرى", force).wait()
+            continue
+        # لكل مصدر موعده المتكيف؛ الدورة تجلب المستحق منها فقط، ودورات المجدول تحدّث اللقطة أيضاً
+        wait = pipeline.seconds_until_due()
+        if wait is not None and wait <= 0:
+            start_refresh().wait()
+            time.sleep(MIN_POLL_SLEEP)
+            continue
+        # النوم على دفعات قصيرة حتى تُلبى طلبات التحديث من بقية العمليات بسرعة
+        interval = CONFIG['ingest']['follow_interval']
+        time.sleep(interval if wait is None else min(wait, interval))
+
+def follow_archive():
+    """تحديث اللقطة من الأرشيف إن حفظت العملية الجالبة دورة أحدث"""
+    try:
+        updated_at = get_article_store(CONFIG['articles_db']).cycle_time()
+        if updated_at is not None and (news_snapshot.updated_at is None or updated_at > news_snapshot.updated_at):
+            set_snapshot(archived_snapshot())
+    except Exception as e:
+        print(f"خطأ في قراءة أرشيف الأخبار: {e}")
+
+def run_workers():
+    """عملية واحدة في النشر تجلب المصادر؛ البقية تتابع الأرشيف وتحل محلها إن توقفت"""
+    global refresh_event
+    while not ingest_lock.acquire():
+        follow_archive()
         try:
-            with update_lock:
-                bot = NewsBot()
-                latest_news = bot.get_all_news()
-                last_update = datetime.now()
-                bot.log("تم تحديث الأخبار في الخلفية")
-        except Exception as e:
-            print(f"خطأ في تحديث الأخبار: {e}")
-        
-        # تحديث كل 10 دقائق
-        time.sleep(600)
+            get_source_registry().reload_if_changed()
+        except Exception:
+            pass  # خطأ الملف تسجله العملية الجالبة وتعرضه /api/sources
+        time.sleep(CONFIG['ingest']['follow_interval'])
+    print(f"هذه العملية ({os.getpid()}) هي العملية الجالبة للأخبار")
+    # طلبات التحديث التي سبقت أخذ القفل تنتظر أول دورة تجلبها هذه العملية
+    with refresh_lock:
+        pending, refresh_event = refresh_event, None
+    if pending is not None:
+        force = take_refresh_request()
+        start_refresh("تم تحديث الأخبار في الخلفية", bool(force)).wait()
+        pending.set()
+    update_news_background()
+
+def ensure_started():
+    """بدء العمّال مرة واحدة في العملية: قراءة المصادر والأرشيف ثم خيط الجلب أو المتابعة
 
-# بدء خيط التحديث في الخلفية
-background_thread = threading.Thread(target=update_news_background, daemon=True)
-background_thread.start()
+    يُستدعى مع أول طلب، أو مباشرة من خطاف post_fork في gunicorn لبدء العمّال قبل أي طلب.
+    """
+    global workers_started
+    with workers_lock:
+        if workers_started:
+            return
+        ensure_data_dir()
+        get_source_registry()  # ملف المصادر غير الصالح لا يرفع هنا، ويُعاد فحصه في كل دورة
+        try:
+            set_snapshot(archived_snapshot())
+        except Exception as e:
+            print(f"خطأ في قراءة أرشيف الأخبار: {e}")
+        threading.Thread(target=run_workers, daemon=True).start()
+        # بعد نجاح البدء فقط، فخطأ هنا يُعاد مع الطلب التالي بدل أن تبقى العملية بلا عمّال
+        workers_started = True
 
-@app.route('/')
+@bp.route('/')
 def index():
     """الصفحة الرئيسية"""
     return render_template('index.html')
 
-@app.route('/api/news')
+@bp.route('/api/news')
 def get_news():
-    """API لجلب الأخبار"""
-    global latest_news, last_update
+    """API لجلب الأخبار
+
+    يدعم If-None-Match (رد 304 إن لم يتغير شيء)، والضغط بـ br أو gzip،
+    و since=<وقت ISO أو ثوانٍ> لإرجاع الأخبار الجديدة بعد ذلك الوقت فقط.
+    """
+    snapshot = news_snapshot
+    try:
+        since = parse_since(request.args.get('since'))
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': f'معامل since غير صالح: {str(e)}'}), 400
     
-    # إذا لم تكن هناك أخبار محفوظة، جلبها الآن
-    if not latest_news:
-        with update_lock:
-            bot = NewsBot()
-            latest_news = bot.get_all_news()
-            last_update = datetime.now()
+    # الرد دائماً من الذاكرة، وإن كانت الأخبار قديمة أو فارغة يبدأ تحديث في الخلفية
+    age = snapshot_age(snapshot)
+    if age is None or age > NEWS_MAX_AGE:
+        start_refresh()
     
-    # إحصائيات سريعة
-    total_articles = sum(len(articles) for articles in latest_news.values())
-    active_sources = len([s for s in latest_news.keys() if latest_news[s]])
+    refreshing = is_refreshing()
+    etag = f'{snapshot.version}-{int(refreshing)}'
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+    else:
+        encoding = negotiate_encoding(request.headers.get('Accept-Encoding'))
+        body, encoding = news_body(snapshot, refreshing, since, encoding)
+        response = Response(body, mimetype='application/json')
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+    
+    # no-cache: المتصفح يحتفظ بالرد لكن يتحقق منه بـ If-None-Match في كل مرة
+    response.set_etag(etag, weak=True)
+    response.headers['Cache-Control'] = 'no-cache'
+    response.vary.add('Accept-Encoding')
+    return response
+
+def news_body(snapshot, refreshing, since, encoding):
+    """جسم رد /api/news جاهزاً للإرسال؛ الرد الكامل يُبنى ويُضغط مرة واحدة لكل لقطة وترميز"""
+    key = (refreshing, encoding)
+    if since is None and key in snapshot.bodies:
+        return snapshot.bodies[key]
+    
+    payload = {
+        'status': 'success',
+        'timestamp': snapshot.updated_at.isoformat() if snapshot.updated_at else datetime.now().isoformat(),
+        'news': news_since(snapshot, since),
+        'stats': snapshot.stats,
+        'refreshing': refreshing
+    }
+    if since is not None:
+        payload['since'] = since.isoformat()
+    body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+    if len(body) < MIN_COMPRESS_SIZE:
+        encoding = None
+    result = (compress(body, encoding), encoding)
+    if since is None:
+        snapshot.bodies[key] = result
+    return result
+
+@bp.route('/api/news/stream')
+def stream_news():
+    """بث الأخبار الجديدة (Server-Sent Events) فور انتهاء كل دورة جلب
+
+    كل حدث news يحمل الأخبار التي ظهرت بعد الحدث السابق فقط، ومعرّفه وقت اللقطة،
+    فيكمل المتصفح من حيث توقف عبر Last-Event-ID عند إعادة الاتصال.
+    بين الدورات لا يُرسل إلا تعليق قصير كل STREAM_HEARTBEAT ثانية.
+    كل اتصال يحجز خيطاً في الخادم، لذا يُغلق بعد STREAM_MAX_AGE ثانية ويعيد المتصفح
+    الاتصال تلقائياً؛ ويلزم خادم بخيوط أو غير متزامن (انظر create_app).
+    """
+    try:
+        last_seen = parse_since(request.headers.get('Last-Event-ID') or request.args.get('since'))
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': f'معامل since غير صالح: {str(e)}'}), 400
+    if last_seen is None:
+        last_seen = news_snapshot.updated_at
+    
+    def events():
+        nonlocal last_seen
+        yield f'retry: {STREAM_RETRY_MS}\n\n'
+        closes_at = time.monotonic() + STREAM_MAX_AGE
+        while time.monotonic() < closes_at:
+            with news_changed:
+                news_changed.wait_for(
+                    lambda: news_snapshot.updated_at is not None and (
+                        last_seen is None or news_snapshot.updated_at > last_seen),
+                    timeout=max(0, min(STREAM_HEARTBEAT, closes_at - time.monotonic()))
+                )
+                snapshot = news_snapshot
+            if snapshot.updated_at is None or (last_seen is not None and snapshot.updated_at <= last_seen):
+                yield ': ping\n\n'
+                continue
+            payload = {
+                'timestamp': snapshot.updated_at.isoformat(),
+                'news': news_since(snapshot, last_seen),
+                'stats': snapshot.stats
+            }
+            last_seen = snapshot.updated_at
+            yield f'id: {last_seen.isoformat()}\nevent: news\ndata: {json.dumps(payload, ensure_ascii=False)}\n\n'
+    
+    return Response(events(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'  # حتى لا يجمع nginx الأحداث قبل إرسالها
+    })
+
+def parse_cursor(value):
+    """مؤشر before: إما next_before من الصفحة السابقة (<ثوانٍ>_<id>) أو وقت ISO/ثوانٍ؛ ترفع ValueError"""
+    if not value:
+        return None
+    stamp, _, article_id = value.partition('_')
+    if article_id:
+        return float(stamp), int(article_id)
+    # وقت فقط: كل ما ظهر قبله، أياً كان id
+    return parse_since(value).timestamp(), 0
+
+@bp.route('/api/news/search')
+def search_news():
+    """البحث في أرشيف الأخبار
+
+    المعاملات الاختيارية: q (نص البحث)، source (اسم المصدر أو مفتاحه)، before، limit.
+    النتائج من الأحدث إلى الأقدم، والصفحة التالية تُطلب بتمرير next_before كـ before.
+    """
+    try:
+        before = parse_cursor(request.args.get('before'))
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': f'معامل before غير صالح: {str(e)}'}), 400
+    limit = min(max(request.args.get('limit', SEARCH_PAGE_SIZE, type=int), 1), MAX_SEARCH_PAGE_SIZE)
+    source = request.args.get('source')
+    if source in CONFIG['sources']:
+        source = CONFIG['sources'][source]['name']
+    
+    try:
+        results, cursor = get_article_store(CONFIG['articles_db']).search(
+            request.args.get('q'), source, before, limit
+        )
+    except Exception as e:
+        return jsonify({'status': 'error', 'message': f'خطأ في البحث: {str(e)}'}), 500
     
     return jsonify({
         'status': 'success',
-        'timestamp': last_update.isoformat() if last_update else datetime.now().isoformat(),
-        'news': latest_news,
-        'stats': {
-            'total_articles': total_articles,
-            'active_sources': active_sources,
-            'total_sources': len(CONFIG['sources'])
-        }
+        'results': results,
+        'count': len(results),
+        'next_before': f'{cursor[0]!r}_{cursor[1]}' if cursor else None
     })
 
-@app.route('/api/news/refresh')
+@bp.route('/api/news/refresh')
 def refresh_news():
     """API لتحديث الأخبار فوراً"""
-    global latest_news, last_update
-    
     try:
-        with update_lock:
-            bot = NewsBot()
-            latest_news = bot.get_all_news()
-            last_update = datetime.now()
-            bot.log("تم تحديث الأخبار يدوياً")
-        
-        total_articles = sum(len(articles) for articles in latest_news.values())
+        # تحديث حديث جداً يكفي، والطلبات المتزامنة تشترك في تحديث واحد
+        age = snapshot_age(news_snapshot)
+        if age is None or age > MIN_MANUAL_REFRESH_INTERVAL or is_refreshing():
+            start_refresh("تم تحديث الأخبار يدوياً", force=True).wait(REFRESH_WAIT_TIMEOUT)
         
+        snapshot = news_snapshot
         return jsonify({
             'status': 'success',
             'message': 'تم تحديث الأخبار بنجاح',
-            'timestamp': last_update.isoformat(),
-            'news': latest_news,
-            'stats': {
-                'total_articles': total_articles,
-                'active_sources': len([s for s in latest_news.keys() if latest_news[s]]),
-                'total_sources': len(CONFIG['sources'])
-            }
+            'timestamp': snapshot.updated_at.isoformat() if snapshot.updated_at else datetime.now().isoformat(),
+            'news': snapshot.news,
+            'stats': snapshot.stats
         })
     except Exception as e:
         return jsonify({
@@ -101,16 +532,32 @@ def refresh_news():
             'message': f'خطأ في تحديث الأخبار: {str(e)}'
         })
 
-@app.route('/api/logs')
+@bp.route('/api/logs')
 def get_logs():
-    """API لجلب السجلات"""
+    """API لجلب السجلات
+
+    المعاملات الاختيارية: lines (افتراضياً 100)، level، source، since، until
+    """
     try:
-        with open(CONFIG['log_file'], 'r', encoding='utf-8') as f:
-            logs = f.readlines()
+        lines = min(max(request.args.get('lines', 100, type=int), 1), 1000)
+        logs = tail_log(
+            CONFIG['log_file'],
+            lines=lines,
+            level=request.args.get('level'),
+            source=request.args.get('source'),
+            since=request.args.get('since'),
+            until=request.args.get('until')
+        )
         return jsonify({
             'status': 'success',
-            'logs': logs[-100:]  # آخر 100 سجل
+            'logs': logs
         })
+    except ValueError as e:
+        return jsonify({
+            'status': 'error',
+            'message': f'معاملات غير صالحة: {str(e)}',
+            'logs': []
+        }), 400
     except FileNotFoundError:
         return jsonify({
             'status': 'error',
@@ -118,31 +565,77 @@ def get_logs():
             'logs': []
         })
 
-@app.route('/api/sources')
+@bp.route('/api/sources')
 def get_sources():
     """API لجلب معلومات المصادر"""
+    warning = None
+    try:
+        get_source_registry().reload_if_changed()
+    except Exception as e:
+        warning = f'ملف المصادر غير صالح، تُعرض المصادر الحالية: {str(e)}'
+        print(warning)
+    # حالة الجلب والقواطع من العملية الجالبة، دون إنشاء NewsBot من أجل العرض
+    state = fetching_state()
+    polling = state.get('polling', {})
+    health = state.get('dependencies', {})
     sources_info = []
     for key, config in CONFIG['sources'].items():
         sources_info.append({
             'key': key,
             'name': config['name'],
             'url': config['url'],
+            'type': config['type'],
+            'feed_url': config.get('feed_url'),
+            'parser': config.get('parser'),
+            'timeout': config['timeout'],
+            'max_items': config['max_items'],
+            'keywords': config['keywords'],
             'enabled': config['enabled'],
-            'status': 'نشط' if config['enabled'] else 'معطل'
+            'status': 'نشط' if config['enabled'] else 'معطل',
+            'polling': polling.get(key),
+            'health': health.get(f'source:{key}')
         })
     
     return jsonify({
         'status': 'success',
-        'sources': sources_info
+        'sources': sources_info,
+        'warning': warning
     })
 
-@app.route('/api/status')
-def get_status():
-    """حالة البوت والنظام"""
-    global telegram_scheduler
+@bp.route('/api/sources', methods=['POST'])
+@bp.route('/api/sources/<source_key>', methods=['PATCH'])
+def update_source(source_key=None):
+    """إضافة مصدر (POST مع key) أو تعديل إعدادات مصدر (PATCH)، والحفظ في ملف المصادر"""
+    changes = request.get_json(silent=True)
+    if not isinstance(changes, dict):
+        return jsonify({'status': 'error', 'message': 'يجب إرسال الإعدادات بصيغة JSON'}), 400
+    create = source_key is None
+    if create:
+        source_key = changes.pop('key', None)
+    
+    registry = get_source_registry()
+    from source_registry import SourceConflict  # حُمّلت مع السجل
+    try:
+        source = registry.update(source_key, changes, create=create)
+    except SourceConflict as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 409
+    except KeyError:
+        return jsonify({'status': 'error', 'message': f'المصدر {source_key} غير موجود'}), 404
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
     
+    return jsonify({
+        'status': 'success',
+        'message': f'تم حفظ إعدادات المصدر {source_key}',
+        'source': {'key': source_key, **source}
+    })
+
+@bp.route('/api/status')
+def get_status():
+    """حالة البوت والنظام؛ الجلب والمجدول والقياسات كما تنشرها العملية الجالبة"""
+    state = fetching_state()
     telegram_status = "معطل"
-    if telegram_scheduler and telegram_scheduler.is_running:
+    if state.get('scheduler_running'):
         telegram_status = "نشط"
     elif os.getenv('TELEGRAM_TOKEN') and os.getenv('CHAT_ID'):
         telegram_status = "جاهز"
@@ -152,18 +645,82 @@ def get_status():
         'timestamp': datetime.now().isoformat(),
         'bot_name': 'بوت الأخبار السورية المطور',
         'version': '3.0',
-        'last_update': last_update.isoformat() if last_update else None,
+        'last_update': news_snapshot.updated_at.isoformat() if news_snapshot.updated_at else None,
         'sources_count': len(CONFIG['sources']),
         'active_sources': len([s for s in CONFIG['sources'].values() if s['enabled']]),
         'telegram_status': telegram_status,
         'telegram_configured': bool(os.getenv('TELEGRAM_TOKEN') and os.getenv('CHAT_ID')),
-        'huggingface_configured': bool(os.getenv('HUGGING_FACE_TOKEN'))
+        'huggingface_configured': bool(os.getenv('HUGGING_FACE_TOKEN')),
+        'metrics': state.get('metrics', {}),
+        'polling': state.get('polling', {}),
+        'dependencies': state.get('dependencies', {}),
+        'fetching': ingest_lock.held(),  # هل هذه العملية هي الجالبة للأخبار
+        'fetching_pid': state.get('pid'),
+        'state_published_at': state.get('published_at'),
+        'startup': startup
     })
 
-@app.route('/api/telegram/send', methods=['POST'])
+@bp.route('/api/metrics')
+def get_metrics():
+    """قياسات الأداء لكل مرحلة ومصدر بصيغة Prometheus، من العملية الجالبة"""
+    body = fetching_state().get('prometheus')
+    if body is None:
+        body = METRICS.render_prometheus()
+    return Response(body, mimetype='text/plain; version=0.0.4')
+
+def run_manual_send():
+    """إرسال يدوي طلبته عملية أخرى، في العملية الجالبة"""
+    try:
+        from telegram_scheduler import manual_send
+        manual_send()
+    except Exception as e:
+        print(f"خطأ في الإرسال: {e}")
+
+def start_scheduler_here():
+    """بدء المجدول في هذه العملية (الجالبة)؛ يُرجع (الحالة، الرسالة)"""
+    global telegram_scheduler, scheduler_thread
+    from telegram_scheduler import TelegramScheduler, deployment_lock
+    with scheduler_lock:
+        if telegram_scheduler and telegram_scheduler.is_running:
+            return 'warning', 'المجدول يعمل بالفعل'
+        get_ingest()
+        scheduler = TelegramScheduler()
+        # القفل باسم المجدول الجديد: مجدول سابق لم ينته خيطه بعد لا يحرره عنه
+        if not deployment_lock.acquire(scheduler):
+            return 'warning', 'المجدول يعمل بالفعل في عملية أخرى أو لم يتوقف المجدول السابق بعد'
+        try:
+            scheduler.is_running = True  # قبل بدء الخيط حتى يرى الطلب التالي أنه يعمل
+            scheduler_thread = scheduler.run_in_background()
+        except Exception:
+            deployment_lock.release(scheduler)
+            raise
+        telegram_scheduler = scheduler
+    return 'success', 'تم بدء مجدول التليجرام بنجاح'
+
+def stop_scheduler_here():
+    global telegram_scheduler
+    with scheduler_lock:
+        if telegram_scheduler:
+            telegram_scheduler.stop_scheduler()
+            telegram_scheduler = None
+    return 'success', 'تم إيقاف مجدول التليجرام'
+
+@bp.route('/api/telegram/send', methods=['POST'])
 def send_to_telegram():
-    """إرسال يدوي للأخبار إلى تيليجرام"""
+    """إرسال يدوي للأخبار إلى تيليجرام
+
+    يُنفذ في العملية الجالبة فقط، فلا تجلب بقية العمليات المصادر بنفسها من أجله:
+    هي ترسل الطلب إليها وتعود فوراً.
+    """
     try:
+        if not ingest_lock.held():
+            post_request('telegram_send')
+            return jsonify({
+                'status': 'success',
+                'message': 'تم طلب الإرسال من العملية الجالبة للأخبار، وستُرسل الأخبار الجديدة إن وجدت'
+            })
+        from telegram_scheduler import manual_send
+        get_ingest()  # حتى تظهر الدورة التي قد يبدأها الإرسال في الواجهة أيضاً
         result = manual_send()
         return jsonify({
             'status': 'success' if result else 'warning',
@@ -175,11 +732,9 @@ def send_to_telegram():
             'message': f'خطأ في الإرسال: {str(e)}'
         })
 
-@app.route('/api/telegram/scheduler/start', methods=['POST'])
+@bp.route('/api/telegram/scheduler/start', methods=['POST'])
 def start_telegram_scheduler():
-    """بدء مجدول التليجرام"""
-    global telegram_scheduler, scheduler_thread
-    
+    """بدء مجدول التليجرام في العملية الجالبة؛ بقية العمليات ترسل الطلب إليها"""
     try:
         if not os.getenv('TELEGRAM_TOKEN') or not os.getenv('CHAT_ID'):
             return jsonify({
@@ -187,18 +742,14 @@ def start_telegram_scheduler():
                 'message': 'يجب إعداد TELEGRAM_TOKEN و CHAT_ID أولاً'
             })
         
-        if telegram_scheduler and telegram_scheduler.is_running:
-            return jsonify({
-                'status': 'warning',
-                'message': 'المجدول يعمل بالفعل'
-            })
-        
-        telegram_scheduler = TelegramScheduler()
-        scheduler_thread = telegram_scheduler.run_in_background()
-        
+        if ingest_lock.held():
+            status, message = start_scheduler_here()
+        else:
+            post_request('scheduler', 'start')
+            status, message = 'success', 'تم إرسال طلب بدء المجدول إلى العملية الجالبة للأخبار'
         return jsonify({
-            'status': 'success',
-            'message': 'تم بدء مجدول التليجرام بنجاح'
+            'status': status,
+            'message': message
         })
         
     except Exception as e:
@@ -207,19 +758,18 @@ def start_telegram_scheduler():
             'message': f'خطأ في بدء المجدول: {str(e)}'
         })
 
-@app.route('/api/telegram/scheduler/stop', methods=['POST'])
+@bp.route('/api/telegram/scheduler/stop', methods=['POST'])
 def stop_telegram_scheduler():
-    """إيقاف مجدول التليجرام"""
-    global telegram_scheduler
-    
+    """إيقاف مجدول التليجرام في العملية الجالبة"""
     try:
-        if telegram_scheduler:
-            telegram_scheduler.stop_scheduler()
-            telegram_scheduler = None
-        
+        if ingest_lock.held():
+            status, message = stop_scheduler_here()
+        else:
+            post_request('scheduler', 'stop')
+            status, message = 'success', 'تم إرسال طلب إيقاف المجدول إلى العملية الجالبة للأخبار'
         return jsonify({
-            'status': 'success',
-            'message': 'تم إيقاف مجدول التليجرام'
+            'status': status,
+            'message': message
         })
         
     except Exception as e:
@@ -228,7 +778,7 @@ def stop_telegram_scheduler():
             'message': f'خطأ في إيقاف المجدول: {str(e)}'
         })
 
-@app.route('/api/config')
+@bp.route('/api/config')
 def get_config():
     """الحصول على إعدادات البوت"""
     return jsonify({
@@ -243,25 +793,57 @@ def get_config():
         }
     })
 
-@app.errorhandler(404)
+@bp.after_app_request
+def compress_response(response):
+    """ضغط ردود JSON الكبيرة لبقية الواجهات إن قبل العميل ذلك"""
+    if (response.mimetype != 'application/json' or response.direct_passthrough
+            or response.status_code != 200 or 'Content-Encoding' in response.headers):
+        return response
+    response.vary.add('Accept-Encoding')
+    body = response.get_data()
+    encoding = negotiate_encoding(request.headers.get('Accept-Encoding'))
+    if encoding and len(body) >= MIN_COMPRESS_SIZE:
+        response.set_data(compress(body, encoding))
+        response.headers['Content-Encoding'] = encoding
+    return response
+
+@bp.app_errorhandler(404)
 def not_found(error):
     return jsonify({'status': 'error', 'message': 'الصفحة غير موجودة'}), 404
 
-@app.errorhandler(500)
+@bp.app_errorhandler(500)
 def internal_error(error):
     return jsonify({'status': 'error', 'message': 'خطأ داخلي في الخادم'}), 500
 
+def create_app(start_workers=True):
+    """بناء تطبيق Flask دون أي أثر جانبي؛ العمّال يبدأون مع أول طلب إن كان start_workers
+
+    للتشغيل مع gunicorn بعمّال ذوي خيوط (البث /api/news/stream يحجز خيطاً لكل متصفح مفتوح،
+    فالعمّال المتزامنون sync يتوقفون بعدد قليل من الصفحات المفتوحة):
+        gunicorn -k gthread --threads 16 -w 4 'web_app:create_app()'
+    أو -k gevent. عملية واحدة فقط من العمليات الأربع تجلب المصادر وتشغّل المجدول والإرسال،
+    والبقية ترسل إليها الطلبات وتعرض الحالة التي تنشرها (انظر run_workers و serve_requests).
+    """
+    started = time.perf_counter()
+    app = Flask(__name__)
+    app.register_blueprint(bp)
+    if start_workers:
+        app.before_request(ensure_started)
+    startup['create_app_ms'] = round((time.perf_counter() - started) * 1000, 1)
+    total = startup['import_ms'] + startup['create_app_ms']
+    if total > STARTUP_BUDGET_MS:
+        print(f"تحذير: بدء التطبيق استغرق {total} ms، أكثر من الحد {STARTUP_BUDGET_MS} ms")
+    return app
+
+startup['import_ms'] = round((time.perf_counter() - _import_started) * 1000, 1)
+app = create_app()
+
 if __name__ == '__main__':
     # إنشاء مجلد templates إذا لم يكن موجوداً
     os.makedirs('templates', exist_ok=True)
     
-    # تحديث أولي للأخبار
-    try:
-        bot = NewsBot()
-        latest_news = bot.get_all_news()
-        last_update = datetime.now()
-        print("تم تحديث الأخبار عند بدء التطبيق")
-    except Exception as e:
-        print(f"خطأ في التحديث الأولي: {e}")
+    # مع debug تُعيد عملية المراقبة تشغيل الخادم في عملية فرعية، والعمّال يبدأون فيها وحدها
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        ensure_started()
     
     app.run(host='0.0.0.0', port=5000, debug=True)